@@ -0,0 +1,206 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.api.documents import rebuild_documents
+from app.api.response_cache import response_cache
+from app.api.schemas import (
+    DailyPlanCreate,
+    ItineraryBulkItemResult,
+    ItineraryBulkResponse,
+    ItineraryCreate,
+)
+from app.models.models import (
+    Activity,
+    DailyPlan,
+    Hotel,
+    Itinerary,
+    Transfer,
+    daily_plan_activity,
+    utcnow,
+)
+
+
+class ReferenceMaps(NamedTuple):
+    """id -> price maps for the hotels, transfers and activities a batch refers to"""
+    hotels: Dict[int, float]
+    transfers: Dict[int, float]
+    activities: Dict[int, float]
+
+
+def fetch_reference_maps(db: Session, plans: Iterable[DailyPlanCreate]) -> ReferenceMaps:
+    """Load the prices of every referenced row with one IN query per table"""
+    plans = list(plans)
+    hotel_ids = {plan.hotel_id for plan in plans}
+    transfer_ids = {plan.transfer_id for plan in plans if plan.transfer_id}
+    activity_ids = {activity_id for plan in plans for activity_id in plan.activity_ids}
+
+    def prices(price_column, id_column, ids):
+        if not ids:
+            return {}
+        return dict(db.query(id_column, price_column).filter(id_column.in_(ids)).all())
+
+    return ReferenceMaps(
+        hotels=prices(Hotel.price_per_night, Hotel.id, hotel_ids),
+        transfers=prices(Transfer.price, Transfer.id, transfer_ids),
+        activities=prices(Activity.price, Activity.id, activity_ids),
+    )
+
+
+def validate_itinerary(itinerary: ItineraryCreate, refs: ReferenceMaps) -> Optional[str]:
+    """Return an error message if the itinerary references unknown rows, else None"""
+    plans = itinerary.daily_plans
+    if any(plan.hotel_id not in refs.hotels for plan in plans):
+        return "One or more hotel IDs not found"
+    if any(plan.transfer_id and plan.transfer_id not in refs.transfers for plan in plans):
+        return "One or more transfer IDs not found"
+    if any(a not in refs.activities for plan in plans for a in plan.activity_ids):
+        return "One or more activity IDs not found"
+    return None
+
+
+def unique_activity_ids(plan: DailyPlanCreate) -> List[int]:
+    """Activity ids of a plan in request order, without duplicates"""
+    return list(dict.fromkeys(plan.activity_ids))
+
+
+def total_price(itinerary: ItineraryCreate, refs: ReferenceMaps) -> float:
+    """Sum hotel, transfer and activity prices of every daily plan"""
+    total = 0
+    for plan in itinerary.daily_plans:
+        total += refs.hotels[plan.hotel_id]
+        if plan.transfer_id:
+            total += refs.transfers[plan.transfer_id]
+        for activity_id in unique_activity_ids(plan):
+            total += refs.activities[activity_id]
+    return total
+
+
+def _insert_returning_ids(db: Session, table, rows: List[dict]) -> List[int]:
+    """
+    Insert rows with batched multi-VALUES statements and return their new ids
+    in parameter order.
+    
+    SQLite hands out rowids in VALUES order while the transaction holds the
+    write lock, but RETURNING does not promise an order, so the ids are sorted.
+    Asking SQLAlchemy for sort_by_parameter_order instead would fall back to
+    one INSERT per row on SQLite.
+    """
+    return sorted(db.scalars(insert(table).returning(table.c.id), rows).all())
+
+
+def insert_itineraries(db: Session, itineraries: List[ItineraryCreate], refs: ReferenceMaps) -> List[int]:
+    """
+    Insert validated itineraries, their daily plans and activity links with
+    executemany-style Core inserts. Returns the new itinerary ids in input order.
+    """
+    if not itineraries:
+        return []
+    now = utcnow()
+    itinerary_ids = _insert_returning_ids(
+        db,
+        Itinerary.__table__,
+        [
+            {
+                "name": itinerary.name,
+                "description": itinerary.description,
+                "nights": itinerary.nights,
+                "total_price": total_price(itinerary, refs),
+                "is_recommended": False,
+                "version": 1,
+                "updated_at": now,
+            }
+            for itinerary in itineraries
+        ],
+    )
+
+    plans = [
+        (itinerary_id, plan)
+        for itinerary_id, itinerary in zip(itinerary_ids, itineraries)
+        for plan in itinerary.daily_plans
+    ]
+    if not plans:
+        return itinerary_ids
+    plan_ids = _insert_returning_ids(
+        db,
+        DailyPlan.__table__,
+        [
+            {
+                "day_number": plan.day_number,
+                "itinerary_id": itinerary_id,
+                "hotel_id": plan.hotel_id,
+                "transfer_id": plan.transfer_id,
+                "notes": plan.notes,
+            }
+            for itinerary_id, plan in plans
+        ],
+    )
+
+    links = [
+        {"daily_plan_id": plan_id, "activity_id": activity_id}
+        for plan_id, (_, plan) in zip(plan_ids, plans)
+        for activity_id in unique_activity_ids(plan)
+    ]
+    if links:
+        db.execute(insert(daily_plan_activity), links)
+    return itinerary_ids
+
+
+def commit_itineraries(
+    db: Session, itineraries: List[ItineraryCreate], refs: ReferenceMaps
+) -> Dict[int, bytes]:
+    """
+    Insert validated itineraries, render their documents and commit.
+    
+    Returns:
+        The rendered documents keyed by new itinerary id, in input order
+    """
+    new_ids = insert_itineraries(db, itineraries, refs)
+    documents = rebuild_documents(db, new_ids)
+    db.commit()
+
+    # Core inserts bypass the session hooks, so invalidate cached lists explicitly
+    response_cache.invalidate_itineraries({
+        itinerary_id: {(itinerary.nights, False)}
+        for itinerary_id, itinerary in zip(new_ids, itineraries)
+    })
+    return {itinerary_id: documents[itinerary_id] for itinerary_id in new_ids}
+
+
+def bulk_create_itineraries(
+    db: Session, itineraries: List[ItineraryCreate], atomic: bool = True
+) -> ItineraryBulkResponse:
+    """
+    Validate and insert a batch of itineraries in one transaction.
+    
+    Every referenced id across the batch is checked with one query per table.
+    In atomic mode any invalid item rejects the whole batch; otherwise valid
+    items are inserted and invalid ones reported.
+    """
+    refs = fetch_reference_maps(db, (plan for item in itineraries for plan in item.daily_plans))
+    errors = {index: validate_itinerary(item, refs) for index, item in enumerate(itineraries)}
+    errors = {index: error for index, error in errors.items() if error}
+
+    if atomic and errors:
+        results = [
+            ItineraryBulkItemResult(
+                index=index,
+                success=False,
+                error=errors.get(index, "Not created because another item in the batch failed"),
+            )
+            for index in range(len(itineraries))
+        ]
+        return ItineraryBulkResponse(created=0, failed=len(itineraries), results=results)
+
+    valid = [index for index in range(len(itineraries)) if index not in errors]
+    new_ids = commit_itineraries(db, [itineraries[index] for index in valid], refs)
+
+    created = dict(zip(valid, new_ids))
+    results = [
+        ItineraryBulkItemResult(index=index, success=True, id=created[index])
+        if index in created
+        else ItineraryBulkItemResult(index=index, success=False, error=errors[index])
+        for index in range(len(itineraries))
+    ]
+    return ItineraryBulkResponse(created=len(created), failed=len(errors), results=results)
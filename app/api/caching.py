@@ -0,0 +1,67 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi import Response
+
+from config import CATALOG_VERSION
+
+
+def http_date(value: datetime) -> str:
+    """Format a naive UTC datetime as an HTTP date"""
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def itinerary_etag(itinerary_id: int, version: int) -> str:
+    """Strong ETag for a single itinerary at a given version"""
+    return f'"itinerary-{itinerary_id}-v{version}"'
+
+
+def catalog_etag(*parts: str) -> str:
+    """Strong ETag for reference data, tied to the configured catalog version"""
+    return '"' + "-".join(("catalog", CATALOG_VERSION) + parts) + '"'
+
+
+def list_etag(view: str, stamps: Iterable[Tuple[int, int]], has_more: bool) -> str:
+    """Strong ETag for a page of itineraries, from the (id, version) pairs it contains"""
+    digest = hashlib.sha1(view.encode())
+    for itinerary_id, version in stamps:
+        digest.update(f"{itinerary_id}:{version};".encode())
+    digest.update(b"more" if has_more else b"end")
+    return f'"itineraries-{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    """ETag and Last-Modified headers for a response"""
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime] = None):
+    """Attach ETag and Last-Modified headers to a response"""
+    response.headers.update(validator_headers(etag, last_modified))
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None, **headers) -> Response:
+    """Build an empty 304 response carrying the current validators"""
+    response = Response(status_code=304, headers=headers)
+    set_validators(response, etag, last_modified)
+    return response
+
+
+def serve_cached(entry, if_none_match: Optional[str] = None) -> Response:
+    """Serve a cached, pre-serialised response, or a 304 if the client copy is current"""
+    if etag_matches(if_none_match, entry.headers.get("ETag", "")):
+        return Response(status_code=304, headers=entry.headers)
+    return Response(content=entry.body, media_type="application/json", headers=entry.headers)
@@ -0,0 +1,272 @@
+from typing import Dict, Iterable, Set
+
+from pydantic import TypeAdapter
+from sqlalchemy import event, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.api.pricing import reprice_itineraries
+from app.api.response_cache import invalidate_on_commit
+from app.api.schemas import ItineraryResponse
+from app.api.search import refresh_search_entries
+from app.database.loaders import itinerary_graph_options
+from app.models.models import (
+    Activity,
+    DailyPlan,
+    Hotel,
+    Itinerary,
+    ItineraryDocument,
+    ItinerarySearch,
+    Transfer,
+    daily_plan_activity,
+    utcnow,
+)
+
+_ITINERARY = TypeAdapter(ItineraryResponse)
+
+_PENDING_ITINERARIES = "documents_pending_itineraries"
+_PENDING_CATALOG = "documents_pending_catalog"
+
+
+def render_itinerary(itinerary: Itinerary) -> bytes:
+    """Render an itinerary (with its graph loaded) as ItineraryResponse JSON"""
+    return _ITINERARY.dump_json(_ITINERARY.validate_python(itinerary, from_attributes=True))
+
+
+def rebuild_documents(db: Session, itinerary_ids: Iterable[int]) -> Dict[int, bytes]:
+    """
+    Render and store documents for the given itineraries.
+    
+    The graphs are loaded in a fixed number of queries and the documents, and
+    the itinerary_search rows derived from the same graphs, are upserted in
+    the caller's transaction, which is left uncommitted.
+    
+    Returns:
+        The rendered document bodies keyed by itinerary id
+    """
+    ids = set(itinerary_ids)
+    if not ids:
+        return {}
+    itineraries = (
+        db.query(Itinerary)
+        .options(*itinerary_graph_options())
+        .filter(Itinerary.id.in_(ids))
+        .all()
+    )
+    existing = {
+        document.itinerary_id: document
+        for document in db.query(ItineraryDocument).filter(ItineraryDocument.itinerary_id.in_(ids))
+    }
+    bodies = {}
+    for itinerary in itineraries:
+        document = existing.get(itinerary.id)
+        if document is None:
+            document = ItineraryDocument(itinerary_id=itinerary.id)
+            db.add(document)
+        document.version = itinerary.version
+        document.body = bodies[itinerary.id] = render_itinerary(itinerary)
+        document.built_at = utcnow()
+    refresh_search_entries(db, itineraries)
+    return bodies
+
+
+def rebuild_all_documents(db: Session, batch_size: int = 500) -> int:
+    """Rebuild every itinerary document in batches, committing after each batch"""
+    total = 0
+    last_id = 0
+    while True:
+        ids = [
+            row.id
+            for row in db.query(Itinerary.id)
+            .filter(Itinerary.id > last_id)
+            .order_by(Itinerary.id)
+            .limit(batch_size)
+        ]
+        if not ids:
+            return total
+        total += len(rebuild_documents(db, ids))
+        db.commit()
+        db.expunge_all()
+        last_id = ids[-1]
+
+
+def rebuild_stale_documents(db: Session, batch_size: int = 500) -> int:
+    """
+    Rebuild the documents that are missing, older than their itinerary or
+    lack an itinerary_search row, in batches, committing after each batch.
+    
+    Cheap when every document is current: one indexed pass over the ids.
+    """
+    total = 0
+    last_id = 0
+    while True:
+        ids = [
+            row.id
+            for row in db.query(Itinerary.id)
+            .outerjoin(ItineraryDocument, ItineraryDocument.itinerary_id == Itinerary.id)
+            .outerjoin(ItinerarySearch, ItinerarySearch.itinerary_id == Itinerary.id)
+            .filter(Itinerary.id > last_id)
+            .filter(or_(
+                ItineraryDocument.version.is_(None),
+                ItineraryDocument.version != Itinerary.version,
+                ItinerarySearch.itinerary_id.is_(None),
+            ))
+            .order_by(Itinerary.id)
+            .limit(batch_size)
+        ]
+        if not ids:
+            return total
+        total += len(rebuild_documents(db, ids))
+        db.commit()
+        db.expunge_all()
+        last_id = ids[-1]
+
+
+def load_documents(db: Session, stamps) -> Dict[int, bytes]:
+    """
+    Fetch stored documents that are current for the given (id, version) stamps.
+    
+    Itineraries whose document is missing or was rendered from an older version
+    are left out, so callers can fall back to rendering them from the graph.
+    """
+    versions = {stamp.id: stamp.version for stamp in stamps}
+    if not versions:
+        return {}
+    rows = db.query(
+        ItineraryDocument.itinerary_id, ItineraryDocument.version, ItineraryDocument.body
+    ).filter(ItineraryDocument.itinerary_id.in_(versions))
+    return {
+        row.itinerary_id: row.body
+        for row in rows
+        if row.version == versions[row.itinerary_id]
+    }
+
+
+def render_missing(db: Session, itinerary_ids: Iterable[int]) -> Dict[int, bytes]:
+    """Render documents straight from the graph without storing them"""
+    ids = set(itinerary_ids)
+    if not ids:
+        return {}
+    itineraries = (
+        db.query(Itinerary)
+        .options(*itinerary_graph_options())
+        .filter(Itinerary.id.in_(ids))
+        .all()
+    )
+    return {itinerary.id: render_itinerary(itinerary) for itinerary in itineraries}
+
+
+def _itineraries_using(db: Session, catalog: Dict[type, Set[int]]) -> Set[int]:
+    """Itinerary ids whose daily plans reference the changed hotels, transfers or activities"""
+    ids: Set[int] = set()
+    if catalog.get(Hotel):
+        ids.update(db.scalars(
+            select(DailyPlan.itinerary_id).where(DailyPlan.hotel_id.in_(catalog[Hotel]))
+        ))
+    if catalog.get(Transfer):
+        ids.update(db.scalars(
+            select(DailyPlan.itinerary_id).where(DailyPlan.transfer_id.in_(catalog[Transfer]))
+        ))
+    if catalog.get(Activity):
+        ids.update(db.scalars(
+            select(DailyPlan.itinerary_id)
+            .join(daily_plan_activity, daily_plan_activity.c.daily_plan_id == DailyPlan.id)
+            .where(daily_plan_activity.c.activity_id.in_(catalog[Activity]))
+        ))
+    return ids
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    itineraries = session.info.setdefault(_PENDING_ITINERARIES, set())
+    catalog = session.info.setdefault(_PENDING_CATALOG, {})
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Itinerary):
+            itineraries.add(obj.id)
+        elif isinstance(obj, DailyPlan):
+            itineraries.add(obj.itinerary_id)
+        elif isinstance(obj, (Hotel, Transfer, Activity)) and obj in session.dirty:
+            if session.is_modified(obj, include_collections=False):
+                catalog.setdefault(type(obj), set()).add(obj.id)
+    for obj in session.deleted:
+        # Documents of deleted itineraries go with them through the cascade
+        if isinstance(obj, DailyPlan):
+            itineraries.add(obj.itinerary_id)
+
+
+@event.listens_for(Session, "before_commit")
+def _rebuild_pending_documents(session):
+    """Rebuild the documents touched by this transaction before it commits"""
+    # Flush first so the last batch of changes is collected as well
+    session.flush()
+    catalog = session.info.pop(_PENDING_CATALOG, {})
+    if catalog:
+        affected = _itineraries_using(session, catalog)
+        if affected:
+            # Rendered content changes, so the version (and ETag) must too: one
+            # set-based UPDATE however many itineraries use the changed rows.
+            # Their totals and documents are redone below with the others.
+            session.execute(
+                update(Itinerary)
+                .where(Itinerary.id.in_(affected))
+                .values(version=Itinerary.version + 1, updated_at=utcnow())
+                .execution_options(synchronize_session="fetch")
+            )
+            invalidate_on_commit(session, affected)
+            pending = session.info.setdefault(_PENDING_ITINERARIES, set())
+            pending.update(affected)
+    itinerary_ids = session.info.pop(_PENDING_ITINERARIES, set())
+    itinerary_ids.discard(None)
+    if itinerary_ids:
+        # New, re-planned and catalog-affected itineraries get their totals from
+        # the same aggregate; they are already versioned by now
+        reprice_itineraries(session, itinerary_ids, touch=False)
+        rebuild_documents(session, itinerary_ids)
+        session.flush()
+    session.info.pop(_PENDING_ITINERARIES, None)
+    session.info.pop(_PENDING_CATALOG, None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(_PENDING_ITINERARIES, None)
+    session.info.pop(_PENDING_CATALOG, None)
+
+
+def stream_documents(db: Session, query, batch_size: int):
+    """
+    Yield newline-terminated document bodies for an id/version query.
+    
+    The query must select Itinerary.id and Itinerary.version; it is joined to the
+    stored documents and read with yield_per, so only one batch of rows is held
+    in memory at a time. Missing or stale documents are rendered per batch with
+    the usual eager-loading options.
+    """
+    query = (
+        query.add_columns(
+            ItineraryDocument.version.label("document_version"),
+            ItineraryDocument.body,
+        )
+        .outerjoin(ItineraryDocument, ItineraryDocument.itinerary_id == Itinerary.id)
+        .execution_options(stream_results=True)
+        .yield_per(batch_size)
+    )
+
+    def flush(batch):
+        rendered = render_missing(
+            db, [row.id for row in batch if row.document_version != row.version]
+        )
+        for row in batch:
+            body = row.body if row.document_version == row.version else rendered.get(row.id)
+            if body is not None:
+                yield body + b"\n"
+        # Rendered graphs are not needed again
+        db.expunge_all()
+
+    batch = []
+    for row in query:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield from flush(batch)
+            batch = []
+    if batch:
+        yield from flush(batch)
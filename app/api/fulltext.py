@@ -0,0 +1,94 @@
+import re
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.models import CATALOG_FTS_CODES
+
+CATALOG_ENTITY_TYPES = tuple(CATALOG_FTS_CODES)
+
+# Markers placed around matched terms in snippets
+SNIPPET_OPEN, SNIPPET_CLOSE = "**", "**"
+SNIPPET_TOKENS = 12
+
+_WORD = re.compile(r"\w+")
+
+_RESULTS = text(f"""
+    SELECT entity_type, rowid / 3 AS entity_id, name, place,
+           snippet(catalog_fts, -1, :open, :close, '…', {SNIPPET_TOKENS}) AS snippet,
+           rank
+    FROM catalog_fts
+    WHERE catalog_fts MATCH :match AND (:entity_type IS NULL OR entity_type = :entity_type)
+    ORDER BY rank
+    LIMIT :limit
+""")
+
+_FACETS = text("""
+    SELECT entity_type, count(*) FROM catalog_fts
+    WHERE catalog_fts MATCH :match
+    GROUP BY entity_type
+""")
+
+
+def match_expression(query: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 MATCH expression.
+
+    Every word is quoted, so FTS5 operators and punctuation in the input are
+    treated as plain text. Words are OR-ed (BM25 ranks rows matching more of
+    them first) and the last word matches as a prefix for type-ahead.
+
+    Returns:
+        The expression, or None when the query has no words
+    """
+    words = _WORD.findall(query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " OR ".join(terms)
+
+
+def full_text_search(
+    db: Session, query: str, entity_type: Optional[str] = None, limit: int = 10
+) -> Optional[dict]:
+    """
+    Rank locations, hotels and activities against free text with BM25.
+
+    Names weigh most, then descriptions, then amenities/activity types, then
+    the location name and region. Facet counts cover every entity type
+    whatever `entity_type` filter is applied to the results.
+
+    Returns:
+        {"query", "total", "facets", "results"}, or None when the query has no words
+    """
+    match = match_expression(query)
+    if match is None:
+        return None
+    facets = dict.fromkeys(CATALOG_ENTITY_TYPES, 0)
+    facets.update(db.execute(_FACETS, {"match": match}).all())
+    rows = db.execute(_RESULTS, {
+        "match": match,
+        "entity_type": entity_type,
+        "open": SNIPPET_OPEN,
+        "close": SNIPPET_CLOSE,
+        "limit": limit,
+    })
+    return {
+        "query": query,
+        "total": facets[entity_type] if entity_type else sum(facets.values()),
+        "facets": facets,
+        "results": [
+            {
+                "type": row.entity_type,
+                "id": row.entity_id,
+                "name": row.name,
+                "location": row.place,
+                "snippet": row.snippet,
+                # bm25() is negative with the best match lowest; report higher-is-better
+                "score": round(-row.rank, 4),
+            }
+            for row in rows
+        ],
+    }
@@ -0,0 +1,357 @@
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.schemas import DailyPlanCreate, ItineraryCreate
+from app.api.snapshots import CatalogSnapshot
+from app.models.models import Activity, Hotel, Location, Transfer
+
+# Score of a plan: every activity, more for those matching an interest, plus
+# hotel stars per night, minus hours spent in transfers
+ACTIVITY_SCORE = 1.0
+INTEREST_SCORE = 2.0
+STAR_SCORE = 0.5
+TRANSFER_HOUR_PENALTY = 0.5
+
+BEAM_WIDTH = 64
+MAX_ACTIVITIES_PER_DAY = 3
+# Activities of a location a day's combinations are drawn from: the best
+# scoring ones still available, so a day weighs at most
+# C(k, 0) + ... + C(k, MAX_ACTIVITIES_PER_DAY) combinations however many the location has
+DAY_CANDIDATES = 10
+
+
+class LocationActivities(NamedTuple):
+    """The activities at one location, as parallel arrays"""
+    ids: np.ndarray
+    durations: np.ndarray
+    prices: np.ndarray
+    types: np.ndarray  # index into GeneratorCatalog.activity_types
+
+
+def _combinations(candidates: int, max_size: int) -> List[np.ndarray]:
+    """Index arrays of every combination of 1..max_size out of `candidates`, one per size"""
+    return [
+        np.array(list(itertools.combinations(range(candidates), size)), dtype=np.int64).reshape(-1, size)
+        for size in range(1, min(max_size, candidates) + 1)
+    ]
+
+
+class GeneratorCatalog:
+    """
+    Arrays over the hotels, activities and transfers the generator searches.
+
+    Built once per catalog snapshot in time linear in the catalog; a request
+    only computes its interest weights and applies them to these arrays.
+    Activity combinations are never stored: each day draws them from the
+    location's DAY_CANDIDATES best activities still available.
+    """
+
+    def __init__(self, locations, hotels, activities, transfers, max_activities_per_day=MAX_ACTIVITIES_PER_DAY):
+        self.regions = {location_id: region for location_id, region in locations}
+        self.hotel_names = {h.id: h.name for h in hotels}
+        self.activity_names = {a.id: a.name for a in activities}
+        self.activity_types = sorted({a.activity_type or "" for a in activities})
+        self.max_activities_per_day = max_activities_per_day
+        type_index = {name: i for i, name in enumerate(self.activity_types)}
+
+        self.hotel_ids = np.array([h.id for h in hotels], dtype=np.int64)
+        self.hotel_locations = np.array([h.location_id for h in hotels], dtype=np.int64)
+        self.hotel_prices = np.array([h.price_per_night or 0.0 for h in hotels])
+        self.hotel_stars = np.array([h.star_rating or 0.0 for h in hotels])
+        self.hotel_regions = np.array([self.regions.get(h.location_id, "") for h in hotels], dtype=object)
+
+        # Quickest direct transfer for each (origin, destination), cheapest on ties
+        self.transfers: Dict[Tuple[int, int], Tuple[int, float, float]] = {}
+        for t in sorted(transfers, key=lambda t: (t.duration or 0.0, t.price or 0.0, t.id)):
+            self.transfers.setdefault((t.origin_id, t.destination_id), (t.id, t.duration or 0.0, t.price or 0.0))
+
+        by_location: Dict[int, list] = {}
+        for activity in activities:
+            by_location.setdefault(activity.location_id, []).append(activity)
+        self.activities: Dict[int, LocationActivities] = {}
+        for location_id in self.regions:
+            local = by_location.get(location_id, [])
+            self.activities[location_id] = LocationActivities(
+                ids=np.array([a.id for a in local], dtype=np.int64),
+                durations=np.array([a.duration or 0.0 for a in local]),
+                prices=np.array([a.price or 0.0 for a in local]),
+                types=np.array([type_index[a.activity_type or ""] for a in local], dtype=np.int64),
+            )
+        self.combinations = _combinations(DAY_CANDIDATES, max_activities_per_day)
+
+    @classmethod
+    def load(cls, db: Session) -> "GeneratorCatalog":
+        """Build the catalog in four queries"""
+        return cls(
+            db.execute(select(Location.id, Location.region)).all(),
+            db.execute(select(
+                Hotel.id, Hotel.name, Hotel.location_id, Hotel.price_per_night, Hotel.star_rating
+            )).all(),
+            db.execute(select(
+                Activity.id, Activity.name, Activity.location_id, Activity.activity_type,
+                Activity.duration, Activity.price,
+            )).all(),
+            db.execute(select(
+                Transfer.id, Transfer.origin_id, Transfer.destination_id, Transfer.duration, Transfer.price
+            )).all(),
+        )
+
+    def interest_weights(self, interests: Sequence[str]) -> np.ndarray:
+        """1 for each activity type containing one of the interest tags (case-insensitive)"""
+        tags = [tag.strip().lower() for tag in interests if tag.strip()]
+        return np.array([
+            float(any(tag in activity_type.lower() for tag in tags)) for activity_type in self.activity_types
+        ])
+
+
+# The generator catalog of the application database
+generator_catalog = CatalogSnapshot(GeneratorCatalog.load, watched=(Location, Hotel, Activity, Transfer))
+
+
+@dataclass
+class GeneratedDay:
+    day_number: int
+    hotel_id: int
+    transfer_id: Optional[int]
+    activity_ids: Tuple[int, ...]
+    hours: float
+
+
+@dataclass
+class GeneratedPlan:
+    days: List[GeneratedDay]
+    total_price: float
+    score: float
+    # False when the time budget ran out and the search finished greedily
+    complete: bool
+    elapsed_ms: float = 0.0
+
+
+@dataclass
+class _State:
+    score: float
+    price: float
+    location_id: Optional[int]
+    used: FrozenSet[int]
+    days: List[GeneratedDay] = field(default_factory=list)
+
+
+def generate_itinerary(
+    catalog: GeneratorCatalog,
+    nights: int,
+    budget: Optional[float] = None,
+    regions: Sequence[str] = (),
+    interests: Sequence[str] = (),
+    max_hours_per_day: float = 10.0,
+    time_budget_ms: float = 200.0,
+    beam_width: int = BEAM_WIDTH,
+) -> Optional[GeneratedPlan]:
+    """
+    Beam search for the best-scoring feasible plan, one day at a time.
+
+    A day is a hotel night, the direct transfer from the previous day's
+    location when it changes, and a combination of activities at the hotel's
+    location. Plans are feasible when every location change has a direct
+    transfer, each day's transfer and activity hours fit in max_hours_per_day,
+    no activity repeats and the total stays within budget. A day's activity
+    combinations come from the location's DAY_CANDIDATES best-scoring
+    activities that are unused and short enough, and are scored and filtered
+    as NumPy arrays. Once time_budget_ms is spent, even part way through a
+    day, the beam narrows to one so the best plan so far is completed
+    greedily.
+
+    Returns:
+        The best plan, or None when no feasible plan exists
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget_ms / 1000
+    weights = catalog.interest_weights(interests)
+    activity_scores = {
+        location_id: ACTIVITY_SCORE + weights[local.types] * INTEREST_SCORE
+        for location_id, local in catalog.activities.items()
+    }
+
+    allowed = np.ones(len(catalog.hotel_ids), dtype=bool)
+    if regions:
+        allowed &= np.isin(catalog.hotel_regions, list(regions))
+    hotels = np.flatnonzero(allowed)
+    if not len(hotels):
+        return None
+    cheapest_night = catalog.hotel_prices[hotels].min()
+    budget = np.inf if budget is None else budget
+
+    beam = [_State(0.0, 0.0, None, frozenset())]
+    complete = True
+    for day_number in range(1, nights + 1):
+        if time.perf_counter() > deadline and beam_width > 1:
+            complete, beam_width = False, 1
+            beam = beam[:1]
+        # The remaining nights cost at least the cheapest hotel each
+        spendable = budget - cheapest_night * (nights - day_number)
+        candidates = []
+        for position, state in enumerate(beam):
+            # The beam is best first: past the deadline keep what the best states gave
+            if candidates and beam_width > 1 and time.perf_counter() > deadline:
+                complete, beam_width = False, 1
+                break
+            best_day = {}  # location_id -> (option, transfer) or None
+            for h in hotels:
+                location_id = int(catalog.hotel_locations[h])
+                if location_id not in best_day:
+                    best_day[location_id] = _best_day(catalog, activity_scores, state, location_id, max_hours_per_day)
+                choice = best_day[location_id]
+                if choice is None:
+                    continue
+                activity_ids, transfer, value, cost, hours = choice
+                price = state.price + catalog.hotel_prices[h] + cost
+                if price > spendable:
+                    continue
+                score = state.score + value + catalog.hotel_stars[h] * STAR_SCORE
+                candidates.append((score, -price, state, h, activity_ids, transfer, hours))
+        if not candidates:
+            return None
+        candidates.sort(key=lambda c: (c[0], c[1]), reverse=True)
+        beam = []
+        for score, neg_price, state, h, activity_ids, transfer, hours in candidates[:beam_width]:
+            location_id = int(catalog.hotel_locations[h])
+            day = GeneratedDay(
+                day_number=day_number,
+                hotel_id=int(catalog.hotel_ids[h]),
+                transfer_id=transfer,
+                activity_ids=activity_ids,
+                hours=round(float(hours), 2),
+            )
+            beam.append(_State(score, -neg_price, location_id, state.used | frozenset(activity_ids), state.days + [day]))
+
+    best = beam[0]
+    return GeneratedPlan(
+        days=best.days,
+        total_price=round(float(best.price), 2),
+        score=round(float(best.score), 3),
+        complete=complete,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+
+
+def _best_day(catalog: GeneratorCatalog, activity_scores, state: _State, location_id: int, max_hours: float):
+    """
+    Best activity combination at a location after the transfer into it.
+
+    Returns:
+        (activity_ids, transfer_id, score, price, hours), or None when the
+        location cannot be reached from the previous day's location
+    """
+    transfer_id, transfer_hours, transfer_price = None, 0.0, 0.0
+    if state.location_id is not None and state.location_id != location_id:
+        transfer = catalog.transfers.get((state.location_id, location_id))
+        if transfer is None:
+            return None
+        transfer_id, transfer_hours, transfer_price = transfer
+    hours_left = max_hours - transfer_hours
+    if hours_left < 0:
+        return None
+    local = catalog.activities[location_id]
+    scores = activity_scores[location_id]
+    available = local.durations <= hours_left
+    if state.used:
+        available &= ~np.isin(local.ids, list(state.used))
+    candidates = np.flatnonzero(available)
+    if len(candidates) > DAY_CANDIDATES:
+        # Best score, then the cheapest among equals
+        candidates = candidates[np.lexsort((local.prices[candidates], -scores[candidates]))[:DAY_CANDIDATES]]
+
+    best = ((), 0.0, 0.0, 0.0)  # activities, score, price, hours
+    for combinations in catalog.combinations:
+        # Combinations are in lexicographic order, so the last index is the largest
+        rows = candidates[combinations[combinations[:, -1] < len(candidates)]]
+        if not len(rows):
+            break
+        hours = local.durations[rows].sum(axis=1)
+        fits = hours <= hours_left
+        if not fits.any():
+            continue
+        option_scores = np.where(fits, scores[rows].sum(axis=1), -np.inf)
+        prices = local.prices[rows].sum(axis=1)
+        # Best score, then the cheapest among equals
+        top = np.flatnonzero(option_scores == option_scores.max())
+        option = int(top[np.argmin(prices[top])])
+        if (option_scores[option], -prices[option]) > (best[1], -best[2]):
+            best = (tuple(int(i) for i in local.ids[rows[option]]), option_scores[option], prices[option], hours[option])
+    activity_ids, score, price, hours = best
+    return (
+        activity_ids,
+        transfer_id,
+        float(score) - transfer_hours * TRANSFER_HOUR_PENALTY,
+        float(price) + transfer_price,
+        float(hours) + transfer_hours,
+    )
+
+
+def plan_itinerary(plan: GeneratedPlan, nights: int, name: str, description: str) -> ItineraryCreate:
+    """The generated plan as a create request, ready for commit_itineraries"""
+    return ItineraryCreate(
+        name=name,
+        description=description,
+        nights=nights,
+        daily_plans=[
+            DailyPlanCreate(
+                day_number=day.day_number,
+                hotel_id=day.hotel_id,
+                transfer_id=day.transfer_id,
+                activity_ids=list(day.activity_ids),
+                notes=f"{day.hours:g} hours of transfers and activities",
+            )
+            for day in plan.days
+        ],
+    )
+
+
+def plan_summary(catalog: GeneratorCatalog, plan: GeneratedPlan) -> dict:
+    """JSON-ready form of a generated plan with hotel and activity names, for the MCP tools"""
+    return {
+        "total_price": plan.total_price,
+        "score": plan.score,
+        "complete": plan.complete,
+        "days": [
+            {
+                "day": day.day_number,
+                "hotel": catalog.hotel_names.get(day.hotel_id),
+                "hotel_id": day.hotel_id,
+                "transfer_id": day.transfer_id,
+                "activities": [catalog.activity_names.get(a) for a in day.activity_ids],
+                "activity_ids": list(day.activity_ids),
+                "hours": day.hours,
+            }
+            for day in plan.days
+        ],
+    }
+
+
+def generated_summary(
+    catalog: GeneratorCatalog,
+    nights: int,
+    budget: Optional[float] = None,
+    regions: Sequence[str] = (),
+    interests: Sequence[str] = (),
+    max_hours_per_day: float = 10.0,
+) -> dict:
+    """Generate a plan for the MCP tools, or {"error": ...}"""
+    if not 1 <= nights <= 30:
+        return {"error": f"Nights must be between 1 and 30, got {nights}"}
+    if budget is not None and budget <= 0:
+        return {"error": "budget must be positive"}
+    if not 0 < max_hours_per_day <= 24:
+        return {"error": "max_hours_per_day must be between 0 and 24"}
+    plan = generate_itinerary(
+        catalog, nights, budget=budget, regions=regions, interests=interests,
+        max_hours_per_day=max_hours_per_day,
+    )
+    if plan is None:
+        return {"error": "No itinerary satisfies these constraints"}
+    return {"nights": nights, **plan_summary(catalog, plan)}
@@ -0,0 +1,119 @@
+import math
+from typing import List, Tuple
+
+from sqlalchemy import column, select, table
+from sqlalchemy.orm import Session
+
+from app.models.models import Activity, Hotel, Location
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+location_rtree = table(
+    "location_rtree", column("id"), column("min_lat"), column("max_lat"), column("min_lon"), column("max_lon")
+)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    (min_lat, max_lat, min_lon, max_lon) of a box containing the circle.
+
+    Longitude degrees shrink with cos(latitude); near the poles the box spans
+    every longitude. Boxes are not split at the antimeridian.
+    """
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    min_lat, max_lat = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    # The widest parallel inside the box sets the longitude span
+    widest = max(abs(min_lat), abs(max_lat))
+    if widest >= 90.0:
+        return min_lat, max_lat, -180.0, 180.0
+    dlon = min(180.0, radius_km / (KM_PER_DEGREE_LAT * math.cos(math.radians(widest))))
+    return min_lat, max_lat, max(-180.0, lon - dlon), min(180.0, lon + dlon)
+
+
+def nearby_locations(
+    db: Session, lat: float, lon: float, radius_km: float
+) -> List[Tuple[Location, float]]:
+    """
+    Locations within radius_km of a point, nearest first.
+
+    The R*Tree narrows the candidates to the bounding box in one indexed
+    query; a haversine check then drops the box corners.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+    candidates = db.scalars(
+        select(Location)
+        .join(location_rtree, location_rtree.c.id == Location.id)
+        .where(
+            location_rtree.c.max_lat >= min_lat,
+            location_rtree.c.min_lat <= max_lat,
+            location_rtree.c.max_lon >= min_lon,
+            location_rtree.c.min_lon <= max_lon,
+        )
+    )
+    found = []
+    for location in candidates:
+        distance = haversine_km(lat, lon, location.latitude, location.longitude)
+        if distance <= radius_km:
+            found.append((location, distance))
+    found.sort(key=lambda pair: (pair[1], pair[0].id))
+    return found
+
+
+def nearby_catalog(db: Session, lat: float, lon: float, radius_km: float, k: int) -> dict:
+    """
+    The k nearest locations, hotels and activities within radius_km.
+
+    Hotels and activities are placed at their location's coordinates.
+
+    Returns:
+        {"locations", "hotels", "activities"}, each a list of
+        (entity, distance_km) pairs nearest first
+    """
+    locations = nearby_locations(db, lat, lon, radius_km)
+    distances = {location.id: distance for location, distance in locations}
+
+    def nearest(model):
+        if not distances:
+            return []
+        rows = db.scalars(select(model).where(model.location_id.in_(distances))).all()
+        pairs = [(row, distances[row.location_id]) for row in rows]
+        return sorted(pairs, key=lambda pair: (pair[1], pair[0].id))[:k]
+
+    return {
+        "locations": locations[:k],
+        "hotels": nearest(Hotel),
+        "activities": nearest(Activity),
+    }
+
+
+def nearby_summary(found: dict) -> dict:
+    """Compact, JSON-ready form of nearby_catalog() for the MCP tools"""
+    return {
+        "locations": [
+            {"id": location.id, "name": location.name, "region": location.region,
+             "distance_km": round(distance, 2)}
+            for location, distance in found["locations"]
+        ],
+        "hotels": [
+            {"id": hotel.id, "name": hotel.name, "star_rating": hotel.star_rating,
+             "price_per_night": hotel.price_per_night, "location_id": hotel.location_id,
+             "distance_km": round(distance, 2)}
+            for hotel, distance in found["hotels"]
+        ],
+        "activities": [
+            {"id": activity.id, "name": activity.name, "type": activity.activity_type,
+             "price": activity.price, "location_id": activity.location_id,
+             "distance_km": round(distance, 2)}
+            for activity, distance in found["activities"]
+        ],
+    }
@@ -0,0 +1,60 @@
+import base64
+import binascii
+import json
+from typing import Any, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+from app.models.models import Itinerary
+
+# Stable sort key for itinerary listings; mirrored by the ix_itineraries_keyset index
+ITINERARY_SORT_KEY = (Itinerary.nights, Itinerary.total_price, Itinerary.id)
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def parse_cursor(cursor: str, size: int) -> Optional[List[Any]]:
+    """Decode a cursor produced by encode_cursor, or None if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError):
+        return None
+    if (
+        not isinstance(values, list)
+        or len(values) != size
+        or not all(isinstance(v, (int, float, str)) for v in values)
+    ):
+        return None
+    return values
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Decode a cursor produced by encode_cursor, raising a 400 if it is malformed"""
+    values = parse_cursor(cursor, size)
+    if values is None:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return values
+
+
+def seek_itineraries(query, values: Optional[List[Any]]):
+    """Order an itinerary query by the keyset sort key and seek past decoded cursor values"""
+    if values:
+        query = query.filter(tuple_(*ITINERARY_SORT_KEY) > tuple_(*values))
+    return query.order_by(*ITINERARY_SORT_KEY)
+
+
+def apply_itinerary_cursor(query, cursor: Optional[str]):
+    """Order an itinerary query by the keyset sort key and seek past the cursor"""
+    values = decode_cursor(cursor, len(ITINERARY_SORT_KEY)) if cursor else None
+    return seek_itineraries(query, values)
+
+
+def itinerary_cursor(itinerary: Itinerary) -> str:
+    """Build the cursor that resumes a listing after the given itinerary"""
+    return encode_cursor([itinerary.nights, itinerary.total_price, itinerary.id])
@@ -0,0 +1,138 @@
+from typing import Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.models import (
+    Activity,
+    DailyPlan,
+    Hotel,
+    Itinerary,
+    Transfer,
+    daily_plan_activity,
+    utcnow,
+)
+
+# Stored totals within half a cent of the computed total are not drift
+PRICE_TOLERANCE = 0.005
+
+
+class PriceDrift(NamedTuple):
+    itinerary_id: int
+    stored: Optional[float]
+    computed: float
+
+
+def itinerary_totals(itinerary_ids: Optional[Iterable[int]] = None):
+    """
+    Subquery of (itinerary_id, total) computed from the current catalog prices.
+
+    A daily plan costs its hotel night, its transfer if any and each linked
+    activity; the itinerary total is the sum over its plans, rounded to cents.
+    """
+    if itinerary_ids is not None:
+        itinerary_ids = list(itinerary_ids)
+    activity_totals = (
+        select(
+            daily_plan_activity.c.daily_plan_id,
+            func.sum(Activity.price).label("activities"),
+        )
+        .join(Activity, Activity.id == daily_plan_activity.c.activity_id)
+        .group_by(daily_plan_activity.c.daily_plan_id)
+    )
+    if itinerary_ids is not None:
+        activity_totals = activity_totals.where(daily_plan_activity.c.daily_plan_id.in_(
+            select(DailyPlan.id).where(DailyPlan.itinerary_id.in_(itinerary_ids))
+        ))
+    activity_totals = activity_totals.subquery()
+    plan_total = (
+        Hotel.price_per_night
+        + func.coalesce(Transfer.price, 0)
+        + func.coalesce(activity_totals.c.activities, 0)
+    )
+    query = (
+        select(
+            DailyPlan.itinerary_id,
+            func.round(func.sum(plan_total), 2).label("total"),
+        )
+        .join(Hotel, Hotel.id == DailyPlan.hotel_id)
+        .outerjoin(Transfer, Transfer.id == DailyPlan.transfer_id)
+        .outerjoin(activity_totals, activity_totals.c.daily_plan_id == DailyPlan.id)
+        .group_by(DailyPlan.itinerary_id)
+    )
+    if itinerary_ids is not None:
+        query = query.where(DailyPlan.itinerary_id.in_(itinerary_ids))
+    return query.subquery("totals")
+
+
+def computed_totals(itinerary_ids: Optional[Iterable[int]] = None):
+    """
+    Subquery of (itinerary_id, total) for every itinerary, including those
+    without daily plans, whose computed total is 0.
+    """
+    if itinerary_ids is not None:
+        itinerary_ids = list(itinerary_ids)
+    totals = itinerary_totals(itinerary_ids)
+    query = (
+        select(Itinerary.id.label("itinerary_id"), func.coalesce(totals.c.total, 0).label("total"))
+        .outerjoin(totals, totals.c.itinerary_id == Itinerary.id)
+    )
+    if itinerary_ids is not None:
+        query = query.where(Itinerary.id.in_(itinerary_ids))
+    return query.subquery("computed")
+
+
+def _drifted(totals):
+    return (
+        Itinerary.total_price.is_(None)
+        | (func.abs(Itinerary.total_price - totals.c.total) > PRICE_TOLERANCE)
+    )
+
+
+def reprice_itineraries(
+    db: Session, itinerary_ids: Optional[Iterable[int]] = None, touch: bool = True
+) -> List[int]:
+    """
+    Recompute stored totals with one aggregate UPDATE ... FROM.
+
+    Only itineraries whose stored total differs from the computed one are
+    written. With `touch` their version and updated_at are bumped too; pass
+    False when the caller touches them itself. The transaction is left
+    uncommitted and documents are not rebuilt.
+
+    Args:
+        itinerary_ids: Itineraries to reprice, or None for the whole catalog
+
+    Returns:
+        The ids of the repriced itineraries
+    """
+    if itinerary_ids is not None:
+        itinerary_ids = list(itinerary_ids)
+        if not itinerary_ids:
+            return []
+    # Itineraries without daily plans are repriced to 0, as audit_prices expects
+    totals = computed_totals(itinerary_ids)
+    values = {"total_price": totals.c.total}
+    if touch:
+        values.update(version=Itinerary.version + 1, updated_at=utcnow())
+    statement = (
+        update(Itinerary)
+        .where(Itinerary.id == totals.c.itinerary_id, _drifted(totals))
+        .values(**values)
+        .returning(Itinerary.id)
+        # Keeps already-loaded itineraries in step with the new totals
+        .execution_options(synchronize_session="fetch")
+    )
+    return sorted(db.scalars(statement))
+
+
+def audit_prices(db: Session) -> List[PriceDrift]:
+    """Report every itinerary whose stored total differs from the current catalog prices"""
+    totals = computed_totals()
+    rows = db.execute(
+        select(Itinerary.id, Itinerary.total_price, totals.c.total)
+        .join(totals, totals.c.itinerary_id == Itinerary.id)
+        .where(_drifted(totals))
+        .order_by(Itinerary.id)
+    )
+    return [PriceDrift(*row) for row in rows]
@@ -0,0 +1,411 @@
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.models import (
+    Activity,
+    DailyPlan,
+    Hotel,
+    Itinerary,
+    Location,
+    Transfer,
+    daily_plan_activity,
+)
+from config import CATALOG_SNAPSHOT_TTL, CHANGE_SAFETY_WINDOW
+
+# Hours of transfers and activities per day each pace aims for
+PACE_HOURS = {"relaxed": 3.0, "balanced": 5.0, "packed": 8.0}
+_PACE_INDEX = {pace: index for index, pace in enumerate(PACE_HOURS)}
+
+# Score of an itinerary: the share of its activities matching an interest and
+# of its nights in a preferred region, its hotels' average stars (out of 5),
+# minus its daily transfer hours, how far it goes over budget and how far its
+# days are from the pace
+INTEREST_WEIGHT = 3.0
+REGION_WEIGHT = 2.0
+STAR_WEIGHT = 1.0
+OVER_BUDGET_WEIGHT = 4.0  # per budget's worth over
+PACE_WEIGHT = 1.0  # per pace's worth of hours off
+TRANSFER_HOUR_WEIGHT = 0.2  # per hour of transfers a day
+
+# Largest k selected with repeated argmax rather than a partial sort
+ARGMAX_TOP_K = 16
+
+
+@dataclass(frozen=True)
+class Preferences:
+    budget: Optional[float] = None
+    interests: Tuple[str, ...] = ()
+    pace: Optional[str] = None  # One of PACE_HOURS
+    regions: Tuple[str, ...] = ()
+
+
+class _NightsBlock:
+    """
+    Feature columns of the recommended itineraries of one length.
+
+    Arrays are column-major (one contiguous array per feature) with spare
+    capacity, so a query only touches the features its preferences use and
+    rows are updated in place. The terms that do not depend on the
+    preferences, and the penalty for each pace, are computed when a row is
+    stored.
+    """
+
+    def __init__(self, type_count: int, region_count: int):
+        self.size = 0
+        self.position: Dict[int, int] = {}
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.prices = np.zeros(0, dtype=np.float32)
+        self.stars = np.zeros(0, dtype=np.float32)
+        self.transfer_hours = np.zeros(0, dtype=np.float32)  # per day
+        self.busy_hours = np.zeros(0, dtype=np.float32)  # transfers and activities per day
+        self.base_scores = np.zeros(0, dtype=np.float32)  # the terms that do not depend on preferences
+        self.pace_penalties = np.zeros((len(PACE_HOURS), 0), dtype=np.float32)  # (paces, rows)
+        self.type_shares = np.zeros((type_count, 0), dtype=np.float32)  # (activity types, rows)
+        self.region_shares = np.zeros((region_count, 0), dtype=np.float32)  # (regions, rows)
+
+    _ROW_ARRAYS = ("ids", "prices", "stars", "transfer_hours", "busy_hours", "base_scores")
+    _SHARE_ARRAYS = ("type_shares", "region_shares", "pace_penalties")
+
+    def put(self, itinerary_id: int, values: dict, type_shares: Dict[int, float], region_shares: Dict[int, float]):
+        row = self.position.get(itinerary_id)
+        if row is None:
+            if self.size == len(self.ids):
+                self._grow(max(16, 2 * self.size))
+            row = self.position[itinerary_id] = self.size
+            self.size += 1
+        self.ids[row] = itinerary_id
+        for name, value in values.items():
+            getattr(self, name)[row] = value
+        self.base_scores[row] = self.stars[row] * STAR_WEIGHT / 5 - self.transfer_hours[row] * TRANSFER_HOUR_WEIGHT
+        for pace, target in enumerate(PACE_HOURS.values()):
+            self.pace_penalties[pace, row] = abs(self.busy_hours[row] - target) * PACE_WEIGHT / target
+        self.type_shares[:, row] = 0
+        for column, share in type_shares.items():
+            self.type_shares[column, row] = share
+        self.region_shares[:, row] = 0
+        for column, share in region_shares.items():
+            self.region_shares[column, row] = share
+
+    def remove(self, itinerary_id: int):
+        row = self.position.pop(itinerary_id)
+        # Move the last row into the hole
+        last = self.size - 1
+        if row != last:
+            for name in self._ROW_ARRAYS:
+                array = getattr(self, name)
+                array[row] = array[last]
+            for name in self._SHARE_ARRAYS:
+                array = getattr(self, name)
+                array[:, row] = array[:, last]
+            self.position[int(self.ids[row])] = row
+        self.size = last
+
+    def add_column(self, name: str):
+        """One more activity type or region"""
+        array = getattr(self, name)
+        setattr(self, name, np.vstack([array, np.zeros((1, array.shape[1]), dtype=array.dtype)]))
+
+    def _grow(self, capacity: int):
+        for name in self._ROW_ARRAYS:
+            array = getattr(self, name)
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            setattr(self, name, grown)
+        for name in self._SHARE_ARRAYS:
+            array = getattr(self, name)
+            grown = np.zeros((len(array), capacity), dtype=array.dtype)
+            grown[:, :self.size] = array[:, :self.size]
+            setattr(self, name, grown)
+
+    def scores(self, interests: List[int], regions: List[int], preferences: "Preferences", out: np.ndarray, scratch: np.ndarray):
+        """Write every row's score into `out`, using `scratch` (as long as `out`) for intermediate terms"""
+        n = self.size
+        if preferences.pace:
+            np.subtract(self.base_scores[:n], self.pace_penalties[_PACE_INDEX[preferences.pace], :n], out=out)
+        else:
+            out[:] = self.base_scores[:n]
+        for shares, columns, weight in (
+            (self.type_shares, interests, INTEREST_WEIGHT),
+            (self.region_shares, regions, REGION_WEIGHT),
+        ):
+            if columns:
+                # Shares of the selected columns add up before the one multiply
+                np.copyto(scratch, shares[columns[0], :n])
+                for column in columns[1:]:
+                    scratch += shares[column, :n]
+                scratch *= np.float32(weight)
+                out += scratch
+        if preferences.budget:
+            np.subtract(self.prices[:n], np.float32(preferences.budget), out=scratch)
+            np.maximum(scratch, 0, out=scratch)
+            scratch *= np.float32(OVER_BUDGET_WEIGHT / preferences.budget)
+            out -= scratch
+
+
+class RecommendationRanker:
+    """
+    Feature matrix of every recommended itinerary, scored in one pass per query.
+
+    Each row holds an itinerary's total price, average hotel stars, transfer
+    and activity hours per day, the share of its activities of each activity
+    type and the share of its nights in each region, with rows grouped by
+    nights. A refresh compares the database's change_marker with the one
+    last seen and reloads the rows of itineraries updated since then by any
+    process; the whole matrix is reloaded when recommended itineraries were
+    deleted, and after `ttl` seconds as a backstop.
+    """
+
+    def __init__(self, ttl: float = CATALOG_SNAPSHOT_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+        self._marker: Optional[Tuple] = None
+        self._clear()
+
+    def _clear(self):
+        self.blocks: Dict[int, _NightsBlock] = {}
+        self.nights_of: Dict[int, int] = {}  # itinerary id -> block
+        self.activity_types: Dict[str, int] = {}
+        self.regions: Dict[str, int] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.nights_of)
+
+    def _expired(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl
+
+    def is_current(self, marker: Tuple) -> bool:
+        """Whether the matrix reflects the database as of this change_marker"""
+        with self._lock:
+            return marker == self._marker and not self._expired()
+
+    def refresh(self, db: Session):
+        """
+        Bring the matrix up to date with the database.
+
+        Itineraries updated since the last marker's latest updated_at, less
+        CHANGE_SAFETY_WINDOW, are reloaded (one that stopped being recommended
+        is dropped); when the recommended count or id sum still disagrees, rows
+        were deleted and the whole matrix is reloaded.
+        """
+        marker = change_marker(db)
+        with self._lock:
+            if marker == self._marker and not self._expired():
+                return
+            since = self._marker[2] if self._marker else None
+            full = self._expired() or since is None
+        if not full:
+            since -= timedelta(seconds=CHANGE_SAFETY_WINDOW)
+            changed = set(db.scalars(select(Itinerary.id).where(Itinerary.updated_at >= since)))
+            rows = feature_rows(db, changed) if changed else []
+            with self._lock:
+                self._apply(rows, changed - {row[0] for row in rows})
+                # Deleted itineraries leave no updated_at behind, only a smaller count and sum
+                full = (self.size, sum(self.nights_of)) != marker[:2]
+                if not full:
+                    self._marker = marker
+        if full:
+            rows = feature_rows(db)
+            with self._lock:
+                self._clear()
+                self._apply(rows, ())
+                self._loaded_at = time.monotonic()
+                self._marker = marker
+
+    def _apply(self, rows: List[tuple], removed: Iterable[int]):
+        for itinerary_id in removed:
+            if itinerary_id in self.nights_of:
+                self.blocks[self.nights_of.pop(itinerary_id)].remove(itinerary_id)
+        for row in rows:
+            self._put(*row)
+
+    def _put(self, itinerary_id, nights, price, stars, transfer_hours, activity_hours, type_counts, region_nights):
+        for name in type_counts:
+            self._add_column("type_shares", self.activity_types, name)
+        for name in region_nights:
+            self._add_column("region_shares", self.regions, name)
+        previous = self.nights_of.get(itinerary_id)
+        if previous is not None and previous != nights:
+            self.blocks[previous].remove(itinerary_id)
+        block = self.blocks.get(nights)
+        if block is None:
+            block = self.blocks[nights] = _NightsBlock(len(self.activity_types), len(self.regions))
+        self.nights_of[itinerary_id] = nights
+        days = max(nights, 1)
+        activities = sum(type_counts.values())
+        block.put(
+            itinerary_id,
+            {
+                "prices": price,
+                "stars": stars,
+                "transfer_hours": transfer_hours / days,
+                "busy_hours": (transfer_hours + activity_hours) / days,
+            },
+            {self.activity_types[name]: count / activities for name, count in type_counts.items()},
+            {self.regions[name]: count / days for name, count in region_nights.items()},
+        )
+
+    def _add_column(self, attribute: str, columns: Dict[str, int], name: str):
+        if name not in columns:
+            columns[name] = len(columns)
+            for block in self.blocks.values():
+                block.add_column(attribute)
+
+    def preference_columns(self, preferences: Preferences) -> Tuple[List[int], List[int]]:
+        """The activity type columns matching an interest and the region columns preferred"""
+        tags = [tag.strip().lower() for tag in preferences.interests if tag.strip()]
+        interests = [
+            column for name, column in self.activity_types.items() if any(tag in name.lower() for tag in tags)
+        ]
+        wanted = {region.lower() for region in preferences.regions}
+        regions = [column for name, column in self.regions.items() if name.lower() in wanted]
+        return interests, regions
+
+    def rank(self, preferences: Preferences, nights: Optional[int] = None, k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Top-k recommended itineraries for the preferences, best first.
+
+        The rows are scored with one batch of array operations per nights
+        block and the top k selected over all of them at once; `nights`
+        restricts the ranking to that block.
+
+        Returns:
+            (itinerary id, score) pairs
+        """
+        with self._lock:
+            interests, regions = self.preference_columns(preferences)
+            if nights is None:
+                blocks = [block for block in self.blocks.values() if block.size]
+            else:
+                blocks = [self.blocks[nights]] if nights in self.blocks and self.blocks[nights].size else []
+            if not blocks or k < 1:
+                return []
+            # Score every block into one array and select its top k once
+            ends = np.cumsum([block.size for block in blocks])
+            scores = np.empty(ends[-1], dtype=np.float32)
+            scratch = np.empty(ends[-1], dtype=np.float32)
+            start = 0
+            for block, end in zip(blocks, ends):
+                block.scores(interests, regions, preferences, scores[start:end], scratch[start:end])
+                start = end
+            k = min(k, len(scores))
+            if k <= ARGMAX_TOP_K:
+                # A few linear scans beat a partial sort for small k
+                top = []
+                for _ in range(k):
+                    row = int(np.argmax(scores))
+                    top.append((row, float(scores[row])))
+                    scores[row] = -np.inf
+            else:
+                rows = np.argpartition(scores, len(scores) - k)[-k:]
+                top = zip(rows.tolist(), scores[rows].tolist())
+            best = []
+            for row, score in top:
+                owner = int(np.searchsorted(ends, row, side="right"))
+                offset = int(ends[owner - 1]) if owner else 0
+                best.append((score, int(blocks[owner].ids[row - offset])))
+        # Best score first, lowest id among equals
+        best.sort(key=lambda pair: (-pair[0], pair[1]))
+        return [(itinerary_id, round(score, 4)) for score, itinerary_id in best]
+
+
+def change_marker(db: Session) -> Tuple:
+    """
+    (count and id sum of the recommended itineraries, latest updated_at of any itinerary).
+
+    Every itinerary write, including catalog edits reaching it, moves
+    updated_at; deletions move the count and sum.
+    """
+    recommended = select(Itinerary.id).where(Itinerary.is_recommended == True).subquery()
+    return tuple(db.execute(select(
+        select(func.count()).select_from(recommended).scalar_subquery(),
+        select(func.coalesce(func.sum(recommended.c.id), 0)).scalar_subquery(),
+        select(func.max(Itinerary.updated_at)).scalar_subquery(),
+    )).one())
+
+
+def feature_rows(db: Session, itinerary_ids: Optional[Iterable[int]] = None) -> List[tuple]:
+    """
+    Ranking features of recommended itineraries (all, or those among `itinerary_ids`) in four queries.
+
+    Returns:
+        (id, nights, total_price, average stars, transfer hours, activity hours,
+        {activity type: count}, {region: nights}) tuples
+    """
+    itineraries = select(Itinerary.id, Itinerary.nights, Itinerary.total_price).where(
+        Itinerary.is_recommended == True
+    )
+    if itinerary_ids is not None:
+        itineraries = itineraries.where(Itinerary.id.in_(list(itinerary_ids)))
+    base = {row.id: row for row in db.execute(itineraries)}
+    if not base:
+        return []
+    ids = list(base)
+
+    days = {
+        row.itinerary_id: row
+        for row in db.execute(
+            select(
+                DailyPlan.itinerary_id,
+                func.avg(Hotel.star_rating).label("stars"),
+                func.coalesce(func.sum(Transfer.duration), 0).label("transfer_hours"),
+            )
+            .join(Hotel, Hotel.id == DailyPlan.hotel_id)
+            .outerjoin(Transfer, Transfer.id == DailyPlan.transfer_id)
+            .where(DailyPlan.itinerary_id.in_(ids))
+            .group_by(DailyPlan.itinerary_id)
+        )
+    }
+    type_counts: Dict[int, Dict[str, int]] = {}
+    activity_hours: Dict[int, float] = {}
+    for row in db.execute(
+        select(
+            DailyPlan.itinerary_id,
+            Activity.activity_type,
+            func.count().label("count"),
+            func.coalesce(func.sum(Activity.duration), 0).label("hours"),
+        )
+        .join(daily_plan_activity, daily_plan_activity.c.daily_plan_id == DailyPlan.id)
+        .join(Activity, Activity.id == daily_plan_activity.c.activity_id)
+        .where(DailyPlan.itinerary_id.in_(ids))
+        .group_by(DailyPlan.itinerary_id, Activity.activity_type)
+    ):
+        type_counts.setdefault(row.itinerary_id, {})[row.activity_type or ""] = row.count
+        activity_hours[row.itinerary_id] = activity_hours.get(row.itinerary_id, 0.0) + row.hours
+    region_nights: Dict[int, Dict[str, int]] = {}
+    for row in db.execute(
+        select(DailyPlan.itinerary_id, Location.region, func.count().label("count"))
+        .join(Hotel, Hotel.id == DailyPlan.hotel_id)
+        .join(Location, Location.id == Hotel.location_id)
+        .where(DailyPlan.itinerary_id.in_(ids))
+        .group_by(DailyPlan.itinerary_id, Location.region)
+    ):
+        region_nights.setdefault(row.itinerary_id, {})[row.region or ""] = row.count
+
+    rows = []
+    for itinerary_id, itinerary in base.items():
+        day = days.get(itinerary_id)
+        rows.append((
+            itinerary_id,
+            itinerary.nights,
+            itinerary.total_price or 0.0,
+            (day.stars if day else None) or 0.0,
+            day.transfer_hours if day else 0.0,
+            activity_hours.get(itinerary_id, 0.0),
+            type_counts.get(itinerary_id, {}),
+            region_nights.get(itinerary_id, {}),
+        ))
+    return rows
+
+
+# Ranking index over the application database's recommended itineraries
+recommendation_ranker = RecommendationRanker()
+
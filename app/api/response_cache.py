@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Hashable, Iterable, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models.models import DailyPlan, Itinerary
+from config import RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL
+
+
+@dataclass
+class CachedResponse:
+    """Pre-serialised response body plus the headers it was served with"""
+    body: bytes
+    headers: Dict[str, str]
+    expires_at: float
+    # Itinerary ids contained in the body
+    itinerary_ids: FrozenSet[int] = frozenset()
+    # (nights, recommended_only) filter of a list page, None for other entries
+    list_filter: Optional[Tuple[Optional[int], bool]] = None
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache with a per-entry TTL for serialised read responses.
+    
+    Entries are keyed on normalised request parameters. Writes invalidate
+    the detail entry of the affected itinerary, every list page containing it
+    and every list page whose filters it matches.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Incremented by every invalidation; responses rendered from reads that
+        # started before an invalidation are not stored
+        self.generation = 0
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry
+
+    def put(
+        self,
+        key: Hashable,
+        body: bytes,
+        headers: Dict[str, str],
+        itinerary_ids=(),
+        list_filter: Optional[Tuple[Optional[int], bool]] = None,
+        generation: Optional[int] = None,
+    ) -> CachedResponse:
+        entry = CachedResponse(
+            body=body,
+            headers=dict(headers),
+            expires_at=time.monotonic() + self.ttl,
+            itinerary_ids=frozenset(itinerary_ids),
+            list_filter=list_filter,
+        )
+        if self.maxsize <= 0:
+            return entry
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return entry
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+        return entry
+
+    def invalidate_itinerary(self, itinerary_id: int, matches=()):
+        """
+        Drop cached responses affected by a write to one itinerary.
+        
+        Args:
+            itinerary_id: The itinerary that changed
+            matches: (nights, is_recommended) pairs the itinerary had before
+                and after the write; list pages whose filters accept any of
+                them are dropped because the itinerary may enter or leave them
+        """
+        self.invalidate_itineraries({itinerary_id: matches})
+
+    def invalidate_itineraries(self, changes: Dict[int, Iterable[Tuple[int, bool]]]):
+        """Drop cached responses affected by writes to several itineraries in one pass"""
+        matches = {match for values in changes.values() for match in values}
+
+        def affected(entry: CachedResponse) -> bool:
+            if not entry.itinerary_ids.isdisjoint(changes):
+                return True
+            if entry.list_filter is None:
+                return False
+            nights, recommended_only = entry.list_filter
+            return any(
+                (nights is None or nights == n) and (not recommended_only or recommended)
+                for n, recommended in matches
+            )
+
+        with self._lock:
+            self.generation += 1
+            stale = [key for key, entry in self._entries.items() if affected(entry)]
+            for key in stale:
+                del self._entries[key]
+            self.stats.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                **vars(self.stats),
+            }
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+
+_PENDING_KEY = "response_cache_invalidations"
+
+
+def _filter_values(itinerary: Itinerary):
+    """(nights, is_recommended) before and after pending changes"""
+    state = inspect(itinerary)
+    nights = state.attrs.nights.history
+    recommended = state.attrs.is_recommended.history
+    values = {(itinerary.nights, bool(itinerary.is_recommended))}
+    for old_nights in nights.deleted or [itinerary.nights]:
+        for old_recommended in recommended.deleted or [itinerary.is_recommended]:
+            values.add((old_nights, bool(old_recommended)))
+    return values
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_invalidations(session, flush_context):
+    # Pre-flush state and attribute history are still available here, and new
+    # itineraries already have their ids
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Itinerary):
+            pending.setdefault(obj.id, set()).update(_filter_values(obj))
+        elif isinstance(obj, DailyPlan) and obj.itinerary_id is not None:
+            pending.setdefault(obj.itinerary_id, set())
+
+
+def invalidate_on_commit(session: Session, itinerary_ids: Iterable[int]):
+    """
+    Invalidate these itineraries' entries, and the list pages containing them,
+    once the session commits; for set-based writes the flush hook cannot see.
+    """
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    for itinerary_id in itinerary_ids:
+        pending.setdefault(itinerary_id, set())
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session):
+    pending = session.info.pop(_PENDING_KEY, {})
+    if pending:
+        response_cache.invalidate_itineraries(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -1,25 +1,76 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from starlette.concurrency import run_in_threadpool
+from typing import List, Literal, Optional, Union
 
-from app.database.db import get_db
-from app.models.models import Itinerary, DailyPlan, Hotel, Activity, Transfer, Location
+from app.database.db import DbSession, get_read_session, get_session, run_db, session_scope, ReadSessionLocal
+from app.database.loaders import itinerary_summary_query
+from app.api.pagination import apply_itinerary_cursor, itinerary_cursor
+from app.api.caching import (
+    catalog_etag,
+    etag_matches,
+    itinerary_etag,
+    list_etag,
+    not_modified,
+    serve_cached,
+    validator_headers,
+)
+from app.api.response_cache import response_cache
+from app.api.documents import load_documents, render_missing, stream_documents
+from app.api.search import search_itineraries, split_facet
+from app.api.fulltext import CATALOG_ENTITY_TYPES, full_text_search
+from app.api.nearby import nearby_catalog
+from app.api.routing import OPTIMIZE_MODES, transfer_graph
+from app.api.generator import generate_itinerary, generator_catalog, plan_itinerary
+from app.api.bulk import (
+    bulk_create_itineraries,
+    commit_itineraries,
+    fetch_reference_maps,
+    validate_itinerary,
+)
+from app.models.models import Itinerary, Location, utcnow
 from app.api.schemas import (
     ItineraryCreate,
+    ItineraryBulkCreate,
+    ItineraryBulkResponse,
+    ItineraryGenerateRequest,
+    ItineraryGenerateResponse,
     ItineraryResponse,
+    ItinerarySummaryResponse,
+    ItinerarySearchResult,
+    CatalogSearchResponse,
+    NearbyResponse,
+    RouteResponse,
     ErrorResponse,
     LocationResponse
 )
+from config import (
+    MAX_PAGE_SIZE,
+    EXPORT_BATCH_SIZE,
+    BULK_MAX_ITEMS,
+    LOCATIONS_CACHE_MAX_AGE,
+    CHANGE_SAFETY_WINDOW,
+)
 
 router = APIRouter()
 
+# Serialisers for responses stored in the response cache
+_SUMMARY_LIST = TypeAdapter(List[ItinerarySummaryResponse])
+_LOCATION_LIST = TypeAdapter(List[LocationResponse])
+_SEARCH_LIST = TypeAdapter(List[ItinerarySearchResult])
+
 
 @router.post(
     "/itineraries/", 
     response_model=ItineraryResponse, 
     responses={400: {"model": ErrorResponse}}
 )
-async def create_itinerary(itinerary: ItineraryCreate, db: Session = Depends(get_db)):
+async def create_itinerary(itinerary: ItineraryCreate, db: DbSession = Depends(get_session)):
     """
     Create a new travel itinerary with daily plans.
     
@@ -47,98 +98,169 @@ async def create_itinerary(itinerary: ItineraryCreate, db: Session = Depends(get
     }
     ``` 
     """
-    total_price = 0
-    
-    # Validate that all referenced IDs exist
-    hotel_ids = set()
-    transfer_ids = set()
-    activity_ids = set()
-    
-    for plan in itinerary.daily_plans:
-        hotel_ids.add(plan.hotel_id)
-        if plan.transfer_id:
-            transfer_ids.add(plan.transfer_id)
-        activity_ids.update(plan.activity_ids)
-    
-    hotels = db.query(Hotel).filter(Hotel.id.in_(hotel_ids)).all()
-    if len(hotels) != len(hotel_ids):
-        raise HTTPException(status_code=400, detail="One or more hotel IDs not found")
-    
-    if transfer_ids:
-        transfers = db.query(Transfer).filter(Transfer.id.in_(transfer_ids)).all()
-        if len(transfers) != len(transfer_ids):
-            raise HTTPException(status_code=400, detail="One or more transfer IDs not found")
-    
-    if activity_ids:
-        activities = db.query(Activity).filter(Activity.id.in_(activity_ids)).all()
-        if len(activities) != len(activity_ids):
-            raise HTTPException(status_code=400, detail="One or more activity IDs not found")
-    
-    #New Itinerary instance
-    db_itinerary = Itinerary(
-        name=itinerary.name,
-        description=itinerary.description,
-        nights=itinerary.nights,
-        total_price=0,  
-    )
-    db.add(db_itinerary)
-    db.flush()  
-    
-    # Create DailyPlans
-    for plan_data in itinerary.daily_plans:
-        plan = DailyPlan(
-            day_number=plan_data.day_number,
-            itinerary_id=db_itinerary.id,
-            hotel_id=plan_data.hotel_id,
-            transfer_id=plan_data.transfer_id,
-            notes=plan_data.notes
-        )
-        db.add(plan)
-        db.flush()
+    def create(db: Session) -> bytes:
+        # One IN query per table; the fetched prices are reused for the total
+        refs = fetch_reference_maps(db, itinerary.daily_plans)
+        error = validate_itinerary(itinerary, refs)
+        if error:
+            raise HTTPException(status_code=400, detail=error)
         
-        # Add activities
-        if plan_data.activity_ids:
-            activities = db.query(Activity).filter(Activity.id.in_(plan_data.activity_ids)).all()
-            plan.activities = activities
-            
-        # Calculate costs
-        hotel = db.query(Hotel).filter(Hotel.id == plan.hotel_id).first()
-        total_price += hotel.price_per_night
-        
-        if plan.transfer_id:
-            transfer = db.query(Transfer).filter(Transfer.id == plan.transfer_id).first()
-            total_price += transfer.price
-            
-        for activity in plan.activities:
-            total_price += activity.price
+        # Itinerary, daily plans and activity links are each written with one
+        # statement, so the cost does not grow with the number of days
+        [body] = commit_itineraries(db, [itinerary], refs).values()
+        return body
     
-    # Update total price
-    db_itinerary.total_price = total_price
-    db.commit()
-    db.refresh(db_itinerary)
+    body = await run_db(db, create)
+    return Response(content=body, media_type="application/json")
+
+
+@router.post(
+    "/itineraries/bulk",
+    response_model=ItineraryBulkResponse,
+    responses={400: {"model": ItineraryBulkResponse}}
+)
+async def create_itineraries_bulk(batch: ItineraryBulkCreate, db: DbSession = Depends(get_session)):
+    """
+    Create many itineraries in one request.
     
-    return db_itinerary
+    All referenced hotel, transfer and activity IDs are validated across the
+    whole batch, and rows are inserted with set-based inserts in a single
+    transaction. With `atomic` (the default) an invalid item rejects the batch
+    with status 400; otherwise valid items are created and invalid ones are
+    reported. Each result reports the item's index, success and new ID or error.
+    
+    Example request body:
+    ```json
+    {
+      "atomic": false,
+      "itineraries": [
+        {
+          "name": "Phuket Paradise",
+          "description": "Experience the best of Phuket beaches and attractions",
+          "nights": 2,
+          "daily_plans": [
+            {"day_number": 1, "hotel_id": 1, "transfer_id": 1, "activity_ids": [1]},
+            {"day_number": 2, "hotel_id": 1, "activity_ids": [2]}
+          ]
+        }
+      ]
+    }
+    ```
+    """
+    if len(batch.itineraries) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch can contain at most {BULK_MAX_ITEMS} itineraries"
+        )
+    
+    result = await run_db(db, bulk_create_itineraries, batch.itineraries, atomic=batch.atomic)
+    if batch.atomic and result.failed:
+        return JSONResponse(status_code=400, content=result.model_dump())
+    return result
+
+
+@router.post(
+    "/itineraries/generate",
+    response_model=ItineraryGenerateResponse,
+    responses={400: {"model": ErrorResponse}}
+)
+async def generate_itinerary_plan(request: ItineraryGenerateRequest, db: DbSession = Depends(get_read_session)):
+    """
+    Generate an itinerary from constraints instead of picking the days by hand.
+    
+    Searches hotels, activity combinations and direct transfers for the best
+    scoring plan: more activities, especially ones matching `interests`, better
+    hotels and less time in transfers. Every location change uses a direct
+    transfer, each day's transfer and activity hours stay within
+    `max_hours_per_day`, no activity repeats and the total stays within
+    `budget`. The search stops widening after `time_budget_ms` and returns the
+    best plan found so far (`complete` is then false). With `save` the plan is
+    checked against the current catalog like `POST /itineraries/` (400 when a
+    hotel, transfer or activity it uses has gone since the catalog snapshot)
+    and stored on a write session, and its id returned.
+    
+    Example request body:
+    ```json
+    {"nights": 4, "budget": 900, "regions": ["Phuket"], "interests": ["water", "culture"]}
+    ```
+    """
+    catalog = generator_catalog.current or await run_db(db, generator_catalog.load)
+    plan = await run_in_threadpool(
+        generate_itinerary,
+        catalog,
+        request.nights,
+        budget=request.budget,
+        regions=request.regions,
+        interests=request.interests,
+        max_hours_per_day=request.max_hours_per_day,
+        time_budget_ms=request.time_budget_ms,
+    )
+    if plan is None:
+        raise HTTPException(status_code=400, detail="No itinerary satisfies these constraints")
+    
+    regions = " and ".join(request.regions) or "Thailand"
+    itinerary = plan_itinerary(
+        plan,
+        request.nights,
+        name=request.name or f"{request.nights}-Night {regions} Trip",
+        description=f"Generated {request.nights}-night itinerary in {regions}",
+    )
+    def save(db: Session) -> int:
+        # The catalog snapshot can be older than rows deleted since
+        refs = fetch_reference_maps(db, itinerary.daily_plans)
+        error = validate_itinerary(itinerary, refs)
+        if error:
+            raise HTTPException(status_code=400, detail=error)
+        [saved_id] = commit_itineraries(db, [itinerary], refs)
+        return saved_id
+    
+    itinerary_id = None
+    if request.save:
+        async with session_scope() as write_db:
+            itinerary_id = await run_db(write_db, save)
+    return {
+        "itinerary": itinerary,
+        "total_price": plan.total_price,
+        "score": plan.score,
+        "complete": plan.complete,
+        "elapsed_ms": plan.elapsed_ms,
+        "id": itinerary_id,
+    }
 
 
 @router.get(
     "/itineraries/", 
-    response_model=List[ItineraryResponse]
+    response_model=Union[List[ItineraryResponse], List[ItinerarySummaryResponse]],
+    responses={304: {"description": "Page unchanged"}, 400: {"model": ErrorResponse}}
 )
 async def get_itineraries(
+    request: Request,
     nights: Optional[int] = None,
     recommended_only: bool = False,
-    skip: int = 0, 
-    limit: int = 10,
-    db: Session = Depends(get_db)
+    view: Literal["full", "summary"] = "full",
+    cursor: Optional[str] = None,
+    skip: int = Query(0, ge=0, deprecated=True),
+    limit: int = Query(10, ge=1),
+    db: DbSession = Depends(get_read_session)
 ):
     """
     Retrieve travel itineraries with optional filtering by number of nights.
     
+    Results are ordered by (nights, total_price, id). When more results are
+    available, the `X-Next-Cursor` response header holds an opaque cursor that
+    can be passed back as `cursor` to fetch the next page.
+    
+    Responses carry an `ETag` derived from the versions of the itineraries on
+    the page; sending it back in `If-None-Match` returns `304 Not Modified`.
+    
     Parameters:
     - nights: Filter by the exact number of nights
     - recommended_only: If true, return only recommended itineraries
-    - skip: Number of records to skip (for pagination)
-    - limit: Maximum number of records to return
+    - view: "full" (default) for complete itineraries, or "summary" for
+      id/name/nights/total_price/is_recommended and the number of daily plans
+    - cursor: Cursor from the `X-Next-Cursor` header of the previous page
+    - skip: Number of records to skip (deprecated, use `cursor` instead)
+    - limit: Maximum number of records to return (capped at MAX_PAGE_SIZE)
     
     Example response:
     ```json
@@ -155,48 +277,444 @@ async def get_itineraries(
     ]
     ``` 
     """
-    query = db.query(Itinerary)
+    limit = min(limit, MAX_PAGE_SIZE)
+    if_none_match = request.headers.get("if-none-match")
+    cache_key = ("itineraries", view, nights, recommended_only, cursor, 0 if cursor else skip, limit)
+    generation = response_cache.generation
+    cached = response_cache.get(cache_key)
+    if cached:
+        return serve_cached(cached, if_none_match)
     
-    if nights is not None:
-        query = query.filter(Itinerary.nights == nights)
+    def page(query) -> tuple:
+        if nights is not None:
+            query = query.filter(Itinerary.nights == nights)
+        if recommended_only:
+            query = query.filter(Itinerary.is_recommended == True)
+        query = apply_itinerary_cursor(query, cursor)
+        if skip and not cursor:
+            query = query.offset(skip)
+        # Fetch one extra row to find out whether another page exists
+        rows = query.limit(limit + 1).all()
+        return rows[:limit], len(rows) > limit
     
-    if recommended_only:
-        query = query.filter(Itinerary.is_recommended == True)
-        
-    itineraries = query.offset(skip).limit(limit).all()
-    return itineraries
+    def validators(rows, has_more):
+        etag = list_etag(view, [(row.id, row.version) for row in rows], has_more)
+        last_modified = max((row.updated_at for row in rows), default=None)
+        headers = {"X-Next-Cursor": itinerary_cursor(rows[-1])} if has_more else {}
+        return etag, last_modified, headers
+    
+    def fetch_page(db: Session) -> tuple:
+        if view == "summary":
+            return page(itinerary_summary_query(db, Itinerary.version, Itinerary.updated_at))
+        # Only the keys and versions of the page; bodies come from stored documents
+        return page(db.query(
+            Itinerary.id,
+            Itinerary.version,
+            Itinerary.updated_at,
+            Itinerary.nights,
+            Itinerary.total_price,
+        ))
+    
+    def fetch_documents(db: Session) -> dict:
+        documents = load_documents(db, rows)
+        documents.update(render_missing(db, [row.id for row in rows if row.id not in documents]))
+        return documents
+    
+    rows, has_more = await run_db(db, fetch_page)
+    etag, last_modified, headers = validators(rows, has_more)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, last_modified, **headers)
+    
+    if view == "summary":
+        body = _SUMMARY_LIST.dump_json(
+            _SUMMARY_LIST.validate_python([row._asdict() for row in rows])
+        )
+    else:
+        documents = await run_db(db, fetch_documents)
+        body = b"[" + b",".join(documents[row.id] for row in rows if row.id in documents) + b"]"
+    entry = response_cache.put(
+        cache_key,
+        body,
+        {**validator_headers(etag, last_modified), **headers},
+        itinerary_ids=[row.id for row in rows],
+        list_filter=(nights, recommended_only),
+        generation=generation,
+    )
+    return serve_cached(entry)
+
+
+@router.get(
+    "/itineraries/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}}
+)
+async def export_itineraries(
+    nights: Optional[int] = None,
+    recommended_only: bool = False,
+    since: Optional[datetime] = None,
+    db: DbSession = Depends(get_read_session)
+):
+    """
+    Stream the full itinerary catalog as newline-delimited JSON.
+    
+    Each line is one itinerary in the same shape as `GET /itineraries/{id}`,
+    ordered by id (by update time, then id, when `since` is given). Rows are read with a server-side cursor in batches of
+    EXPORT_BATCH_SIZE, so memory use does not grow with the catalog.
+    
+    The `X-Export-Watermark` header is the latest `updated_at` in the database
+    when the export started, read from the database rather than a clock.
+    Because `updated_at` is stamped at flush by each writer, a transaction
+    still open then can commit an older stamp later, so `since` reaches back
+    CHANGE_SAFETY_WINDOW seconds further: itineraries updated in that window
+    are exported again, and syncs must upsert by id and version.
+    
+    Parameters:
+    - nights: Filter by the exact number of nights
+    - recommended_only: If true, export only recommended itineraries
+    - since: Only export itineraries updated after this UTC timestamp; pass the
+      `X-Export-Watermark` header of the previous export for incremental syncs
+    """
+    watermark = await run_db(db, lambda session: session.query(func.max(Itinerary.updated_at)).scalar())
+    if since is not None and since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    def lines():
+        db = ReadSessionLocal()
+        try:
+            query = db.query(Itinerary.id, Itinerary.version)
+            if nights is not None:
+                query = query.filter(Itinerary.nights == nights)
+            if recommended_only:
+                query = query.filter(Itinerary.is_recommended == True)
+            if since is not None:
+                # Incremental exports walk ix_itineraries_updated_at instead of the table
+                query = query.filter(
+                    Itinerary.updated_at > since - timedelta(seconds=CHANGE_SAFETY_WINDOW)
+                ).order_by(Itinerary.updated_at)
+            yield from stream_documents(db, query.order_by(Itinerary.id), EXPORT_BATCH_SIZE)
+        finally:
+            db.close()
+    
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"X-Export-Watermark": (watermark or since or utcnow()).isoformat()},
+    )
+
+
+@router.get(
+    "/itineraries/search",
+    response_model=List[ItinerarySearchResult],
+    responses={400: {"model": ErrorResponse}}
+)
+async def search_itineraries_route(
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    nights: Optional[int] = None,
+    region: Optional[str] = None,
+    min_star: Optional[float] = Query(None, ge=0, le=5),
+    activity_type: List[str] = Query([]),
+    boat_transfer: Optional[bool] = None,
+    recommended_only: bool = False,
+    sort: Literal["price", "nights"] = "price",
+    cursor: Optional[str] = None,
+    limit: int = Query(10, ge=1),
+    db: DbSession = Depends(get_read_session)
+):
+    """
+    Search itineraries by budget, region, hotel stars, activity types and transfers.
+    
+    Filters are combined with AND and evaluated on the denormalised
+    itinerary_search table, so a page costs one indexed query. Results are
+    sorted by price or by nights (then price), with keyset pagination through
+    the `X-Next-Cursor` response header, as on `GET /itineraries/`.
+    
+    Parameters:
+    - min_price, max_price: Total price range (inclusive)
+    - nights: Exact number of nights
+    - region: "Phuket" or "Krabi" for itineraries staying only there, or "both"
+      for itineraries covering both regions
+    - min_star: Minimum star rating of every hotel in the itinerary
+    - activity_type: Repeatable; the itinerary must include each listed type
+    - boat_transfer: true for itineraries with a boat or ferry transfer, false
+      for those without
+    - recommended_only: If true, return only recommended itineraries
+    - sort: "price" (default) or "nights"
+    - cursor: Cursor from the `X-Next-Cursor` header of the previous page
+    - limit: Maximum number of records to return (capped at MAX_PAGE_SIZE)
+    """
+    limit = min(limit, MAX_PAGE_SIZE)
+    filters = dict(
+        min_price=min_price,
+        max_price=max_price,
+        nights=nights,
+        region=region,
+        min_star=min_star,
+        activity_types=tuple(activity_type),
+        boat_transfer=boat_transfer,
+        recommended_only=recommended_only,
+    )
+    cache_key = ("search", *sorted(filters.items()), sort, cursor, limit)
+    generation = response_cache.generation
+    cached = response_cache.get(cache_key)
+    if cached:
+        return serve_cached(cached)
+    
+    rows, next_cursor = await run_db(
+        db, lambda db: search_itineraries(db, **filters, sort=sort, cursor=cursor, limit=limit)
+    )
+    body = _SEARCH_LIST.dump_json(_SEARCH_LIST.validate_python([
+        {
+            "id": row.itinerary_id,
+            "name": row.name,
+            "nights": row.nights,
+            "total_price": row.total_price,
+            "is_recommended": row.is_recommended,
+            "regions": split_facet(row.regions),
+            "min_star": row.min_star,
+            "max_star": row.max_star,
+            "activity_types": split_facet(row.activity_types),
+            "transfer_types": split_facet(row.transfer_types),
+            "has_boat_transfer": row.has_boat_transfer,
+        }
+        for row in rows
+    ]))
+    entry = response_cache.put(
+        cache_key,
+        body,
+        {"X-Next-Cursor": next_cursor} if next_cursor else {},
+        itinerary_ids=[row.itinerary_id for row in rows],
+        # Any write to an itinerary with these nights may move it into the results
+        list_filter=(nights, recommended_only),
+        generation=generation,
+    )
+    return serve_cached(entry)
 
 
 @router.get(
     "/itineraries/{itinerary_id}", 
     response_model=ItineraryResponse,
-    responses={404: {"model": ErrorResponse}}
+    responses={304: {"description": "Itinerary unchanged"}, 404: {"model": ErrorResponse}}
 )
-async def get_itinerary(itinerary_id: int, db: Session = Depends(get_db)):
+async def get_itinerary(
+    itinerary_id: int,
+    request: Request,
+    db: DbSession = Depends(get_read_session)
+):
     """
     Retrieve a specific itinerary by its ID.
     
+    The response carries a strong `ETag` and `Last-Modified`; sending the ETag
+    back in `If-None-Match` returns `304 Not Modified` while the itinerary and
+    its daily plans are unchanged.
+    
     Parameters:
     - itinerary_id: The ID of the itinerary to retrieve
     """
-    itinerary = db.query(Itinerary).filter(Itinerary.id == itinerary_id).first()
-    if not itinerary:
+    if_none_match = request.headers.get("if-none-match")
+    cache_key = ("itinerary", itinerary_id)
+    generation = response_cache.generation
+    cached = response_cache.get(cache_key)
+    if cached:
+        return serve_cached(cached, if_none_match)
+    
+    def fetch_stamp(db: Session):
+        return db.query(Itinerary.id, Itinerary.version, Itinerary.updated_at).filter(
+            Itinerary.id == itinerary_id
+        ).first()
+    
+    def fetch_document(db: Session) -> Optional[bytes]:
+        body = load_documents(db, [stamp]).get(stamp.id)
+        if body is None:
+            body = render_missing(db, [stamp.id]).get(stamp.id)
+        return body
+    
+    stamp = await run_db(db, fetch_stamp)
+    if not stamp:
         raise HTTPException(status_code=404, detail=f"Itinerary with ID {itinerary_id} not found")
-    return itinerary
+    
+    # Revalidation only needs the version, not the graph
+    etag = itinerary_etag(stamp.id, stamp.version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, stamp.updated_at)
+    
+    body = await run_db(db, fetch_document)
+    if body is None:
+        raise HTTPException(status_code=404, detail=f"Itinerary with ID {itinerary_id} not found")
+    
+    entry = response_cache.put(
+        cache_key,
+        body,
+        validator_headers(etag, stamp.updated_at),
+        itinerary_ids=[stamp.id],
+        generation=generation,
+    )
+    return serve_cached(entry)
 
 
-@router.get("/locations/", response_model=List[LocationResponse])
-async def get_locations(region: Optional[str] = None, db: Session = Depends(get_db)):
+@router.get(
+    "/locations/",
+    response_model=List[LocationResponse],
+    responses={304: {"description": "Catalog unchanged"}}
+)
+async def get_locations(
+    request: Request,
+    region: Optional[str] = None,
+    db: DbSession = Depends(get_read_session)
+):
     """
     Retrieve locations with optional filtering by region.
     
+    Locations are reference data, so responses are cacheable for
+    LOCATIONS_CACHE_MAX_AGE seconds and validated against CATALOG_VERSION.
+    
     Parameters:
     - region: Filter locations by region (e.g., "Phuket" or "Krabi")
     """
-    query = db.query(Location)
+    etag = catalog_etag("locations", region or "all")
+    cache_control = f"public, max-age={LOCATIONS_CACHE_MAX_AGE}"
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, **{"Cache-Control": cache_control})
+    
+    cache_key = ("locations", region)
+    cached = response_cache.get(cache_key)
+    if cached:
+        return serve_cached(cached)
     
-    if region:
-        query = query.filter(Location.region == region)
+    def fetch_locations(db: Session) -> bytes:
+        query = db.query(Location)
         
-    locations = query.all()
-    return locations
+        if region:
+            query = query.filter(Location.region == region)
+            
+        locations = query.all()
+        return _LOCATION_LIST.dump_json(_LOCATION_LIST.validate_python(locations, from_attributes=True))
+    
+    body = await run_db(db, fetch_locations)
+    entry = response_cache.put(
+        cache_key, body, {**validator_headers(etag), "Cache-Control": cache_control}
+    )
+    return serve_cached(entry)
+
+
+@router.get(
+    "/search",
+    response_model=CatalogSearchResponse,
+    responses={400: {"model": ErrorResponse}}
+)
+async def search_catalog(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Optional[Literal[CATALOG_ENTITY_TYPES]] = None,
+    limit: int = Query(10, ge=1),
+    db: DbSession = Depends(get_read_session)
+):
+    """
+    Full-text search over locations, hotels and activities.
+    
+    Matches names, descriptions, hotel amenities, activity types and location
+    names (e.g. "snorkeling near Phi Phi"), ranked with BM25. Each result has a
+    snippet with the matched words in **bold**, and `facets` counts the matches
+    of every entity type.
+    
+    Parameters:
+    - q: Free text; words are matched in any order, the last one as a prefix
+    - type: Only return "location", "hotel" or "activity" results
+    - limit: Maximum number of results to return (capped at MAX_PAGE_SIZE)
+    """
+    limit = min(limit, MAX_PAGE_SIZE)
+    result = await run_db(db, full_text_search, q, type, limit)
+    if result is None:
+        raise HTTPException(status_code=400, detail="Search query must contain at least one word")
+    return result
+
+
+@router.get("/locations/nearby", response_model=NearbyResponse)
+async def get_nearby(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(25, gt=0, le=1000),
+    k: int = Query(10, ge=1),
+    db: DbSession = Depends(get_read_session)
+):
+    """
+    Find the locations, hotels and activities nearest to a point.
+    
+    Locations are looked up through an R*Tree index on their coordinates and
+    filtered by great-circle distance; hotels and activities are placed at
+    their location. Each list is sorted by `distance_km`.
+    
+    Parameters:
+    - lat, lon: The point to search around, in degrees
+    - radius_km: Search radius in kilometres (default 25)
+    - k: Maximum number of results of each type (capped at MAX_PAGE_SIZE)
+    """
+    k = min(k, MAX_PAGE_SIZE)
+    
+    def fetch_nearby(db: Session) -> dict:
+        found = nearby_catalog(db, lat, lon, radius_km, k)
+        return {
+            kind: [
+                {
+                    **{column.key: getattr(entity, column.key) for column in entity.__table__.columns},
+                    "distance_km": round(distance, 3),
+                }
+                for entity, distance in pairs
+            ]
+            for kind, pairs in found.items()
+        }
+    
+    return await run_db(db, fetch_nearby)
+
+
+@router.get(
+    "/routes",
+    response_model=RouteResponse,
+    responses={400: {"model": ErrorResponse}, 404: {"model": ErrorResponse}}
+)
+async def get_routes(
+    origin_id: int = Query(..., alias="from"),
+    destination_id: int = Query(..., alias="to"),
+    optimize: Literal[OPTIMIZE_MODES] = "fastest",
+    db: DbSession = Depends(get_read_session)
+):
+    """
+    Find transfer routes between two locations, possibly over several legs.
+    
+    Routes are computed on an in-memory graph of all transfers, loaded once
+    and replaced whenever transfers or locations change; answers are memoised
+    per (from, to, optimize).
+    
+    Parameters:
+    - from, to: Origin and destination location ids
+    - optimize: "fastest" (least total duration), "cheapest" (least total price)
+      or "pareto" (every route not beaten on both duration and price, fastest first)
+    """
+    if origin_id == destination_id:
+        raise HTTPException(status_code=400, detail="Origin and destination must differ")
+    
+    graph = transfer_graph.current or await run_db(db, transfer_graph.load)
+    for location_id in (origin_id, destination_id):
+        if location_id not in graph.names:
+            raise HTTPException(status_code=404, detail=f"Location with ID {location_id} not found")
+    
+    routes = graph.routes(origin_id, destination_id, optimize)
+    if not routes:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No transfer route from location {origin_id} to location {destination_id}",
+        )
+    return {
+        "origin_id": origin_id,
+        "destination_id": destination_id,
+        "optimize": optimize,
+        "routes": [graph.describe(route) for route in routes],
+    }
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Report response cache counters: size, hits, misses, evictions,
+    expirations and invalidations.
+    """
+    return response_cache.snapshot()
@@ -0,0 +1,202 @@
+import heapq
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.snapshots import CatalogSnapshot
+from app.models.models import Location, Transfer
+from config import ROUTE_CACHE_SIZE
+
+# optimize values: fastest and cheapest return one route, pareto every route
+# that no other route beats on both duration and price
+OPTIMIZE_MODES = ("fastest", "cheapest", "pareto")
+
+_UNREACHED = (float("inf"),)
+
+
+class TransferEdge(NamedTuple):
+    transfer_id: int
+    origin_id: int
+    destination_id: int
+    transfer_type: Optional[str]
+    duration: float
+    price: float
+
+
+class Route(NamedTuple):
+    legs: Tuple[TransferEdge, ...]
+    duration: float
+    price: float
+
+
+class TransferGraph:
+    """
+    Directed graph of transfers between locations, with memoised route queries.
+
+    A graph is immutable once built; changes to transfers replace it, which
+    also drops its memo.
+    """
+
+    def __init__(self, edges: List[TransferEdge], names: Dict[int, str], cache_size: int = ROUTE_CACHE_SIZE):
+        self.names = names
+        self.edge_count = len(edges)
+        self.adjacency: Dict[int, List[TransferEdge]] = defaultdict(list)
+        for edge in edges:
+            self.adjacency[edge.origin_id].append(edge)
+        self.cache_size = cache_size
+        self._memo: "OrderedDict[Tuple[int, int, str], Tuple[Route, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, db: Session) -> "TransferGraph":
+        """Build the graph from the transfers and location names in two queries"""
+        edges = [
+            TransferEdge(row.id, row.origin_id, row.destination_id, row.transfer_type,
+                         row.duration or 0.0, row.price or 0.0)
+            for row in db.execute(select(
+                Transfer.id, Transfer.origin_id, Transfer.destination_id,
+                Transfer.transfer_type, Transfer.duration, Transfer.price,
+            ))
+        ]
+        names = dict(db.execute(select(Location.id, Location.name)).all())
+        return cls(edges, names)
+
+    def routes(self, origin_id: int, destination_id: int, optimize: str) -> Tuple[Route, ...]:
+        """
+        Routes from origin to destination, memoised per (origin, destination, optimize).
+
+        Returns:
+            One route for "fastest"/"cheapest", the Pareto front ordered by
+            duration for "pareto", or () when the destination is unreachable
+        """
+        key = (origin_id, destination_id, optimize)
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+        if optimize == "pareto":
+            found = tuple(self._pareto(origin_id, destination_id))
+        else:
+            route = self._shortest(origin_id, destination_id, optimize)
+            found = (route,) if route else ()
+        with self._lock:
+            self._memo[key] = found
+            if len(self._memo) > self.cache_size:
+                self._memo.popitem(last=False)
+        return found
+
+    def _shortest(self, origin_id: int, destination_id: int, optimize: str) -> Optional[Route]:
+        """Dijkstra on (duration, price) or (price, duration), then fewest legs"""
+        by_time = optimize == "fastest"
+        best = {origin_id: (0.0, 0.0, 0)}
+        previous: Dict[int, TransferEdge] = {}
+        settled = set()
+        heap = [(0.0, 0.0, 0, origin_id)]
+        while heap:
+            cost = heapq.heappop(heap)
+            node = cost[3]
+            if node in settled:
+                continue
+            if node == destination_id:
+                legs = self._walk_back(previous, origin_id, destination_id)
+                duration, price = (cost[0], cost[1]) if by_time else (cost[1], cost[0])
+                return Route(legs, round(duration, 2), round(price, 2))
+            settled.add(node)
+            primary, secondary, leg_count = cost[:3]
+            for edge in self.adjacency.get(node, ()):
+                first, second = (edge.duration, edge.price) if by_time else (edge.price, edge.duration)
+                candidate = (primary + first, secondary + second, leg_count + 1)
+                if candidate < best.get(edge.destination_id, _UNREACHED):
+                    best[edge.destination_id] = candidate
+                    previous[edge.destination_id] = edge
+                    heapq.heappush(heap, (*candidate, edge.destination_id))
+        return None
+
+    @staticmethod
+    def _walk_back(previous: Dict[int, TransferEdge], origin_id: int, destination_id: int):
+        legs = []
+        node = destination_id
+        while node != origin_id:
+            edge = previous[node]
+            legs.append(edge)
+            node = edge.origin_id
+        return tuple(reversed(legs))
+
+    def _pareto(self, origin_id: int, destination_id: int) -> List[Route]:
+        """
+        Bi-objective label setting over (duration, price).
+
+        Labels leave the heap in (duration, price) order, so a label is
+        dominated exactly when an earlier label at the same location was no
+        more expensive. Each kept label records the label and edge it extends.
+        """
+        cheapest_seen: Dict[int, float] = {}
+        labels: List[Tuple[int, Optional[TransferEdge]]] = []  # (parent label, edge)
+        front = []
+        heap = [(0.0, 0.0, origin_id, -1, None)]
+        while heap:
+            duration, price, node, parent, via = heapq.heappop(heap)
+            if price >= cheapest_seen.get(node, float("inf")):
+                continue
+            cheapest_seen[node] = price
+            labels.append((parent, via))
+            label = len(labels) - 1
+            if node == destination_id:
+                legs = []
+                while labels[label][1] is not None:
+                    label, edge = labels[label]
+                    legs.append(edge)
+                front.append(Route(tuple(reversed(legs)), round(duration, 2), round(price, 2)))
+                continue
+            for edge in self.adjacency.get(node, ()):
+                next_price = price + edge.price
+                if next_price < cheapest_seen.get(edge.destination_id, float("inf")):
+                    heapq.heappush(heap, (duration + edge.duration, next_price, edge.destination_id, label, edge))
+        return front
+
+    def describe(self, route: Route) -> dict:
+        """JSON-ready form of a route with location names"""
+        return {
+            "duration": route.duration,
+            "price": route.price,
+            "legs": [
+                {
+                    "transfer_id": edge.transfer_id,
+                    "from_id": edge.origin_id,
+                    "from": self.names.get(edge.origin_id),
+                    "to_id": edge.destination_id,
+                    "to": self.names.get(edge.destination_id),
+                    "type": edge.transfer_type,
+                    "duration": edge.duration,
+                    "price": edge.price,
+                }
+                for edge in route.legs
+            ],
+        }
+
+
+# The transfer graph of the application database
+transfer_graph = CatalogSnapshot(TransferGraph.load, watched=(Transfer, Location))
+
+
+def route_summary(graph: TransferGraph, origin_id: int, destination_id: int, optimize: str) -> dict:
+    """Routes between two locations for the MCP tools, or {"error": ...}"""
+    if optimize not in OPTIMIZE_MODES:
+        return {"error": f"optimize must be one of {', '.join(OPTIMIZE_MODES)}"}
+    if origin_id == destination_id:
+        return {"error": "Origin and destination must differ"}
+    for location_id in (origin_id, destination_id):
+        if location_id not in graph.names:
+            return {"error": f"Location with ID {location_id} not found"}
+    routes = graph.routes(origin_id, destination_id, optimize)
+    if not routes:
+        return {"error": f"No transfer route from {graph.names[origin_id]} to {graph.names[destination_id]}"}
+    return {
+        "from": graph.names[origin_id],
+        "to": graph.names[destination_id],
+        "optimize": optimize,
+        "routes": [graph.describe(route) for route in routes],
+    }
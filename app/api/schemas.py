@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 class ActivityBase(BaseModel):
@@ -110,6 +110,86 @@ class ItineraryResponse(ItineraryBase):
         from_attributes = True
 
 
+class ItineraryBulkCreate(BaseModel):
+    itineraries: List[ItineraryCreate]
+    atomic: bool = True  # Reject the whole batch if any item is invalid
+
+
+class ItineraryBulkItemResult(BaseModel):
+    index: int
+    success: bool
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class ItineraryBulkResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[ItineraryBulkItemResult]
+
+
+class ItineraryGenerateRequest(BaseModel):
+    nights: int = Field(..., ge=1, le=30)
+    budget: Optional[float] = Field(None, gt=0)  # Maximum total price
+    regions: List[str] = []  # Hotels only in these regions; empty for all
+    interests: List[str] = []  # Tags matched against activity types, e.g. "water", "culture"
+    max_hours_per_day: float = Field(10, gt=0, le=24)  # Transfer plus activity hours
+    time_budget_ms: int = Field(200, ge=1, le=5000)
+    name: Optional[str] = None
+    save: bool = False  # Store the generated itinerary
+
+
+class ItineraryGenerateResponse(BaseModel):
+    itinerary: ItineraryCreate
+    total_price: float
+    score: float
+    complete: bool  # False when the time budget ran out and the plan was finished greedily
+    elapsed_ms: float
+    id: Optional[int] = None  # Set when saved
+
+
+class ItinerarySummaryResponse(BaseModel):
+    id: int
+    name: str
+    nights: int
+    total_price: float
+    is_recommended: bool = False
+    num_daily_plans: int
+
+    class Config:
+        from_attributes = True
+
+
+class ItinerarySearchResult(BaseModel):
+    id: int
+    name: str
+    nights: int
+    total_price: float
+    is_recommended: bool = False
+    regions: List[str]
+    min_star: Optional[float] = None
+    max_star: Optional[float] = None
+    activity_types: List[str]
+    transfer_types: List[str]
+    has_boat_transfer: bool
+
+
+class CatalogSearchHit(BaseModel):
+    type: str  # "location", "hotel" or "activity"
+    id: int
+    name: str
+    location: str
+    snippet: str
+    score: float
+
+
+class CatalogSearchResponse(BaseModel):
+    query: str
+    total: int
+    facets: Dict[str, int]
+    results: List[CatalogSearchHit]
+
+
 class LocationBase(BaseModel):
     name: str
     region: str
@@ -129,5 +209,47 @@ class LocationResponse(LocationBase):
         from_attributes = True
 
 
+class NearbyLocation(LocationResponse):
+    distance_km: float
+
+
+class NearbyHotel(HotelResponse):
+    distance_km: float
+
+
+class NearbyActivity(ActivityResponse):
+    distance_km: float
+
+
+class NearbyResponse(BaseModel):
+    locations: List[NearbyLocation]
+    hotels: List[NearbyHotel]
+    activities: List[NearbyActivity]
+
+
+class RouteLeg(BaseModel):
+    transfer_id: int
+    from_id: int
+    from_: Optional[str] = Field(None, alias="from")
+    to_id: int
+    to: Optional[str] = None
+    type: Optional[str] = None
+    duration: float
+    price: float
+
+
+class TransferRoute(BaseModel):
+    duration: float
+    price: float
+    legs: List[RouteLeg]
+
+
+class RouteResponse(BaseModel):
+    origin_id: int
+    destination_id: int
+    optimize: str
+    routes: List[TransferRoute]
+
+
 class ErrorResponse(BaseModel):
     detail: str
@@ -0,0 +1,125 @@
+from typing import Iterable, List, Optional
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from app.api.pagination import decode_cursor, encode_cursor
+from app.models.models import Itinerary, ItinerarySearch
+
+# Transfer types containing any of these words count as boat transfers
+BOAT_KEYWORDS = ("boat", "ferry")
+
+SEARCH_SORT_KEYS = {
+    "price": (ItinerarySearch.total_price, ItinerarySearch.itinerary_id),
+    "nights": (ItinerarySearch.nights, ItinerarySearch.total_price, ItinerarySearch.itinerary_id),
+}
+
+
+def facet(values: Iterable[Optional[str]]) -> str:
+    """Store a set of values as a sorted, delimited string like ",Beach,Nature," """
+    return "," + "".join(f"{value}," for value in sorted({v for v in values if v}))
+
+
+def split_facet(value: str) -> List[str]:
+    return [part for part in value.split(",") if part]
+
+
+def search_values(itinerary: Itinerary) -> dict:
+    """Flatten an itinerary (with its graph loaded) into itinerary_search columns"""
+    plans = itinerary.daily_plans
+    stars = [plan.hotel.star_rating for plan in plans if plan.hotel.star_rating is not None]
+    regions = {plan.hotel.location.region for plan in plans}
+    transfer_types = [plan.transfer.transfer_type for plan in plans if plan.transfer]
+    return dict(
+        name=itinerary.name,
+        nights=itinerary.nights,
+        total_price=itinerary.total_price or 0,
+        is_recommended=bool(itinerary.is_recommended),
+        regions=facet(regions),
+        region_count=len(regions),
+        min_star=min(stars, default=None),
+        max_star=max(stars, default=None),
+        activity_types=facet(a.activity_type for plan in plans for a in plan.activities),
+        transfer_types=facet(transfer_types),
+        has_boat_transfer=any(
+            keyword in (transfer_type or "").lower()
+            for transfer_type in transfer_types
+            for keyword in BOAT_KEYWORDS
+        ),
+    )
+
+
+def refresh_search_entries(db: Session, itineraries: List[Itinerary]):
+    """Upsert the search rows of itineraries whose graphs are already loaded"""
+    if not itineraries:
+        return
+    existing = {
+        entry.itinerary_id: entry
+        for entry in db.query(ItinerarySearch).filter(
+            ItinerarySearch.itinerary_id.in_([itinerary.id for itinerary in itineraries])
+        )
+    }
+    for itinerary in itineraries:
+        entry = existing.get(itinerary.id)
+        if entry is None:
+            entry = ItinerarySearch(itinerary_id=itinerary.id)
+            db.add(entry)
+        for column, value in search_values(itinerary).items():
+            setattr(entry, column, value)
+
+
+def search_itineraries(
+    db: Session,
+    *,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    nights: Optional[int] = None,
+    region: Optional[str] = None,
+    min_star: Optional[float] = None,
+    activity_types: Iterable[str] = (),
+    boat_transfer: Optional[bool] = None,
+    recommended_only: bool = False,
+    sort: str = "price",
+    cursor: Optional[str] = None,
+    limit: int = 10,
+):
+    """
+    Query itinerary_search with every filter applied to the one table.
+
+    Parameters:
+    - region: a region name for itineraries staying only there, or "both"
+      for itineraries spanning more than one region
+    - activity_types: itineraries must include every listed type
+
+    Returns:
+        (rows, next_cursor) where next_cursor is None on the last page
+    """
+    sort_key = SEARCH_SORT_KEYS[sort]
+    query = select(ItinerarySearch)
+    if min_price is not None:
+        query = query.where(ItinerarySearch.total_price >= min_price)
+    if max_price is not None:
+        query = query.where(ItinerarySearch.total_price <= max_price)
+    if nights is not None:
+        query = query.where(ItinerarySearch.nights == nights)
+    if region == "both":
+        query = query.where(ItinerarySearch.region_count > 1)
+    elif region:
+        query = query.where(ItinerarySearch.regions == facet([region]))
+    if min_star is not None:
+        query = query.where(ItinerarySearch.min_star >= min_star)
+    for activity_type in activity_types:
+        query = query.where(ItinerarySearch.activity_types.contains(f",{activity_type},", autoescape=True))
+    if boat_transfer is not None:
+        query = query.where(ItinerarySearch.has_boat_transfer == boat_transfer)
+    if recommended_only:
+        query = query.where(ItinerarySearch.is_recommended == True)
+    if cursor:
+        query = query.where(tuple_(*sort_key) > tuple_(*decode_cursor(cursor, len(sort_key))))
+
+    rows = db.scalars(query.order_by(*sort_key).limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column in sort_key])
+    return rows, next_cursor
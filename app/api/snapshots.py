@@ -0,0 +1,88 @@
+import threading
+import time
+import weakref
+from typing import Callable, Generic, Optional, Tuple, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config import CATALOG_SNAPSHOT_TTL
+
+T = TypeVar("T")
+
+
+class CatalogSnapshot(Generic[T]):
+    """
+    An in-memory structure built from the database, such as the transfer graph.
+
+    The snapshot is built on first use and dropped when a session commits a
+    change to one of the `watched` models, or after `ttl` seconds so writes
+    made by other processes are picked up too (CATALOG_SNAPSHOT_TTL by default).
+    """
+
+    _instances: "weakref.WeakSet[CatalogSnapshot]" = weakref.WeakSet()
+
+    def __init__(self, build: Callable[[Session], T], watched: Tuple[type, ...], ttl: float = CATALOG_SNAPSHOT_TTL):
+        self.build = build
+        self.watched = watched
+        self.ttl = ttl
+        self._value: Optional[T] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        # Incremented by every invalidation; snapshots built from reads that
+        # started before an invalidation are not kept
+        self.generation = 0
+        CatalogSnapshot._instances.add(self)
+
+    @property
+    def current(self) -> Optional[T]:
+        """The current snapshot, or None when it must be (re)built"""
+        with self._lock:
+            if self._value is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return self._value
+            return None
+
+    def load(self, db: Session) -> T:
+        """Return the current snapshot, building it with `db` if needed"""
+        value = self.current
+        if value is not None:
+            return value
+        generation = self.generation
+        value = self.build(db)
+        with self._lock:
+            if generation == self.generation:
+                self._value, self._loaded_at = value, time.monotonic()
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._value = None
+
+    @classmethod
+    def invalidate_watching(cls, changed: set):
+        for snapshot in list(cls._instances):
+            if changed.intersection(snapshot.watched):
+                snapshot.invalidate()
+
+
+_PENDING_KEY = "catalog_snapshot_changes"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    changed = session.info.setdefault(_PENDING_KEY, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        changed.add(type(obj))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_snapshots(session):
+    changed = session.info.pop(_PENDING_KEY, None)
+    if changed:
+        CatalogSnapshot.invalidate_watching(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -1,16 +1,151 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import AsyncIterator, Callable, TypeVar, Union
 
-from config import DATABASE_URL
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.concurrency import run_in_threadpool
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+from config import (
+    DATABASE_URL, ASYNC_DATABASE_URL, DATABASE_ASYNC,
+    DATABASE_READ_ROUTING, READ_DATABASE_URL, ASYNC_READ_DATABASE_URL,
+    SQLITE_PROFILE, SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS, SQLITE_MMAP_SIZE,
+    SQLITE_CACHE_SIZE, SQLITE_BUSY_TIMEOUT, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
 )
+
+
+def sqlite_pragmas():
+    """The pragmas the configured SQLITE_PROFILE applies to each new connection"""
+    if SQLITE_PROFILE == "default":
+        return []
+    if SQLITE_PROFILE != "performance":
+        raise ValueError(f"Unknown SQLITE_PROFILE {SQLITE_PROFILE!r}")
+    return [
+        # busy_timeout first so the journal mode switch waits out other writers
+        ("busy_timeout", SQLITE_BUSY_TIMEOUT),
+        ("journal_mode", SQLITE_JOURNAL_MODE),
+        ("synchronous", SQLITE_SYNCHRONOUS),
+        ("mmap_size", SQLITE_MMAP_SIZE),
+        ("cache_size", SQLITE_CACHE_SIZE),
+        ("temp_store", "MEMORY"),
+        ("foreign_keys", "ON"),
+    ]
+
+
+def _execute_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    _execute_pragmas(dbapi_connection, sqlite_pragmas())
+
+
+def _apply_read_only_pragmas(dbapi_connection, connection_record):
+    # The journal mode belongs to the writer; a read-only connection cannot change it
+    pragmas = [(name, value) for name, value in sqlite_pragmas() if name != "journal_mode"]
+    _execute_pragmas(dbapi_connection, pragmas + [("query_only", "ON")])
+
+
+def read_only_url(url: str) -> str:
+    """
+    The URL for read-only connections to the same database.
+    
+    File-backed SQLite is opened as a `mode=ro` URI; other URLs are unchanged.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or parsed.database in (None, "", ":memory:"):
+        return url
+    return parsed.set(
+        database=f"file:{parsed.database}",
+        query={**parsed.query, "mode": "ro", "uri": "true"},
+    ).render_as_string(hide_password=False)
+
+
+def engine_options(url: str) -> dict:
+    """
+    Pool and driver arguments for create_engine/create_async_engine.
+    
+    File-backed SQLite gets a queue pool sized for the threadpool; in-memory
+    databases keep SQLAlchemy's single-connection pool.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return {}
+    options = {}
+    if not parsed.get_driver_name().startswith("aiosqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+    if SQLITE_PROFILE != "default" and parsed.database not in (None, "", ":memory:"):
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    return options
+
+
+def configure_sqlite(sync_engine, read_only: bool = False):
+    """Apply the SQLite profile to every connection the engine opens"""
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(
+            sync_engine, "connect", _apply_read_only_pragmas if read_only else _apply_sqlite_pragmas
+        )
+    return sync_engine
+
+
+def create_read_engine(url: str):
+    """A separate engine and pool for read-only sessions on `url`"""
+    url = read_only_url(url)
+    return configure_sqlite(create_engine(url, **engine_options(url)), read_only=True)
+
+
+def create_async_read_engine(url: str):
+    url = read_only_url(url)
+    async_read = create_async_engine(url, **engine_options(url))
+    configure_sqlite(async_read.sync_engine, read_only=True)
+    return async_read
+
+
+engine = configure_sqlite(create_engine(DATABASE_URL, **engine_options(DATABASE_URL)))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The async engine is only created when async mode is enabled, so the sync
+# mode does not need an async driver such as aiosqlite installed
+async_engine = (
+    create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+    if DATABASE_ASYNC else None
+)
+if async_engine is not None:
+    configure_sqlite(async_engine.sync_engine)
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=True)
+    if DATABASE_ASYNC else None
+)
+
+# Read paths route to their own read-only engines, so readers never take the
+# write lock or wait for a pooled connection behind writers
+read_engine = create_read_engine(READ_DATABASE_URL) if DATABASE_READ_ROUTING else engine
+ReadSessionLocal = (
+    sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    if DATABASE_READ_ROUTING else SessionLocal
+)
+async_read_engine = (
+    create_async_read_engine(ASYNC_READ_DATABASE_URL)
+    if DATABASE_ASYNC and DATABASE_READ_ROUTING else async_engine
+)
+AsyncReadSessionLocal = (
+    async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=True)
+    if DATABASE_ASYNC and DATABASE_READ_ROUTING else AsyncSessionLocal
+)
+
 Base = declarative_base()
 
+DbSession = Union[Session, AsyncSession]
+T = TypeVar("T")
+
 
 def get_db():
     db = SessionLocal()
@@ -18,3 +153,63 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+# Request dependencies used by the API routes; DATABASE_ASYNC selects the mode.
+# get_read_session is for routes that never write.
+get_session = get_async_db if DATABASE_ASYNC else get_db
+get_read_session = get_async_read_db if DATABASE_ASYNC else get_read_db
+
+
+@asynccontextmanager
+async def session_scope(
+    sync_factory=None, async_factory=None, read_only: bool = False
+) -> AsyncIterator[DbSession]:
+    """
+    Open a session of the configured kind outside of a request.
+    
+    The factories default to SessionLocal/AsyncSessionLocal, or to the
+    read-only pair when `read_only` is set; callers bound to another database
+    pass their own pair.
+    """
+    if DATABASE_ASYNC:
+        default = AsyncReadSessionLocal if read_only else AsyncSessionLocal
+        async with (async_factory or default)() as db:
+            yield db
+    else:
+        db = (sync_factory or (ReadSessionLocal if read_only else SessionLocal))()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+
+
+async def run_db(db: DbSession, fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run synchronous ORM code against a session without blocking the event loop.
+    
+    `fn` receives a plain Session as its first argument. With an AsyncSession
+    it runs through run_sync, so its I/O goes through the async driver; with a
+    sync Session it runs in the threadpool.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(partial(fn, db, *args, **kwargs))
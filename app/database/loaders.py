@@ -0,0 +1,49 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.models.models import Itinerary, DailyPlan, Hotel
+
+
+def itinerary_graph_options():
+    """
+    Loader options that fetch a full itinerary graph in a fixed number of queries.
+
+    Daily plans and their activities are loaded with SELECT ... IN batches, while
+    the many-to-one hotel (with its location) and transfer rows are joined onto the
+    daily plan query. Whatever the number of itineraries in the page, this issues one
+    query for the itineraries, one for daily plans (with hotels and transfers) and
+    one for activities.
+    """
+    return [
+        selectinload(Itinerary.daily_plans).options(
+            joinedload(DailyPlan.hotel).joinedload(Hotel.location),
+            joinedload(DailyPlan.transfer),
+            selectinload(DailyPlan.activities),
+        )
+    ]
+
+
+def itinerary_summary_query(db: Session, *extra_columns):
+    """
+    Column-only itinerary query for listing screens.
+
+    Selects the summary columns plus a correlated COUNT of daily plans, so no ORM
+    entities or relationships are loaded. Extra itinerary columns (for example
+    Itinerary.description) can be appended by callers that need them.
+    """
+    plan_count = (
+        select(func.count(DailyPlan.id))
+        .where(DailyPlan.itinerary_id == Itinerary.id)
+        .correlate(Itinerary)
+        .scalar_subquery()
+        .label("num_daily_plans")
+    )
+    return db.query(
+        Itinerary.id,
+        Itinerary.name,
+        Itinerary.nights,
+        Itinerary.total_price,
+        Itinerary.is_recommended,
+        plan_count,
+        *extra_columns,
+    )
@@ -0,0 +1,58 @@
+import os
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+
+from app.models.models import SQLITE_INDEX_TABLES
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "alembic.ini")
+
+
+def alembic_config(url: Optional[str] = None) -> Config:
+    """Alembic configuration for DATABASE_URL, or for `url` when given"""
+    config = Config(ALEMBIC_INI)
+    if url:
+        config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+def include_name(name, type_, parent_names) -> bool:
+    """
+    Autogenerate filter: the SQLite virtual tables and their shadow tables are
+    created by raw DDL, not declared on the models.
+    """
+    return not (type_ == "table" and any(
+        name == table or name.startswith(f"{table}_") for table in SQLITE_INDEX_TABLES
+    ))
+
+
+def upgrade_database(url: Optional[str] = None, configure_logger: bool = True):
+    """
+    Bring the database schema up to date.
+    
+    Creates the full schema on an empty database and upgrades databases
+    created before migrations existed. Pass `configure_logger=False` inside a
+    running server so alembic.ini does not replace its logging setup.
+    """
+    config = alembic_config(url)
+    config.attributes["configure_logger"] = configure_logger
+    command.upgrade(config, "head")
+
+
+def prepare_database():
+    """
+    Upgrade DATABASE_URL and render the itinerary documents it lacks.
+    
+    Run by the API at startup, so a database from before the migrations (or
+    one upgraded without `python rebuild_documents.py`) is served as is.
+    """
+    from app.api.documents import rebuild_stale_documents
+    from app.database.db import SessionLocal
+
+    upgrade_database(configure_logger=False)
+    db = SessionLocal()
+    try:
+        return rebuild_stale_documents(db)
+    finally:
+        db.close()
@@ -1,14 +1,27 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 
 from app.api.routes import router
+from app.database.migrations import prepare_database
 from config import API_PREFIX
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Upgrade the schema and fill in missing itinerary documents before serving"""
+    await run_in_threadpool(prepare_database)
+    yield
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Thailand Travel Itinerary API",
     description="API for managing travel itineraries in Thailand",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -17,6 +30,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified", "X-Export-Watermark"],
 )
 
 app.include_router(router, prefix=API_PREFIX)
@@ -0,0 +1,181 @@
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.pagination import ITINERARY_SORT_KEY, encode_cursor, parse_cursor, seek_itineraries
+from app.database.loaders import itinerary_summary_query
+from app.models.models import Itinerary, Location
+from config import MAX_PAGE_SIZE, MCP_PAGE_SIZE, MCP_RESULT_MAX_BYTES
+
+# Description lengths tried for a row, longest first, until it fits the row's
+# share of the page's byte budget; None keeps the whole text and 0 leaves it out
+DESCRIPTION_STEPS = {
+    "full": (None, 240, 80, 0),
+    "brief": (240, 80, 0),
+    "minimal": (0,),
+}
+DETAIL_LEVELS = tuple(DESCRIPTION_STEPS)
+MIN_RESULT_BYTES = 256
+MAX_RESULT_BYTES = 1024 * 1024
+
+
+def page_arguments(limit: Optional[int], max_bytes: Optional[int], detail: str):
+    """
+    Clamp the list tools' paging arguments.
+
+    Returns:
+        (limit, max_bytes, error) where error is set for an unknown detail level
+    """
+    if detail not in DESCRIPTION_STEPS:
+        return None, None, f"detail must be one of {', '.join(DETAIL_LEVELS)}"
+    limit = max(1, min(limit or MCP_PAGE_SIZE, MAX_PAGE_SIZE))
+    max_bytes = max(MIN_RESULT_BYTES, min(max_bytes or MCP_RESULT_MAX_BYTES, MAX_RESULT_BYTES))
+    return limit, max_bytes, None
+
+
+def shorten(text: Optional[str], length: Optional[int]) -> Optional[str]:
+    """Cut text to at most `length` characters at a word boundary, marking the cut"""
+    if text is None or length is None or len(text) <= length:
+        return text
+    cut = text[:length - 1].rsplit(" ", 1)[0] or text[:length - 1]
+    return cut.rstrip(" ,.;:") + "…"
+
+
+def serialized_size(item: dict) -> int:
+    """Bytes the item adds to the JSON list of a tool result, separator included"""
+    return len(json.dumps(item, separators=(",", ":"), default=str).encode()) + 1
+
+
+def _variants(item: dict, detail: str):
+    """The item with its description cut to each step of the detail level, longest first"""
+    for length in DESCRIPTION_STEPS[detail]:
+        variant = dict(item)
+        if length == 0:
+            variant.pop("description", None)
+        else:
+            variant["description"] = shorten(item.get("description"), length)
+        yield variant, serialized_size(variant)
+
+
+def budgeted_page(
+    rows: List[Any],
+    to_item: Callable[[Any], dict],
+    cursor_of: Callable[[Any], list],
+    limit: int,
+    max_bytes: int,
+    detail: str,
+) -> Dict[str, Any]:
+    """
+    Fill a page from up to `limit` + 1 rows while keeping it within `max_bytes`.
+
+    The budget left is shared evenly by the rows still to place, and each row
+    keeps the longest description (see DESCRIPTION_STEPS) that fits its share,
+    so descriptions shrink progressively as the page fills while ids, names
+    and the other fields are always kept. The page ends early when a row does
+    not fit even without a description; the first row of a page always does.
+
+    Returns:
+        The items, the cursor to resume after the last one (None when the rows
+        are exhausted), their serialized size and how many were shortened
+    """
+    page_rows = rows[:limit]
+    items, used, shortened = [], 0, 0
+    more = len(rows) > limit
+    for position, row in enumerate(page_rows):
+        full = to_item(row)
+        variants = list(_variants(full, detail))
+        share = (max_bytes - used) // (len(page_rows) - position)
+        item, size = next(
+            ((variant, size) for variant, size in variants if size <= share), variants[-1]
+        )
+        if used + size > max_bytes and items:
+            more = True
+            break
+        if item.get("description") != full.get("description"):
+            shortened += 1
+        items.append(item)
+        used += size
+    return {
+        "items": items,
+        "next_cursor": encode_cursor(cursor_of(page_rows[len(items) - 1])) if more else None,
+        "bytes": used,
+        "shortened_descriptions": shortened,
+    }
+
+
+def _page_rows(db: Session, statement, limit: int) -> List[Any]:
+    """
+    Read one batch of `limit` + 1 rows from a yield_per stream.
+
+    The row past the page only shows whether another page follows; the rest
+    of the result is never fetched.
+    """
+    result = db.execute(statement.execution_options(yield_per=limit + 1))
+    try:
+        return result.fetchmany(limit + 1)
+    finally:
+        result.close()
+
+
+def find_itineraries_page(
+    db: Session,
+    nights: Optional[int] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    detail: str = "full",
+) -> Dict[str, Any]:
+    """One budgeted page of recommended itinerary summaries, in keyset order"""
+    limit, max_bytes, error = page_arguments(limit, max_bytes, detail)
+    if error:
+        return {"error": error}
+    values = parse_cursor(cursor, len(ITINERARY_SORT_KEY)) if cursor else None
+    if cursor and values is None:
+        return {"error": "Invalid pagination cursor"}
+
+    query = itinerary_summary_query(db, Itinerary.description).filter(Itinerary.is_recommended == True)
+    if nights is not None:
+        query = query.filter(Itinerary.nights == nights)
+    page = budgeted_page(
+        _page_rows(db, seek_itineraries(query, values).statement, limit),
+        lambda row: {
+            "id": row.id,
+            "name": row.name,
+            "nights": row.nights,
+            "total_price": float(row.total_price) if row.total_price is not None else None,
+            "num_daily_plans": row.num_daily_plans,
+            "description": row.description,
+        },
+        lambda row: [row.nights, row.total_price, row.id],
+        limit, max_bytes, detail,
+    )
+    return {"itineraries": page.pop("items"), **page}
+
+
+def locations_page(
+    db: Session,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    detail: str = "full",
+) -> Dict[str, Any]:
+    """One budgeted page of locations, in id order"""
+    limit, max_bytes, error = page_arguments(limit, max_bytes, detail)
+    if error:
+        return {"error": error}
+    values = parse_cursor(cursor, 1) if cursor else None
+    if cursor and values is None:
+        return {"error": "Invalid pagination cursor"}
+
+    statement = select(Location.id, Location.name, Location.region, Location.description).order_by(Location.id)
+    if values:
+        statement = statement.where(Location.id > values[0])
+    page = budgeted_page(
+        _page_rows(db, statement, limit),
+        lambda row: {"id": row.id, "name": row.name, "region": row.region, "description": row.description},
+        lambda row: [row.id],
+        limit, max_bytes, detail,
+    )
+    return {"locations": page.pop("items"), **page}
@@ -0,0 +1,182 @@
+import sys
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import anyio
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.database.db import run_db, session_scope
+from app.mcp.serializer import itinerary_details
+from app.models.models import Itinerary
+from config import MAX_NIGHTS, MIN_NIGHTS, RECOMMENDATION_INDEX_POLL_INTERVAL
+
+
+def recommended_itineraries_text(nights_int: int, itineraries: List[dict]) -> str:
+    """The recommended itineraries resource text for one night count, from the tool payloads"""
+    if not itineraries:
+        return f"No recommended itineraries found for {nights_int} nights."
+
+    # Format response
+    result = f"Found {len(itineraries)} recommended itineraries for {nights_int} nights:\n\n"
+
+    for idx, itinerary in enumerate(itineraries, 1):
+        result += f"Itinerary {idx}: {itinerary['name']}\n"
+        result += f"Description: {itinerary['description']}\n"
+        result += f"Total Price: ${itinerary['total_price']:.2f}\n"
+        result += f"Number of daily plans: {len(itinerary['daily_plans'])}\n\n"
+
+        for plan in itinerary["daily_plans"]:
+            hotel = plan["hotel"]
+            result += f"Day {plan['day']}:\n"
+            result += f"  Stay at {hotel['name']} ({hotel['star_rating']} stars) in {hotel['location']}\n"
+
+            transfer = plan.get("transfer")
+            if transfer:
+                result += f"  Transfer: {transfer['type']} from {transfer['origin']} to {transfer['destination']} ({transfer['duration']} hours)\n"
+
+            if plan["activities"]:
+                result += "  Activities:\n"
+                for activity in plan["activities"]:
+                    result += f"    - {activity['name']} ({activity['duration']} hours)\n"
+
+            if plan["notes"]:
+                result += f"  Notes: {plan['notes']}\n"
+
+            result += "\n"
+
+    return result
+
+
+def data_version(db: Session) -> Tuple:
+    """
+    Changes whenever a recommended itinerary is added, removed or changed.
+
+    Itinerary writes, including edits to the hotels, transfers and activities
+    they use, bump the itinerary's version and updated_at.
+    """
+    return tuple(db.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(Itinerary.id), 0),
+            func.coalesce(func.sum(Itinerary.version), 0),
+            func.max(Itinerary.updated_at),
+        ).where(Itinerary.is_recommended == True)
+    ).one())
+
+
+@dataclass
+class RecommendationSnapshot:
+    """Everything the recommendation tools and resource return, rendered ahead of time"""
+    data_version: Tuple
+    # Tool payload of every recommended itinerary, by id
+    payloads: Dict[int, dict] = field(default_factory=dict)
+    # Payload get_recommended_itinerary returns for each night count, fallback included
+    by_nights: Dict[int, dict] = field(default_factory=dict)
+    texts: Dict[int, str] = field(default_factory=dict)
+    durations: List[int] = field(default_factory=list)
+    built_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    build_ms: float = 0.0
+
+
+def build_recommendations(db: Session) -> RecommendationSnapshot:
+    """Render every recommended itinerary from the version query and one flat row query"""
+    started = time.perf_counter()
+    version = data_version(db)
+    snapshot = RecommendationSnapshot(data_version=version)
+    snapshot.payloads = itinerary_details(db, Itinerary.is_recommended == True)
+    itineraries = list(snapshot.payloads.values())
+    snapshot.durations = sorted({itinerary["nights"] for itinerary in itineraries})
+    # Without an exact match the first recommended itinerary of any length is returned
+    fallback = itineraries[0] if itineraries else None
+    for nights in range(MIN_NIGHTS, MAX_NIGHTS + 1):
+        matching = [itinerary for itinerary in itineraries if itinerary["nights"] == nights]
+        payload = matching[0] if matching else fallback
+        if payload is not None:
+            snapshot.by_nights[nights] = payload
+        snapshot.texts[nights] = recommended_itineraries_text(nights, matching)
+    snapshot.build_ms = round((time.perf_counter() - started) * 1000, 2)
+    return snapshot
+
+
+class RecommendationIndex:
+    """
+    Pre-rendered answers of the recommendation tools for MIN_NIGHTS..MAX_NIGHTS.
+
+    Built when the MCP server starts; a background task then compares the
+    itinerary data version every `poll_interval` seconds and rebuilds the
+    index when it changed. Lookups keep serving the previous snapshot while
+    a rebuild runs.
+    """
+
+    def __init__(self, poll_interval: float = RECOMMENDATION_INDEX_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self.snapshot: Optional[RecommendationSnapshot] = None
+        self.checked_at: Optional[datetime] = None
+        # Set while the data version differs from the snapshot's
+        self.stale = False
+
+    async def refresh(self, db) -> bool:
+        """
+        Rebuild the index when the data version changed since it was built.
+
+        Returns:
+            True when a new snapshot was built
+        """
+        version = await run_db(db, data_version)
+        self.checked_at = datetime.now(timezone.utc)
+        if self.snapshot is not None and version == self.snapshot.data_version:
+            self.stale = False
+            return False
+        self.stale = self.snapshot is not None
+        self.snapshot = await run_db(db, build_recommendations)
+        self.stale = False
+        return True
+
+    async def current(self) -> RecommendationSnapshot:
+        """The snapshot, built on first use when the lifespan did not build it"""
+        if self.snapshot is None:
+            async with session_scope(read_only=True) as db:
+                await self.refresh(db)
+        return self.snapshot
+
+    async def watch(self, db_slots: Optional[anyio.CapacityLimiter] = None):
+        """
+        Poll the data version and rebuild on change, until cancelled.
+        
+        Each poll holds a token of `db_slots`, when given, like a tool call.
+        """
+        while True:
+            await anyio.sleep(self.poll_interval)
+            try:
+                # Shutdown cancels the sleep, never a query half way through
+                with anyio.CancelScope(shield=True):
+                    async with db_slots or nullcontext():
+                        async with session_scope(read_only=True) as db:
+                            await self.refresh(db)
+            except Exception as e:
+                # Keep serving the last snapshot (reported as stale) and retry
+                print(f"Recommendation index refresh failed: {e}", file=sys.stderr)
+
+    def status(self) -> dict:
+        snapshot = self.snapshot
+        if snapshot is None:
+            return {"built": False}
+        now = datetime.now(timezone.utc)
+        return {
+            "built": True,
+            "built_at": snapshot.built_at.isoformat(),
+            "build_ms": snapshot.build_ms,
+            "age_seconds": round((now - snapshot.built_at).total_seconds(), 3),
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+            "stale": self.stale,
+            "itineraries": len(snapshot.payloads),
+            "durations": snapshot.durations,
+        }
+
+
+# Recommendation index of the application database, maintained by the MCP server lifespan
+recommendation_index = RecommendationIndex()
@@ -0,0 +1,173 @@
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, aliased
+
+from app.models.models import Activity, DailyPlan, Hotel, Itinerary, Location, Transfer, daily_plan_activity
+
+# Itinerary fields get_itineraries_details can be limited to; the id is always returned
+DETAIL_FIELDS = ("name", "description", "nights", "total_price", "daily_plans")
+MAX_BATCH_IDS = 50
+
+HotelLocation = aliased(Location)
+Origin = aliased(Location)
+Destination = aliased(Location)
+
+
+def itinerary_rows(*criteria):
+    """
+    One flat row per itinerary, day and activity, in itinerary, day and activity order.
+
+    Each row carries its day's hotel (with the hotel's location name) and
+    transfer (with origin and destination names), so a whole itinerary comes
+    back from this one query. `criteria` filter the itineraries.
+    """
+    return (
+        select(
+            Itinerary.id,
+            Itinerary.name,
+            Itinerary.description,
+            Itinerary.nights,
+            Itinerary.total_price,
+            DailyPlan.id.label("plan_id"),
+            DailyPlan.day_number,
+            DailyPlan.notes,
+            Hotel.name.label("hotel_name"),
+            Hotel.star_rating,
+            Hotel.price_per_night,
+            HotelLocation.name.label("hotel_location"),
+            Transfer.id.label("transfer_id"),
+            Transfer.transfer_type,
+            Transfer.duration.label("transfer_duration"),
+            Transfer.price.label("transfer_price"),
+            Origin.name.label("origin"),
+            Destination.name.label("destination"),
+            Activity.name.label("activity_name"),
+            Activity.duration.label("activity_duration"),
+            Activity.price.label("activity_price"),
+            Activity.activity_type,
+        )
+        .outerjoin(DailyPlan, DailyPlan.itinerary_id == Itinerary.id)
+        .outerjoin(Hotel, Hotel.id == DailyPlan.hotel_id)
+        .outerjoin(HotelLocation, HotelLocation.id == Hotel.location_id)
+        .outerjoin(Transfer, Transfer.id == DailyPlan.transfer_id)
+        .outerjoin(Origin, Origin.id == Transfer.origin_id)
+        .outerjoin(Destination, Destination.id == Transfer.destination_id)
+        .outerjoin(daily_plan_activity, daily_plan_activity.c.daily_plan_id == DailyPlan.id)
+        .outerjoin(Activity, Activity.id == daily_plan_activity.c.activity_id)
+        .where(*criteria)
+        .order_by(Itinerary.id, DailyPlan.day_number, DailyPlan.id, Activity.id)
+    )
+
+
+def fold_itinerary_rows(rows, prices: bool = False) -> Dict[int, dict]:
+    """
+    Fold ordered itinerary_rows into the tools' itinerary dicts, in one pass.
+
+    With `prices` the hotel, activities and transfer also carry their price.
+    """
+    itineraries: Dict[int, dict] = {}
+    itinerary = plan = None
+    for row in rows:
+        if itinerary is None or row.id != itinerary["id"]:
+            itinerary = itineraries[row.id] = {
+                "id": row.id,
+                "name": row.name,
+                "description": row.description,
+                "nights": row.nights,
+                "total_price": row.total_price,
+                "daily_plans": [],
+            }
+            plan = None
+        if row.plan_id is None:
+            continue
+        if plan is None or row.plan_id != plan_id:
+            plan_id = row.plan_id
+            plan = {
+                "day": row.day_number,
+                "hotel": {
+                    "name": row.hotel_name,
+                    "star_rating": row.star_rating,
+                    "location": row.hotel_location,
+                },
+                "activities": [],
+                "notes": row.notes,
+            }
+            if prices:
+                plan["hotel"]["price_per_night"] = row.price_per_night
+            if row.transfer_id is not None:
+                plan["transfer"] = {
+                    "type": row.transfer_type,
+                    "origin": row.origin,
+                    "destination": row.destination,
+                    "duration": row.transfer_duration,
+                }
+                if prices:
+                    plan["transfer"]["price"] = row.transfer_price
+            itinerary["daily_plans"].append(plan)
+        if row.activity_name is not None:
+            activity = {
+                "name": row.activity_name,
+                "duration": row.activity_duration,
+                "type": row.activity_type,
+            }
+            if prices:
+                activity["price"] = row.activity_price
+            plan["activities"].append(activity)
+    return itineraries
+
+
+def itinerary_details(db: Session, *criteria, prices: bool = False) -> Dict[int, dict]:
+    """The matching itineraries with their daily plans, by id, from a single query"""
+    return fold_itinerary_rows(db.execute(itinerary_rows(*criteria)), prices)
+
+
+def itinerary_detail(db: Session, itinerary_id: int, prices: bool = False) -> Optional[dict]:
+    """One itinerary with its daily plans, or None when it does not exist"""
+    return itinerary_details(db, Itinerary.id == itinerary_id, prices=prices).get(itinerary_id)
+
+
+def itinerary_comparison(itinerary: dict) -> dict:
+    """One compact side-by-side row: prices, hotel stars and activity counts"""
+    plans = itinerary["daily_plans"]
+    stars = [plan["hotel"]["star_rating"] for plan in plans if plan["hotel"]["star_rating"] is not None]
+    nights = itinerary["nights"]
+    return {
+        "id": itinerary["id"],
+        "name": itinerary["name"],
+        "nights": nights,
+        "total_price": itinerary["total_price"],
+        "price_per_night": round(itinerary["total_price"] / nights, 2) if itinerary["total_price"] and nights else None,
+        "avg_star_rating": round(sum(stars) / len(stars), 2) if stars else None,
+        "activities": sum(len(plan["activities"]) for plan in plans),
+        "transfers": sum(1 for plan in plans if "transfer" in plan),
+    }
+
+
+def batch_itinerary_details(db: Session, ids: Sequence[int], fields: Optional[List[str]] = None) -> dict:
+    """
+    Several itineraries at once from the single flat row query, plus a comparison.
+
+    Returns:
+        "itineraries" keyed by id (limited to `fields` when given), the ids
+        not found, and a "comparison" row per itinerary in the requested order
+    """
+    ids = list(dict.fromkeys(ids))
+    if not 1 <= len(ids) <= MAX_BATCH_IDS:
+        return {"error": f"ids must list between 1 and {MAX_BATCH_IDS} itineraries, got {len(ids)}"}
+    unknown = [name for name in fields or () if name not in DETAIL_FIELDS]
+    if unknown:
+        return {"error": f"Unknown fields {', '.join(unknown)}; choose from {', '.join(DETAIL_FIELDS)}"}
+
+    details = itinerary_details(db, Itinerary.id.in_(ids), prices=True)
+    found = [details[itinerary_id] for itinerary_id in ids if itinerary_id in details]
+    comparison = [itinerary_comparison(itinerary) for itinerary in found]
+    if fields:
+        found = [{"id": itinerary["id"], **{name: itinerary[name] for name in fields}} for itinerary in found]
+    priced = [row for row in comparison if row["total_price"] is not None]
+    return {
+        "itineraries": {itinerary["id"]: itinerary for itinerary in found},
+        "missing": [itinerary_id for itinerary_id in ids if itinerary_id not in details],
+        "comparison": comparison,
+        "cheapest": min(priced, key=lambda row: row["total_price"])["id"] if priced else None,
+    }
@@ -1,23 +1,50 @@
 from contextlib import asynccontextmanager
+from functools import partial
 from collections.abc import AsyncIterator
 from typing import List, Dict, Any, Optional
-from sqlalchemy.orm import Session
+import anyio
 
 from mcp.server.fastmcp import FastMCP, Context
 
-from app.database.db import SessionLocal
+from app.database.db import session_scope, run_db
+from app.api.fulltext import CATALOG_ENTITY_TYPES, full_text_search
+from app.api.nearby import nearby_catalog, nearby_summary
+from app.api.routing import route_summary, transfer_graph
+from app.api.generator import generated_summary, generator_catalog
+from app.api.ranking import PACE_HOURS, Preferences, change_marker, recommendation_ranker
+from app.mcp.recommendations import recommendation_index
+from app.mcp.serializer import itinerary_details
 from app.models.models import Itinerary
-from config import MCP_SERVER_NAME
+from config import MCP_DB_THREADS, MCP_SERVER_NAME
+
+# Tool calls holding a database connection at once. In sync mode each runs its
+# queries on a threadpool worker, in async mode on its aiosqlite connection thread.
+db_slots = anyio.CapacityLimiter(MCP_DB_THREADS)
+# One ranking matrix reload at a time; concurrent calls wait for it instead of repeating it
+ranker_refresh_lock = anyio.Lock()
+# Best matches get_recommended_itinerary ranks, so it can fall back to the next
+# one when a better match was deleted or unrecommended since the last refresh
+RECOMMENDATION_CANDIDATES = 5
+
+
+async def read_db(fn, *args):
+    """Run `fn` on a read-only session of its own, closed when the call ends"""
+    async with db_slots:
+        async with session_scope(read_only=True) as db:
+            return await run_db(db, fn, *args)
 
 
 @asynccontextmanager
 async def app_lifespan(server: FastMCP) -> AsyncIterator[Dict[str, Any]]:
-    """Initialize database connection for MCP server"""
-    db = SessionLocal()
-    try:
-        yield {"db": db}
-    finally:
-        db.close()
+    """Warm the recommendation index and keep it up to date while the server runs"""
+    # Tool calls open their own sessions; a shared one would grow its identity
+    # map without bound and serve rows as they were at startup
+    async with session_scope(read_only=True) as db:
+        await recommendation_index.refresh(db)
+    async with anyio.create_task_group() as tasks:
+        tasks.start_soon(recommendation_index.watch, db_slots)
+        yield {}
+        tasks.cancel_scope.cancel()
 
 
 # Create MCP server
@@ -29,101 +56,238 @@ mcp = FastMCP(
 
 
 @mcp.tool()
-def get_recommended_itinerary(nights: int, ctx: Context) -> dict:
+async def get_recommended_itinerary(
+    nights: int,
+    ctx: Context,
+    budget: Optional[float] = None,
+    interests: Optional[List[str]] = None,
+    pace: Optional[str] = None,
+) -> dict:
     """
     Get a recommended itinerary for the specified number of nights.
     
     Args:
         nights: Number of nights for the trip (2-8)
+        budget: Optional total budget; itineraries over it rank lower
+        interests: Optional activity interests, e.g. ["beach", "culture"]
+        pace: Optional "relaxed", "balanced" or "packed"
     
     Returns:
-        A recommended itinerary with daily plans.
+        A recommended itinerary with daily plans, the best match for the
+        preferences when any are given.
     """
     if nights < 2 or nights > 8:
         return {"error": f"Nights must be between 2 and 8, got {nights}"}
+    if pace is not None and pace not in PACE_HOURS:
+        return {"error": f"pace must be one of {', '.join(PACE_HOURS)}"}
+    if budget is not None and budget <= 0:
+        return {"error": "budget must be positive"}
     
-    db: Session = ctx.request_context.lifespan_context["db"]
-    
-    # Find recommended itinerary with exact match for nights
-    itinerary = db.query(Itinerary).filter(
-        Itinerary.nights == nights,
-        Itinerary.is_recommended == True
-    ).first()
-    
-    if not itinerary:
-        # If no exact match, try to find any recommended itinerary
-        itinerary = db.query(Itinerary).filter(
-            Itinerary.is_recommended == True
-        ).first()
-    
-    if not itinerary:
-        return {"error": "No recommended itineraries found"}
-    
-    # Format response
-    result = {
-        "id": itinerary.id,
-        "name": itinerary.name,
-        "description": itinerary.description,
-        "nights": itinerary.nights,
-        "total_price": itinerary.total_price,
-        "daily_plans": []
-    }
+    recommendations = await recommendation_index.current()
+    if budget is None and not interests and pace is None:
+        return recommendations.by_nights.get(nights) or {"error": "No recommended itineraries found"}
     
-    # Add daily plans with details
-    for plan in sorted(itinerary.daily_plans, key=lambda x: x.day_number):
-        daily_plan = {
-            "day": plan.day_number,
-            "hotel": {
-                "name": plan.hotel.name,
-                "star_rating": plan.hotel.star_rating,
-                "location": plan.hotel.location.name
-            },
-            "activities": [],
-            "notes": plan.notes
-        }
-        
-        # Add activities
-        for activity in plan.activities:
-            daily_plan["activities"].append({
-                "name": activity.name,
-                "duration": activity.duration,
-                "type": activity.activity_type
-            })
-        
-        # Add transfer if exists
-        if plan.transfer:
-            daily_plan["transfer"] = {
-                "type": plan.transfer.transfer_type,
-                "origin": plan.transfer.origin.name,
-                "destination": plan.transfer.destination.name,
-                "duration": plan.transfer.duration
-            }
-        
-        result["daily_plans"].append(daily_plan)
-    
-    return result
+    preferences = Preferences(budget=budget, interests=tuple(interests or ()), pace=pace)
+    # Fall back to the best match of any length
+    ranked = (
+        await _rank_recommended(preferences, nights, RECOMMENDATION_CANDIDATES)
+        or await _rank_recommended(preferences, None, RECOMMENDATION_CANDIDATES)
+    )
+    payloads = {i: recommendations.payloads[i] for i, _ in ranked if i in recommendations.payloads}
+    missing = [i for i, _ in ranked if i not in payloads]
+    if missing:
+        # Ranked from newer rows than the index has rendered yet
+        payloads.update(await read_db(_recommended_details, missing))
+    for itinerary_id, score in ranked:
+        if itinerary_id in payloads:
+            return {**payloads[itinerary_id], "score": score}
+    return {"error": "No recommended itineraries found"}
+
+
+def _recommended_details(db, itinerary_ids: List[int]) -> Dict[int, dict]:
+    """Those of the itineraries still recommended, by id"""
+    return itinerary_details(db, Itinerary.id.in_(itinerary_ids), Itinerary.is_recommended == True)
+
+
+async def _rank_recommended(preferences: Preferences, nights: Optional[int], k: int):
+    """Top-k (itinerary id, score) pairs, refreshing the ranking matrix first when it is behind the database"""
+    marker = await read_db(change_marker)
+    if not recommendation_ranker.is_current(marker):
+        async with ranker_refresh_lock:
+            if not recommendation_ranker.is_current(marker):
+                await read_db(recommendation_ranker.refresh)
+    return recommendation_ranker.rank(preferences, nights, k)
 
 
 @mcp.tool()
-def list_available_durations(ctx: Context) -> List[int]:
+async def list_available_durations(ctx: Context) -> List[int]:
     """
     List all available durations (nights) for recommended itineraries.
     
     Returns:
         A list of available night durations for recommended itineraries.
     """
-    db: Session = ctx.request_context.lifespan_context["db"]
+    recommendations = await recommendation_index.current()
+    return list(recommendations.durations)
+
+
+@mcp.tool()
+async def rank_recommended_itineraries(
+    ctx: Context,
+    budget: Optional[float] = None,
+    interests: Optional[List[str]] = None,
+    pace: Optional[str] = None,
+    regions: Optional[List[str]] = None,
+    nights: Optional[int] = None,
+    k: int = 5,
+) -> Dict:
+    """
+    Rank the recommended itineraries against the traveller's preferences.
     
-    # Query distinct night values for recommended itineraries
-    nights = db.query(Itinerary.nights).filter(
-        Itinerary.is_recommended == True
-    ).distinct().all()
+    Args:
+        budget: Total budget; itineraries over it rank lower
+        interests: Activity interests, e.g. ["water", "culture"]
+        pace: "relaxed", "balanced" or "packed" days
+        regions: Preferred regions, e.g. ["Krabi"]
+        nights: Only itineraries of this many nights
+        k: Number of itineraries to return (1-50)
     
-    return [n[0] for n in nights]
+    Returns:
+        The best matches first with id, name, nights, total price and score
+    """
+    if pace is not None and pace not in PACE_HOURS:
+        return {"error": f"pace must be one of {', '.join(PACE_HOURS)}"}
+    if budget is not None and budget <= 0:
+        return {"error": "budget must be positive"}
+    preferences = Preferences(
+        budget=budget, interests=tuple(interests or ()), pace=pace, regions=tuple(regions or ())
+    )
+    k = max(1, min(k, 50))
+    
+    ranked = await _rank_recommended(preferences, nights, k)
+    scores = dict(ranked)
+    rows = await read_db(lambda db: db.query(
+        Itinerary.id, Itinerary.name, Itinerary.nights, Itinerary.total_price
+    ).filter(Itinerary.id.in_(list(scores))).all())
+    
+    by_id = {row.id: row for row in rows}
+    return {
+        "itineraries": [
+            {
+                "id": itinerary_id,
+                "name": by_id[itinerary_id].name,
+                "nights": by_id[itinerary_id].nights,
+                "total_price": by_id[itinerary_id].total_price,
+                "score": score,
+            }
+            for itinerary_id, score in ranked
+            if itinerary_id in by_id
+        ]
+    }
+
+
+@mcp.tool()
+async def search_catalog(
+    query: str, entity_type: Optional[str] = None, limit: int = 10
+) -> Dict:
+    """
+    Full-text search over locations, hotels and activities, e.g.
+    "snorkeling near Phi Phi" or "pool spa".
+    
+    Args:
+        query: Free text to match against names, descriptions, hotel amenities,
+            activity types and location names
+        entity_type: Optional "location", "hotel" or "activity" to restrict results
+        limit: Maximum number of results (1-50)
+    
+    Returns:
+        BM25-ranked results with highlighted snippets, plus match counts per entity type
+    """
+    if entity_type is not None and entity_type not in CATALOG_ENTITY_TYPES:
+        return {"error": f"entity_type must be one of {', '.join(CATALOG_ENTITY_TYPES)}"}
+    limit = max(1, min(limit, 50))
+    result = await read_db(full_text_search, query, entity_type, limit)
+    return result or {"error": "Search query must contain at least one word"}
+
+
+@mcp.tool()
+async def find_nearby(
+    latitude: float, longitude: float, radius_km: float = 25.0, k: int = 5
+) -> Dict:
+    """
+    Find the locations, hotels and activities nearest to a point.
+    
+    Args:
+        latitude: Latitude of the point in degrees
+        longitude: Longitude of the point in degrees
+        radius_km: Search radius in kilometres (up to 1000)
+        k: Maximum number of results of each type (1-50)
+    
+    Returns:
+        Locations, hotels and activities with their distance in km, nearest first
+    """
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return {"error": "latitude must be within -90..90 and longitude within -180..180"}
+    if not 0 < radius_km <= 1000:
+        return {"error": f"radius_km must be between 0 and 1000, got {radius_km}"}
+    k = max(1, min(k, 50))
+    return await read_db(lambda db: nearby_summary(nearby_catalog(db, latitude, longitude, radius_km, k)))
+
+
+@mcp.tool()
+async def find_transfer_route(
+    from_location_id: int, to_location_id: int, optimize: str = "fastest"
+) -> Dict:
+    """
+    Plan transfers between two locations, over several legs if needed.
+    
+    Args:
+        from_location_id: ID of the starting location
+        to_location_id: ID of the destination location
+        optimize: "fastest", "cheapest" or "pareto" (every route not beaten on
+            both duration and price)
+    
+    Returns:
+        Routes with their legs, total duration (hours) and total price
+    """
+    graph = transfer_graph.current
+    if graph is None:
+        graph = await read_db(transfer_graph.load)
+    return route_summary(graph, from_location_id, to_location_id, optimize)
+
+
+@mcp.tool()
+async def generate_custom_itinerary(
+    nights: int,
+    budget: Optional[float] = None,
+    regions: Optional[List[str]] = None,
+    interests: Optional[List[str]] = None,
+    max_hours_per_day: float = 10.0,
+) -> Dict:
+    """
+    Build a new itinerary from constraints rather than a stored recommendation.
+    
+    Args:
+        nights: Number of nights (1-30)
+        budget: Optional maximum total price
+        regions: Optional regions to stay in, e.g. ["Phuket"] or ["Krabi"]
+        interests: Optional activity interests, e.g. ["water", "culture"]
+        max_hours_per_day: Limit on each day's transfer and activity hours
+    
+    Returns:
+        Daily hotel, transfer and activities with the total price, or an error
+        when nothing fits the constraints
+    """
+    catalog = generator_catalog.current
+    if catalog is None:
+        catalog = await read_db(generator_catalog.load)
+    return await anyio.to_thread.run_sync(partial(
+        generated_summary, catalog, nights, budget, regions or (), interests or (), max_hours_per_day
+    ))
 
 
 @mcp.resource("itineraries://recommended/{nights}")
-def get_recommended_itinerary_resource(nights: str) -> str:
+async def get_recommended_itinerary_resource(nights: str) -> str:
     """
     Get details about recommended itineraries for the specified number of nights.
     
@@ -141,47 +305,20 @@ def get_recommended_itinerary_resource(nights: str) -> str:
     if nights_int < 2 or nights_int > 8:
         return f"No recommended itineraries available for {nights_int} nights. Please choose between 2-8 nights."
     
-    # Get the database session from a singleton or global instance
-    db = SessionLocal()
-    try:
-        # Find recommended itineraries with the specified number of nights
-        itineraries = db.query(Itinerary).filter(
-            Itinerary.nights == nights_int,
-            Itinerary.is_recommended == True
-        ).all()
-        
-        if not itineraries:
-            return f"No recommended itineraries found for {nights_int} nights."
-        
-        # Format response
-        result = f"Found {len(itineraries)} recommended itineraries for {nights_int} nights:\n\n"
-        
-        for idx, itinerary in enumerate(itineraries, 1):
-            result += f"Itinerary {idx}: {itinerary.name}\n"
-            result += f"Description: {itinerary.description}\n"
-            result += f"Total Price: ${itinerary.total_price:.2f}\n"
-            result += f"Number of daily plans: {len(itinerary.daily_plans)}\n\n"
-            
-            for plan in sorted(itinerary.daily_plans, key=lambda x: x.day_number):
-                result += f"Day {plan.day_number}:\n"
-                result += f"  Stay at {plan.hotel.name} ({plan.hotel.star_rating} stars) in {plan.hotel.location.name}\n"
-                
-                if plan.transfer:
-                    result += f"  Transfer: {plan.transfer.transfer_type} from {plan.transfer.origin.name} to {plan.transfer.destination.name} ({plan.transfer.duration} hours)\n"
-                
-                if plan.activities:
-                    result += "  Activities:\n"
-                    for activity in plan.activities:
-                        result += f"    - {activity.name} ({activity.duration} hours)\n"
-                
-                if plan.notes:
-                    result += f"  Notes: {plan.notes}\n"
-                
-                result += "\n"
-        
-        return result
-    finally:
-        db.close()
+    recommendations = await recommendation_index.current()
+    return recommendations.texts[nights_int]
+
+
+@mcp.resource("status://recommendation-index")
+async def get_recommendation_index_status() -> Dict:
+    """
+    Build time and staleness of the pre-rendered recommendation index.
+    
+    Returns:
+        When the index was built and how long it took, its age in seconds,
+        when the data version was last checked and whether a rebuild is pending
+    """
+    return recommendation_index.status()
 
 
 @mcp.prompt()
@@ -1,15 +1,25 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text, Table, Boolean
-from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
+
+from sqlalchemy import (
+    Column, Integer, String, Float, ForeignKey, Text, Table, Boolean, Index, DateTime, LargeBinary, event, text
+)
+from sqlalchemy.orm import relationship, Session
 from sqlalchemy.ext.declarative import declarative_base
 
 from app.database.db import Base
 
+def utcnow():
+    """Naive UTC timestamp, matching how SQLite stores DateTime columns"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 # Association table for many-to-many relationship between DailyPlan and Activity
 daily_plan_activity = Table(
     "daily_plan_activity",
     Base.metadata,
-    Column("daily_plan_id", Integer, ForeignKey("daily_plans.id")),
-    Column("activity_id", Integer, ForeignKey("activities.id")),
+    # The composite primary key rules out duplicate links and serves lookups by plan
+    Column("daily_plan_id", Integer, ForeignKey("daily_plans.id"), primary_key=True),
+    Column("activity_id", Integer, ForeignKey("activities.id"), primary_key=True, index=True),
 )
 
 
@@ -18,7 +28,7 @@ class Location(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
-    region = Column(String(100), nullable=False)  # e.g., Phuket, Krabi
+    region = Column(String(100), nullable=False, index=True)  # e.g., Phuket, Krabi
     description = Column(Text)
     latitude = Column(Float)
     longitude = Column(Float)
@@ -40,7 +50,7 @@ class Hotel(Base):
     name = Column(String(100), nullable=False)
     description = Column(Text)
     star_rating = Column(Float)
-    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False, index=True)
     address = Column(String(200))
     price_per_night = Column(Float)
     amenities = Column(Text)  # Comma-separated list of amenities
@@ -59,7 +69,7 @@ class Activity(Base):
     description = Column(Text)
     duration = Column(Float)  # in hours
     price = Column(Float)
-    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False, index=True)
     image_url = Column(String(255))
     activity_type = Column(String(50))  # e.g., "Excursion", "Tour", "Beach Activity"
 
@@ -70,10 +80,13 @@ class Activity(Base):
 
 class Transfer(Base):
     __tablename__ = "transfers"
+    __table_args__ = (
+        Index("ix_transfers_route", "origin_id", "destination_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     origin_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
-    destination_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
+    destination_id = Column(Integer, ForeignKey("locations.id"), nullable=False, index=True)
     transfer_type = Column(String(50))  # e.g., "Car", "Boat", "Flight"
     duration = Column(Float)  # in hours
     price = Column(Float)
@@ -87,6 +100,12 @@ class Transfer(Base):
 
 class Itinerary(Base):
     __tablename__ = "itineraries"
+    __table_args__ = (
+        # Matches the keyset pagination order of GET /itineraries/
+        Index("ix_itineraries_keyset", "nights", "total_price", "id"),
+        # Recommended lookups by nights (MCP tools) and recommended_only list pages
+        Index("ix_itineraries_recommended", "is_recommended", "nights", "total_price", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
@@ -94,19 +113,32 @@ class Itinerary(Base):
     nights = Column(Integer, nullable=False)
     total_price = Column(Float)
     is_recommended = Column(Boolean, default=False)  # Flag for recommended itineraries
+    version = Column(Integer, nullable=False, default=1)  # Bumped whenever the itinerary or its daily plans change
+    updated_at = Column(DateTime, nullable=False, default=lambda: utcnow(), index=True)
     
     # Relationships
-    daily_plans = relationship("DailyPlan", back_populates="itinerary", cascade="all, delete-orphan")
+    daily_plans = relationship(
+        "DailyPlan",
+        back_populates="itinerary",
+        cascade="all, delete-orphan",
+        order_by="DailyPlan.day_number",
+    )
+    document = relationship("ItineraryDocument", uselist=False, cascade="all, delete-orphan")
+    search_entry = relationship("ItinerarySearch", uselist=False, cascade="all, delete-orphan")
 
 
 class DailyPlan(Base):
     __tablename__ = "daily_plans"
+    __table_args__ = (
+        # Daily plans of an itinerary in day order, and the per-itinerary plan count
+        Index("ix_daily_plans_itinerary_day", "itinerary_id", "day_number"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     day_number = Column(Integer, nullable=False)  # Day 1, Day 2, etc.
     itinerary_id = Column(Integer, ForeignKey("itineraries.id"), nullable=False)
-    hotel_id = Column(Integer, ForeignKey("hotels.id"), nullable=False)
-    transfer_id = Column(Integer, ForeignKey("transfers.id"), nullable=True)  # Optional transfer
+    hotel_id = Column(Integer, ForeignKey("hotels.id"), nullable=False, index=True)
+    transfer_id = Column(Integer, ForeignKey("transfers.id"), nullable=True, index=True)  # Optional transfer
     notes = Column(Text)
 
     # Relationships
@@ -114,3 +146,207 @@ class DailyPlan(Base):
     hotel = relationship("Hotel", back_populates="daily_plans")
     activities = relationship("Activity", secondary=daily_plan_activity, back_populates="daily_plans")
     transfer = relationship("Transfer", back_populates="daily_plans")
+
+
+class ItineraryDocument(Base):
+    """Pre-rendered ItineraryResponse JSON, rebuilt whenever its itinerary changes"""
+    __tablename__ = "itinerary_documents"
+
+    itinerary_id = Column(Integer, ForeignKey("itineraries.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, nullable=False)  # Itinerary.version the body was rendered from
+    body = Column(LargeBinary, nullable=False)
+    built_at = Column(DateTime, nullable=False, default=lambda: utcnow())
+
+
+class ItinerarySearch(Base):
+    """
+    One flat row per itinerary with the facets /itineraries/search filters on.
+    
+    Set-valued facets are stored as delimited strings such as ",Beach,Nature,"
+    so a membership test is a single LIKE on the row. Rebuilt together with the
+    itinerary's document.
+    """
+    __tablename__ = "itinerary_search"
+    __table_args__ = (
+        # Keyset orders of the two search sorts
+        Index("ix_itinerary_search_price", "total_price", "itinerary_id"),
+        Index("ix_itinerary_search_nights", "nights", "total_price", "itinerary_id"),
+    )
+
+    itinerary_id = Column(Integer, ForeignKey("itineraries.id", ondelete="CASCADE"), primary_key=True)
+    name = Column(String(100), nullable=False)
+    nights = Column(Integer, nullable=False)
+    total_price = Column(Float, nullable=False)
+    is_recommended = Column(Boolean, nullable=False, default=False)
+    regions = Column(String(200), nullable=False)  # e.g. ",Krabi,Phuket,"
+    region_count = Column(Integer, nullable=False)
+    min_star = Column(Float)
+    max_star = Column(Float)
+    activity_types = Column(Text, nullable=False)  # e.g. ",Beach,Water Sport,"
+    transfer_types = Column(Text, nullable=False)  # e.g. ",Car,Speedboat,"
+    has_boat_transfer = Column(Boolean, nullable=False, default=False)
+
+
+# Full-text index over the catalog (SQLite FTS5). It is not an ORM table: the
+# rows are maintained by triggers, so every writer (ORM, bulk SQL, the seed)
+# keeps it in sync. Rowids encode the entity as id * 3 + CATALOG_FTS_CODES[type].
+CATALOG_FTS_TABLE = "catalog_fts"
+CATALOG_FTS_CODES = {"location": 0, "hotel": 1, "activity": 2}
+
+_CATALOG_FTS_ROWS = {
+    "location": """
+        SELECT l.id * 3, 'location', l.name, coalesce(l.description, ''), '', l.region
+        FROM locations l""",
+    "hotel": """
+        SELECT h.id * 3 + 1, 'hotel', h.name, coalesce(h.description, ''),
+               coalesce(h.amenities, ''), l.name || ' ' || l.region
+        FROM hotels h JOIN locations l ON l.id = h.location_id""",
+    "activity": """
+        SELECT a.id * 3 + 2, 'activity', a.name, coalesce(a.description, ''),
+               coalesce(a.activity_type, ''), l.name || ' ' || l.region
+        FROM activities a JOIN locations l ON l.id = a.location_id""",
+}
+_CATALOG_FTS_INSERT = "INSERT INTO catalog_fts (rowid, entity_type, name, description, details, place)"
+
+CATALOG_FTS_DDL = [
+    # Columns in bm25() weight order; the entity type is stored but not tokenised
+    """CREATE VIRTUAL TABLE IF NOT EXISTS catalog_fts USING fts5(
+        entity_type UNINDEXED, name, description, details, place,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )""",
+    # Default ranking for ORDER BY rank: names count most, then descriptions
+    "INSERT INTO catalog_fts (catalog_fts, rank) VALUES ('rank', 'bm25(0.0, 10.0, 4.0, 2.0, 1.0)')",
+    f"""CREATE TRIGGER IF NOT EXISTS catalog_fts_location_insert AFTER INSERT ON locations BEGIN
+        {_CATALOG_FTS_INSERT} {_CATALOG_FTS_ROWS["location"]} WHERE l.id = new.id;
+    END""",
+    # Hotels and activities carry their location's name and region, so reindex them too
+    f"""CREATE TRIGGER IF NOT EXISTS catalog_fts_location_update
+        AFTER UPDATE OF id, name, description, region ON locations BEGIN
+        DELETE FROM catalog_fts WHERE rowid = old.id * 3;
+        DELETE FROM catalog_fts WHERE rowid IN (SELECT id * 3 + 1 FROM hotels WHERE location_id = new.id);
+        DELETE FROM catalog_fts WHERE rowid IN (SELECT id * 3 + 2 FROM activities WHERE location_id = new.id);
+        {_CATALOG_FTS_INSERT} {_CATALOG_FTS_ROWS["location"]} WHERE l.id = new.id;
+        {_CATALOG_FTS_INSERT} {_CATALOG_FTS_ROWS["hotel"]} WHERE h.location_id = new.id;
+        {_CATALOG_FTS_INSERT} {_CATALOG_FTS_ROWS["activity"]} WHERE a.location_id = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS catalog_fts_location_delete AFTER DELETE ON locations BEGIN
+        DELETE FROM catalog_fts WHERE rowid = old.id * 3;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS catalog_fts_hotel_insert AFTER INSERT ON hotels BEGIN
+        {_CATALOG_FTS_INSERT} {_CATALOG_FTS_ROWS["hotel"]} WHERE h.id = new.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS catalog_fts_hotel_update
+        AFTER UPDATE OF id, name, description, amenities, location_id ON hotels BEGIN
+        DELETE FROM catalog_fts WHERE rowid = old.id * 3 + 1;
+        {_CATALOG_FTS_INSERT} {_CATALOG_FTS_ROWS["hotel"]} WHERE h.id = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS catalog_fts_hotel_delete AFTER DELETE ON hotels BEGIN
+        DELETE FROM catalog_fts WHERE rowid = old.id * 3 + 1;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS catalog_fts_activity_insert AFTER INSERT ON activities BEGIN
+        {_CATALOG_FTS_INSERT} {_CATALOG_FTS_ROWS["activity"]} WHERE a.id = new.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS catalog_fts_activity_update
+        AFTER UPDATE OF id, name, description, activity_type, location_id ON activities BEGIN
+        DELETE FROM catalog_fts WHERE rowid = old.id * 3 + 2;
+        {_CATALOG_FTS_INSERT} {_CATALOG_FTS_ROWS["activity"]} WHERE a.id = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS catalog_fts_activity_delete AFTER DELETE ON activities BEGIN
+        DELETE FROM catalog_fts WHERE rowid = old.id * 3 + 2;
+    END""",
+]
+
+# Refill the index from the catalog tables, e.g. after creating it on a populated database
+CATALOG_FTS_REBUILD = ["DELETE FROM catalog_fts"] + [
+    f"{_CATALOG_FTS_INSERT} {rows}" for rows in _CATALOG_FTS_ROWS.values()
+]
+
+
+def rebuild_catalog_fts(connection):
+    """Recreate every catalog_fts row on a Connection or Session"""
+    for statement in CATALOG_FTS_REBUILD:
+        connection.execute(text(statement))
+
+
+# Spatial index over location coordinates (SQLite R*Tree), one point-sized box
+# per location with coordinates, keyed by location id and kept in sync by triggers.
+# R*Tree stores 32-bit floats rounded outwards, so box queries need a distance check.
+LOCATION_RTREE_TABLE = "location_rtree"
+
+_LOCATION_RTREE_ROWS = """
+    SELECT id, latitude, latitude, longitude, longitude FROM locations
+    WHERE latitude IS NOT NULL AND longitude IS NOT NULL"""
+
+LOCATION_RTREE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS location_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+    f"""CREATE TRIGGER IF NOT EXISTS location_rtree_insert AFTER INSERT ON locations BEGIN
+        INSERT INTO location_rtree {_LOCATION_RTREE_ROWS} AND id = new.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS location_rtree_update
+        AFTER UPDATE OF id, latitude, longitude ON locations BEGIN
+        DELETE FROM location_rtree WHERE id = old.id;
+        INSERT INTO location_rtree {_LOCATION_RTREE_ROWS} AND id = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS location_rtree_delete AFTER DELETE ON locations BEGIN
+        DELETE FROM location_rtree WHERE id = old.id;
+    END""",
+]
+
+LOCATION_RTREE_REBUILD = ["DELETE FROM location_rtree", f"INSERT INTO location_rtree {_LOCATION_RTREE_ROWS}"]
+
+# Virtual tables created with raw DDL rather than declared on Base.metadata
+SQLITE_INDEX_TABLES = (CATALOG_FTS_TABLE, LOCATION_RTREE_TABLE)
+
+
+def rebuild_location_rtree(connection):
+    """Recreate every location_rtree row on a Connection or Session"""
+    for statement in LOCATION_RTREE_REBUILD:
+        connection.execute(text(statement))
+
+
+@event.listens_for(Base.metadata, "after_create")
+def create_sqlite_indexes(target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in CATALOG_FTS_DDL + LOCATION_RTREE_DDL:
+        connection.exec_driver_sql(statement)
+    rebuild_catalog_fts(connection)
+    rebuild_location_rtree(connection)
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def drop_sqlite_indexes(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        for table_name in SQLITE_INDEX_TABLES:
+            connection.exec_driver_sql(f"DROP TABLE IF EXISTS {table_name}")
+
+
+def touch_itinerary(itinerary):
+    """Mark an itinerary as changed by bumping its version and updated_at"""
+    itinerary.version = Itinerary.version + 1
+    itinerary.updated_at = utcnow()
+
+
+@event.listens_for(Session, "before_flush")
+def bump_itinerary_versions(session, flush_context, instances):
+    """Bump version/updated_at on itineraries whose own columns or daily plans changed"""
+    touched = set()
+    for obj in list(session.dirty) + list(session.new) + list(session.deleted):
+        if isinstance(obj, Itinerary):
+            if obj not in session.new and session.is_modified(obj):
+                touched.add(obj)
+        elif isinstance(obj, DailyPlan):
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            itinerary = obj.itinerary
+            if itinerary is None and obj.itinerary_id is not None:
+                itinerary = session.get(Itinerary, obj.itinerary_id)
+            if (
+                itinerary is not None
+                and itinerary not in session.new
+                and itinerary not in session.deleted
+            ):
+                touched.add(itinerary)
+
+    for itinerary in touched:
+        touch_itinerary(itinerary)
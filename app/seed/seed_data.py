@@ -1,6 +1,7 @@
-import random
 from sqlalchemy.orm import Session
 
+from app.api.generator import GeneratorCatalog, generate_itinerary
+from app.api.pricing import reprice_itineraries
 from app.models.models import (
     Location, Hotel, Activity, Transfer, Itinerary, DailyPlan
 )
@@ -517,29 +518,9 @@ def create_itineraries(db: Session, hotels, activities, transfers):
     # Create daily plans for Phuket and Krabi Adventure (7 nights)
     create_combined_plans(db, combined_7n.id, activities)
     
-    # Calculate total prices for all itineraries
-    for itinerary in itineraries:
-        total_price = 0
-        
-        # Ensure we have all the daily plans loaded
-        db.refresh(itinerary)
-        
-        for plan in itinerary.daily_plans:
-            # Add hotel cost
-            hotel = db.query(Hotel).filter(Hotel.id == plan.hotel_id).first()
-            total_price += hotel.price_per_night
-            
-            # Add transfer cost if any
-            if plan.transfer_id:
-                transfer = db.query(Transfer).filter(Transfer.id == plan.transfer_id).first()
-                total_price += transfer.price
-            
-            # Add activities cost
-            for activity in plan.activities:
-                total_price += activity.price
-        
-        # Update the itinerary with the calculated total price
-        itinerary.total_price = round(total_price, 2)
+    # Totals for all itineraries in one aggregate UPDATE
+    db.flush()
+    reprice_itineraries(db, [itinerary.id for itinerary in itineraries])
     
     db.commit()
     return itineraries
@@ -733,10 +714,17 @@ def create_combined_plans(db, itinerary_id, activities):
     db.commit()
 
 
-def create_additional_itinerary(db: Session, nights: int, hotels, activities, transfers):
+def create_additional_itinerary(db: Session, nights: int, catalog: GeneratorCatalog, activities):
     """Create an additional itinerary for a specific number of nights if missing"""
     
     region = "Phuket" if nights < 4 else "Krabi" if nights > 6 else "Phuket and Krabi"
+    regions = [] if region == "Phuket and Krabi" else [region]
+    
+    # Best-scoring feasible plan over the in-memory catalog; the generous time
+    # budget keeps the seed deterministic
+    plan = generate_itinerary(catalog, nights, regions=regions, time_budget_ms=5000)
+    if plan is None:
+        raise ValueError(f"No feasible {nights}-night itinerary in {region}")
     
     itinerary = Itinerary(
         name=f"{nights}-Night {region} Adventure",
@@ -749,64 +737,21 @@ def create_additional_itinerary(db: Session, nights: int, hotels, activities, tr
     db.add(itinerary)
     db.flush()
     
-    if region == "Phuket":
-        hotel_ids = [1, 2, 3, 4]  # Phuket hotels
-    elif region == "Krabi":
-        hotel_ids = [6, 7, 8, 9]  # Krabi hotels
-    else:
-        hotel_ids = [1, 2, 3, 4, 6, 7, 8, 9]  # All hotels
-    
-    total_price = 0
-    
-    for day in range(1, nights + 1):
-        hotel_id = random.choice(hotel_ids)
-        hotel = db.query(Hotel).filter(Hotel.id == hotel_id).first()
-        
-        transfer_id = None
-        if day == 1:
-            if hotel.location.region == "Phuket":
-                transfer_id = 1  # Phuket Town to Patong
-            else:
-                transfer_id = 10  # Krabi Town to Ao Nang
-        elif random.random() < 0.3:
-            possible_transfers = db.query(Transfer).all()
-            if possible_transfers:
-                transfer = random.choice(possible_transfers)
-                transfer_id = transfer.id
-        
-        # Create the daily plan
-        plan = DailyPlan(
-            day_number=day,
+    activities_by_id = {activity.id: activity for activity in activities}
+    for day in plan.days:
+        plan_row = DailyPlan(
+            day_number=day.day_number,
             itinerary_id=itinerary.id,
-            hotel_id=hotel_id,
-            transfer_id=transfer_id,
-            notes=f"Day {day} of your {nights}-night adventure"
+            hotel_id=day.hotel_id,
+            transfer_id=day.transfer_id,
+            notes=f"Day {day.day_number} of your {nights}-night adventure"
         )
-        db.add(plan)
-        db.flush()
-        
-        total_price += hotel.price_per_night
-        
-        if transfer_id:
-            transfer = db.query(Transfer).filter(Transfer.id == transfer_id).first()
-            total_price += transfer.price
-        
-        location_id = hotel.location_id
-        possible_activities = db.query(Activity).filter(
-            Activity.location_id == location_id
-        ).all()
-        
-        if possible_activities:
-            # Select 1-2 activities
-            num_activities = random.randint(1, min(2, len(possible_activities)))
-            selected_activities = random.sample(possible_activities, num_activities)
-            
-            for activity in selected_activities:
-                plan.activities.append(activity)
-                total_price += activity.price
-    
-    # Update the total price
-    itinerary.total_price = round(total_price, 2)
+        plan_row.activities = [activities_by_id[activity_id] for activity_id in day.activity_ids]
+        db.add(plan_row)
+    
+    # Total from the catalog prices in one aggregate UPDATE
+    db.flush()
+    reprice_itineraries(db, [itinerary.id])
     db.commit()
     
     return itinerary
@@ -838,24 +783,28 @@ def seed_database(db: Session):
     
     # Create itineraries for each night duration if not already present
     existing_nights = {i.nights for i in itineraries}
+    catalog = GeneratorCatalog.load(db)
     
     for nights in range(MIN_NIGHTS, MAX_NIGHTS + 1):
         if nights not in existing_nights:
             print(f"Creating additional {nights}-night itinerary...")
-            create_additional_itinerary(db, nights, hotels, activities, transfers)
+            create_additional_itinerary(db, nights, catalog, activities)
 
 
 def main():
     """Main function to seed the database"""
-    from app.database.db import SessionLocal, engine
-    from app.models.models import Base
+    from app.database.db import SessionLocal
+    from app.database.migrations import upgrade_database
 
     print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    upgrade_database()
     
+    from app.api.documents import rebuild_all_documents
+
     db = SessionLocal()
     try:
         seed_database(db)
+        print(f"Rendered {rebuild_all_documents(db)} itinerary documents")
         print("Database seeding completed successfully!")
     except Exception as e:
         print(f"Error seeding database: {e}")
@@ -0,0 +1,134 @@
+"""
+Benchmark read latency under parallel load for each database mode.
+
+Each mode runs in its own process because DATABASE_ASYNC is read at import
+time. The response cache is disabled so every request reaches the database.
+Modes:
+    blocking  sync Session called directly on the event loop (the behaviour
+              before the async layer; every query stalls all other requests)
+    sync      DATABASE_ASYNC=false, sync Session offloaded to the threadpool
+    async     DATABASE_ASYNC=true, AsyncSession over aiosqlite
+
+--stall simulates slower storage: SQLite sleeps that many milliseconds every
+1000 VM steps, in whichever thread runs the query. Run with:
+    python benchmark_concurrency.py [--concurrency 10] [--rounds 10] [--stall 0]
+
+The blocking mode holds pooled connections until the dependency teardown,
+which cannot run while the loop is blocked, so keep --concurrency below
+DB_POOL_SIZE + DB_MAX_OVERFLOW or it stalls on pool checkout.
+
+The modes do not differ reliably on this dataset. At the defaults one run
+gave p99 42 ms blocking, 38 ms sync and 40 ms async; with --stall 0 it gave
+34 ms, 45 ms and 51 ms, and other runs have put async p99 well above
+blocking. Offloading keeps the event loop free for other work but adds
+per-request overhead, so it does not by itself lower tail latency here.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+MODES = ("blocking", "sync", "async")
+
+
+def install_stall(stall_ms):
+    """Make every query sleep stall_ms per 1000 SQLite VM steps"""
+    from sqlalchemy import event
+
+    from app.database.db import async_engine, engine
+
+    def handler():
+        time.sleep(stall_ms / 1000)
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.set_progress_handler(handler, 1000)
+
+    if async_engine is not None:
+        @event.listens_for(async_engine.sync_engine, "connect")
+        def on_async_connect(dbapi_connection, connection_record):
+            dbapi_connection.run_async(lambda conn: conn.set_progress_handler(handler, 1000))
+
+
+def run_mode(mode, concurrency, rounds, stall_ms):
+    import asyncio
+
+    import benchmark_utils  # noqa: F401  (must come first, sets DATABASE_URL)
+    from benchmark_utils import describe, seed_benchmark_database
+
+    import httpx
+
+    seed_benchmark_database()
+    if stall_ms:
+        install_stall(stall_ms)
+    from app.api import routes
+    from app.main import app
+
+    if mode == "blocking":
+        async def run_inline(db, fn, *args, **kwargs):
+            return fn(db, *args, **kwargs)
+
+        routes.run_db = run_inline
+
+    paths = [
+        "/api/v1/itineraries/?limit=50",
+        "/api/v1/itineraries/?view=summary&limit=100",
+        "/api/v1/itineraries/1",
+        "/api/v1/itineraries/5",
+    ]
+
+    async def timed(client, path):
+        start = time.perf_counter()
+        response = await client.get(path)
+        response.raise_for_status()
+        return (time.perf_counter() - start) * 1000
+
+    async def main():
+        latencies = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await timed(client, paths[0])  # warm up connections and imports
+            start = time.perf_counter()
+            for _ in range(rounds):
+                latencies += await asyncio.gather(
+                    *(timed(client, paths[i % len(paths)]) for i in range(concurrency))
+                )
+            elapsed = time.perf_counter() - start
+        print(f"{mode:<9} {len(latencies) / elapsed:8.1f} req/s  {describe(latencies)}")
+
+    asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--stall", type=float, default=1.0)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.concurrency, args.rounds, args.stall)
+        return
+
+    print(f"{args.concurrency} concurrent requests x {args.rounds} rounds, stall {args.stall} ms")
+    for mode in MODES:
+        env = dict(
+            os.environ,
+            DATABASE_ASYNC="true" if mode == "async" else "false",
+            RESPONSE_CACHE_SIZE="0",
+        )
+        env.pop("DATABASE_URL", None)
+        env.pop("ASYNC_DATABASE_URL", None)
+        subprocess.run(
+            [sys.executable, __file__, "--mode", mode,
+             "--concurrency", str(args.concurrency), "--rounds", str(args.rounds),
+             "--stall", str(args.stall)],
+            env=env,
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark POST /api/v1/itineraries/ against the previous per-day creation path.
+
+The previous implementation flushed after every daily plan and re-queried the
+hotel, transfer and activities of each plan, so its statement count grew with
+the number of days. Run with:
+    python benchmark_create_itinerary.py
+"""
+import benchmark_utils  # noqa: F401  (must come first, sets DATABASE_URL)
+from benchmark_utils import StatementCounter, app_engine, describe, seed_benchmark_database, time_calls
+
+from fastapi.testclient import TestClient
+
+from app.api.schemas import ItineraryCreate
+from app.database.db import engine, SessionLocal
+from app.models.models import Activity, DailyPlan, Hotel, Itinerary, Transfer
+
+DAYS = (1, 3, 7, 14, 30)
+REPEAT = 20
+
+
+def payload(days):
+    return {
+        "name": f"{days}-day benchmark",
+        "description": "Benchmark itinerary",
+        "nights": days,
+        "daily_plans": [
+            {
+                "day_number": day,
+                "hotel_id": 1 + day % 4,
+                "transfer_id": 1 if day == 1 else None,
+                "activity_ids": [1 + day % 5, 6],
+            }
+            for day in range(1, days + 1)
+        ],
+    }
+
+
+def legacy_create(itinerary: ItineraryCreate):
+    """The creation path before the set-based rewrite, kept for comparison"""
+    db = SessionLocal()
+    try:
+        total_price = 0
+        db_itinerary = Itinerary(
+            name=itinerary.name,
+            description=itinerary.description,
+            nights=itinerary.nights,
+            total_price=0,
+        )
+        db.add(db_itinerary)
+        db.flush()
+        for plan_data in itinerary.daily_plans:
+            plan = DailyPlan(
+                day_number=plan_data.day_number,
+                itinerary_id=db_itinerary.id,
+                hotel_id=plan_data.hotel_id,
+                transfer_id=plan_data.transfer_id,
+                notes=plan_data.notes,
+            )
+            db.add(plan)
+            db.flush()
+            if plan_data.activity_ids:
+                plan.activities = db.query(Activity).filter(Activity.id.in_(plan_data.activity_ids)).all()
+            total_price += db.query(Hotel).filter(Hotel.id == plan.hotel_id).first().price_per_night
+            if plan.transfer_id:
+                total_price += db.query(Transfer).filter(Transfer.id == plan.transfer_id).first().price
+            for activity in plan.activities:
+                total_price += activity.price
+        db_itinerary.total_price = total_price
+        db.commit()
+    finally:
+        db.close()
+
+
+def main():
+    seed_benchmark_database()
+    from app.main import app
+
+    client = TestClient(app)
+    print(f"{'days':>4}  {'path':<8} {'statements':>10}  latency")
+    for days in DAYS:
+        body = payload(days)
+        with StatementCounter(app_engine()) as counter:
+            client.post("/api/v1/itineraries/", json=body)
+        latencies = time_calls(lambda: client.post("/api/v1/itineraries/", json=body), REPEAT)
+        print(f"{days:>4}  {'current':<8} {counter.count:>10}  {describe(latencies)}")
+
+        itinerary = ItineraryCreate(**body)
+        with StatementCounter(engine) as counter:
+            legacy_create(itinerary)
+        latencies = time_calls(lambda: legacy_create(itinerary), REPEAT)
+        print(f"{days:>4}  {'legacy':<8} {counter.count:>10}  {describe(latencies)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark the MCP itinerary details serializer against the relationship walk it replaced.
+
+Seeds a throwaway database, then serializes every itinerary in a fresh
+session both ways: walking the ORM relationships with lazy loads (the
+previous get_itinerary_details) and folding the single flat row query of
+app.mcp.serializer. Reports the SQL statements per itinerary and the
+latencies. Run with:
+    python benchmark_itinerary_details.py [--repeat 20]
+"""
+import argparse
+
+from benchmark_utils import StatementCounter, describe, seed_benchmark_database, time_calls
+
+
+def walk_itinerary(db, itinerary_id):
+    """The previous serializer: lazy loads for plans, hotels, locations, transfers and activities"""
+    from app.models.models import Itinerary
+
+    itinerary = db.query(Itinerary).filter(Itinerary.id == itinerary_id).first()
+    result = {
+        "id": itinerary.id,
+        "name": itinerary.name,
+        "description": itinerary.description,
+        "nights": itinerary.nights,
+        "total_price": float(itinerary.total_price),
+        "daily_plans": [],
+    }
+    for plan in sorted(itinerary.daily_plans, key=lambda x: x.day_number):
+        daily_plan = {
+            "day": plan.day_number,
+            "notes": plan.notes,
+            "hotel": {
+                "name": plan.hotel.name,
+                "location": plan.hotel.location.name,
+                "star_rating": plan.hotel.star_rating,
+                "price_per_night": float(plan.hotel.price_per_night),
+            },
+            "activities": [
+                {"name": a.name, "duration": a.duration, "price": float(a.price), "type": a.activity_type}
+                for a in plan.activities
+            ],
+        }
+        if plan.transfer:
+            daily_plan["transfer"] = {
+                "type": plan.transfer.transfer_type,
+                "origin": plan.transfer.origin.name,
+                "destination": plan.transfer.destination.name,
+                "duration": plan.transfer.duration,
+                "price": float(plan.transfer.price),
+            }
+        result["daily_plans"].append(daily_plan)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    seed_benchmark_database()
+    from app.database.db import SessionLocal, engine
+    from app.mcp.serializer import itinerary_detail
+    from app.models.models import Itinerary
+
+    with SessionLocal() as db:
+        itineraries = db.query(Itinerary.id, Itinerary.nights).order_by(Itinerary.id).all()
+    print(f"{len(itineraries)} itineraries of {min(n for _, n in itineraries)}-{max(n for _, n in itineraries)} nights")
+
+    for label, serialize in (
+        ("relationship walk", walk_itinerary),
+        ("flat row query", lambda db, itinerary_id: itinerary_detail(db, itinerary_id, prices=True)),
+    ):
+        statements = {}
+        for itinerary_id, nights in itineraries:
+            with SessionLocal() as db, StatementCounter(engine) as counter:
+                serialize(db, itinerary_id)
+            statements.setdefault(nights, set()).add(counter.count)
+
+        def serialize_all():
+            for itinerary_id, _ in itineraries:
+                with SessionLocal() as db:
+                    serialize(db, itinerary_id)
+
+        latencies = time_calls(serialize_all, args.repeat)
+        per_itinerary = [latency / len(itineraries) for latency in latencies]
+        counts = ", ".join(
+            f"{nights}n: {'/'.join(map(str, sorted(counts)))}" for nights, counts in sorted(statements.items())
+        )
+        print(f"{label:<18} per itinerary {describe(per_itinerary)}")
+        print(f"{'':<18} statements by nights  {counts}")
+
+
+if __name__ == "__main__":
+    main()
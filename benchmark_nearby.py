@@ -0,0 +1,86 @@
+"""
+Benchmark nearby-location lookups through the R*Tree index against a full scan.
+
+The catalog is grown with synthetic points of interest spread over southern
+Thailand, then random points are searched with both the indexed query
+(bounding box on location_rtree plus a haversine check) and a brute-force scan
+that computes the distance to every location. Run with:
+    python benchmark_nearby.py [--points 50000] [--radius-km 10] [--queries 200]
+"""
+import argparse
+import random
+
+import benchmark_utils  # noqa: F401  (must come first, sets DATABASE_URL)
+from benchmark_utils import describe, seed_benchmark_database, time_calls
+
+from sqlalchemy import insert, select
+
+from app.api.nearby import haversine_km, nearby_locations
+from app.database.db import SessionLocal, engine
+from app.models.models import Location
+
+# Roughly the Andaman coast from Ranong to Satun
+LAT_RANGE = (6.5, 10.0)
+LON_RANGE = (97.8, 100.0)
+
+
+def add_points(count, rng):
+    rows = [
+        {
+            "name": f"Point of interest {n}",
+            "region": "Synthetic",
+            "latitude": rng.uniform(*LAT_RANGE),
+            "longitude": rng.uniform(*LON_RANGE),
+        }
+        for n in range(count)
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(Location), rows)
+
+
+def brute_force(db, lat, lon, radius_km):
+    found = []
+    for location_id, latitude, longitude in db.execute(
+        select(Location.id, Location.latitude, Location.longitude).where(Location.latitude.isnot(None))
+    ):
+        distance = haversine_km(lat, lon, latitude, longitude)
+        if distance <= radius_km:
+            found.append((distance, location_id))
+    return [location_id for distance, location_id in sorted(found)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--points", type=int, default=50000)
+    parser.add_argument("--radius-km", type=float, default=10.0)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(17)
+    seed_benchmark_database()
+    add_points(args.points, rng)
+    points = [(rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)) for _ in range(args.queries)]
+
+    db = SessionLocal()
+    try:
+        # Both strategies must agree before their timings mean anything
+        for lat, lon in points[:20]:
+            indexed = [location.id for location, _ in nearby_locations(db, lat, lon, args.radius_km)]
+            assert indexed == brute_force(db, lat, lon, args.radius_km), (lat, lon)
+            db.expunge_all()
+
+        def run(search):
+            lat, lon = next(queries)
+            search(db, lat, lon, args.radius_km)
+            db.expunge_all()
+
+        print(f"{args.points} points, radius {args.radius_km} km, {args.queries} queries")
+        for label, search in (("rtree", nearby_locations), ("full scan", brute_force)):
+            queries = iter(points)
+            print(f"{label:<10} {describe(time_calls(lambda: run(search), args.queries))}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark preference ranking over a large synthetic set of recommended itineraries.
+
+Loads feature rows for many itineraries into a RecommendationRanker, then
+times top-k queries over every itinerary and over one night count, and the
+incremental update of a batch of changed rows. Run with:
+    python benchmark_ranking.py [--itineraries 100000] [--queries 500] [--k 5]
+"""
+import argparse
+import random
+import time
+
+from benchmark_utils import describe, time_calls
+
+from app.api.ranking import PACE_HOURS, Preferences, RecommendationRanker
+
+ACTIVITY_TYPES = [
+    "Beach", "Water Sport", "Cultural Tour", "Boat Tour", "Food & Culture",
+    "Nightlife", "Sightseeing", "Adventure", "Nature", "Wildlife",
+]
+
+
+def synthetic_row(itinerary_id, rng):
+    """A feature row as returned by feature_rows"""
+    nights = rng.randint(2, 8)
+    krabi = rng.randint(0, nights)
+    return (
+        itinerary_id, nights, rng.uniform(200, 5000), rng.uniform(2, 5), rng.uniform(0, 12), rng.uniform(0, 40),
+        {name: rng.randint(1, 3) for name in rng.sample(ACTIVITY_TYPES, 3)},
+        {name: n for name, n in (("Krabi", krabi), ("Phuket", nights - krabi)) if n},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--itineraries", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(20)
+    rows = [synthetic_row(n, rng) for n in range(1, args.itineraries + 1)]
+    ranker = RecommendationRanker()
+    start = time.perf_counter()
+    ranker._apply(rows, ())
+    print(f"{args.itineraries} itineraries loaded in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    preferences = [
+        Preferences(
+            budget=rng.choice([None, 1000.0, 2500.0]),
+            interests=tuple(rng.sample(["beach", "water", "culture", "nature"], 2)),
+            pace=rng.choice(list(PACE_HOURS)),
+            regions=("Krabi",),
+        )
+        for _ in range(args.queries)
+    ]
+    for label, nights in (("all nights", None), ("one length", 4)):
+        queries = iter(preferences)
+        latencies = time_calls(lambda: ranker.rank(next(queries), nights, args.k), args.queries)
+        print(f"{label:<11} {describe(latencies)}")
+
+    changed = [synthetic_row(rng.randint(1, args.itineraries), rng) for _ in range(100)]
+    latencies = time_calls(lambda: ranker._apply(changed, ()), 20)
+    print(f"update 100  {describe(latencies)}")
+
+
+if __name__ == "__main__":
+    main()
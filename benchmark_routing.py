@@ -0,0 +1,54 @@
+"""
+Benchmark transfer route queries on a large synthetic transfer graph.
+
+Builds a TransferGraph with thousands of locations and transfer edges, then
+times cold queries (Dijkstra or the Pareto search on a fresh graph) and warm
+queries answered from the per-graph memo. Run with:
+    python benchmark_routing.py [--locations 2000] [--edges 10000] [--queries 500]
+"""
+import argparse
+import random
+
+from benchmark_utils import describe, time_calls
+
+from app.api.routing import OPTIMIZE_MODES, TransferEdge, TransferGraph
+
+
+def synthetic_graph(locations, edges, rng):
+    """A connected ring of locations plus random shortcuts"""
+    transfers = [
+        TransferEdge(n, n, n % locations + 1, "Car", rng.uniform(0.2, 3), rng.uniform(5, 80))
+        for n in range(1, locations + 1)
+    ]
+    for n in range(locations + 1, edges + 1):
+        origin, destination = rng.sample(range(1, locations + 1), 2)
+        transfers.append(TransferEdge(n, origin, destination, "Boat", rng.uniform(0.2, 6), rng.uniform(5, 150)))
+    return transfers, {n: f"Location {n}" for n in range(1, locations + 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--locations", type=int, default=2000)
+    parser.add_argument("--edges", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(18)
+    edges, names = synthetic_graph(args.locations, args.edges, rng)
+    pairs = [tuple(rng.sample(range(1, args.locations + 1), 2)) for _ in range(args.queries)]
+
+    print(f"{args.locations} locations, {args.edges} transfers, {args.queries} queries")
+    for optimize in OPTIMIZE_MODES:
+        graph = TransferGraph(edges, names, cache_size=args.queries)
+        # Pareto fronts are far costlier than one shortest path; sample fewer
+        repeat = args.queries if optimize != "pareto" else max(1, args.queries // 20)
+        queries = iter(pairs)
+        cold = time_calls(lambda: graph.routes(*next(queries), optimize), repeat)
+        queries = iter(pairs)
+        warm = time_calls(lambda: graph.routes(*next(queries), optimize), repeat)
+        print(f"{optimize:<9} cold {describe(cold)}")
+        print(f"{optimize:<9} warm {describe(warm)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark a mixed read/write load with and without the SQLite engine profile.
+
+Reader threads page through the itinerary list (summary query plus stored
+documents) while writer threads create itineraries and reprice a hotel, which
+rebuilds the documents of every itinerary using it. Each profile runs in its
+own process because SQLITE_PROFILE is read at import time. Run with:
+    python benchmark_sqlite_profile.py [--readers 8] [--writers 2] [--seconds 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+PROFILES = ("default", "performance")
+
+
+def run_profile(profile, readers, writers, seconds):
+    import benchmark_utils  # noqa: F401  (must come first, sets DATABASE_URL)
+    from benchmark_utils import describe, seed_benchmark_database
+
+    from app.api.bulk import commit_itineraries, fetch_reference_maps
+    from app.api.documents import load_documents
+    from app.api.schemas import ItineraryCreate
+    from app.database.db import SessionLocal
+    from app.database.loaders import itinerary_summary_query
+    from app.models.models import Hotel, Itinerary
+
+    seed_benchmark_database()
+    item = ItineraryCreate(
+        name="Mixed load",
+        description="Benchmark itinerary",
+        nights=3,
+        daily_plans=[
+            {"day_number": day, "hotel_id": 1 + day % 4, "activity_ids": [1 + day % 5]}
+            for day in range(1, 4)
+        ],
+    )
+    deadline = time.perf_counter() + seconds
+    results = {"read": [], "write": [], "errors": []}
+    lock = threading.Lock()
+
+    def read_once(db):
+        rows = itinerary_summary_query(db, Itinerary.version).order_by(Itinerary.id).limit(50).all()
+        load_documents(db, rows)
+
+    def write_once(db, n):
+        if n % 5 == 4:
+            hotel = db.get(Hotel, 1 + n % 4)
+            hotel.price_per_night = float(hotel.price_per_night) + 1
+            db.commit()
+        else:
+            commit_itineraries(db, [item], fetch_reference_maps(db, item.daily_plans))
+
+    def worker(kind):
+        n = 0
+        while time.perf_counter() < deadline:
+            db = SessionLocal()
+            start = time.perf_counter()
+            try:
+                if kind == "read":
+                    read_once(db)
+                else:
+                    write_once(db, n)
+            except Exception as exc:
+                db.rollback()
+                with lock:
+                    results["errors"].append(type(exc).__name__)
+            else:
+                with lock:
+                    results[kind].append((time.perf_counter() - start) * 1000)
+            finally:
+                db.close()
+            n += 1
+
+    threads = [threading.Thread(target=worker, args=("read",)) for _ in range(readers)]
+    threads += [threading.Thread(target=worker, args=("write",)) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for kind in ("read", "write"):
+        latencies = results[kind] or [0.0]
+        print(f"{profile:<12} {kind:<5} {len(results[kind]) / seconds:8.1f} ops/s  {describe(latencies)}")
+    print(f"{profile:<12} errors {len(results['errors'])} {sorted(set(results['errors']))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--profile", choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        run_profile(args.profile, args.readers, args.writers, args.seconds)
+        return
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds} s per profile")
+    for profile in PROFILES:
+        env = dict(os.environ, SQLITE_PROFILE=profile, DATABASE_ASYNC="false", RESPONSE_CACHE_SIZE="0")
+        env.pop("DATABASE_URL", None)
+        subprocess.run(
+            [sys.executable, __file__, "--profile", profile, "--readers", str(args.readers),
+             "--writers", str(args.writers), "--seconds", str(args.seconds)],
+            env=env,
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Shared setup for the benchmark scripts.
+
+Import this module before anything from `app` or `config`: it points
+DATABASE_URL at a throwaway SQLite file so the bundled itinerary.db is never
+touched.
+"""
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+
+_BENCH_DB_DIR = tempfile.mkdtemp(prefix="itinerary-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_BENCH_DB_DIR, 'bench.db')}")
+
+from sqlalchemy import event
+
+
+def seed_benchmark_database():
+    """Create the schema and load the seed data quietly"""
+    from app.database.db import Base, engine, SessionLocal
+    from app.seed.seed_data import seed_database
+    from app.api.documents import rebuild_all_documents
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            seed_database(db)
+            rebuild_all_documents(db)
+    finally:
+        db.close()
+
+
+def app_engine():
+    """The engine the API routes execute on in the configured DATABASE_ASYNC mode"""
+    from app.database.db import async_engine, engine
+
+    return async_engine.sync_engine if async_engine is not None else engine
+
+
+class StatementCounter:
+    """Counts the SQL statements executed on an engine"""
+
+    def __init__(self, bind):
+        self.bind = bind
+        self.count = 0
+
+    def _record(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.bind, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.bind, "before_cursor_execute", self._record)
+
+
+def time_calls(func, repeat):
+    """Run func `repeat` times and return the latencies in milliseconds"""
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def describe(latencies):
+    return (
+        f"median {statistics.median(latencies):7.2f} ms  "
+        f"p99 {percentile(latencies, 99):7.2f} ms"
+    )
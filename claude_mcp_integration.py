@@ -12,10 +12,20 @@ Instructions:
 import asyncio
 import json
 import os
+from functools import partial
 from typing import Dict, List, Optional
 
-from app.database.db import SessionLocal
-from app.models.models import Itinerary
+import anyio
+from sqlalchemy.orm import Session
+
+from app.database.db import session_scope, run_db
+from app.mcp.paging import find_itineraries_page
+from app.mcp.serializer import batch_itinerary_details, itinerary_detail
+from app.api.fulltext import CATALOG_ENTITY_TYPES, full_text_search
+from app.api.nearby import nearby_catalog, nearby_summary
+from app.api.routing import route_summary, transfer_graph
+from app.api.generator import generated_summary, generator_catalog
+from config import MCP_PAGE_SIZE, MCP_RESULT_MAX_BYTES
 from mcp.server.fastmcp import FastMCP, Context
 
 # Create MCP server for Claude integration
@@ -25,43 +35,46 @@ claude_mcp = FastMCP(
 )
 
 @claude_mcp.tool()
-def find_itineraries(nights: Optional[int] = None, ctx: Context = None) -> List[Dict]:
+async def find_itineraries(
+    nights: Optional[int] = None,
+    limit: int = MCP_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    max_bytes: int = MCP_RESULT_MAX_BYTES,
+    detail: str = "full",
+    ctx: Context = None,
+) -> Dict:
     """
     Find travel itineraries based on the number of nights.
     
     Args:
         nights: Optional number of nights to filter by (2-8)
+        limit: Maximum number of itineraries in this page
+        cursor: next_cursor of the previous page, to continue the listing
+        max_bytes: Approximate size budget of the page; descriptions are
+            shortened, then dropped, to fit more itineraries
+        detail: "full", "brief" (short descriptions) or "minimal" (none)
     
     Returns:
-        A list of matching itineraries with basic info
+        A page of itineraries with basic info and the next_cursor for the
+        rest (null on the last page)
     """
-    db = SessionLocal()
-    try:
-        query = db.query(Itinerary)
-        
-        if nights is not None:
-            query = query.filter(Itinerary.nights == nights)
-        
-        # Limit to recommended itineraries
-        query = query.filter(Itinerary.is_recommended == True)
-        
-        # Get basic info for each itinerary
-        itineraries = []
-        for item in query.all():
-            itineraries.append({
-                "id": item.id,
-                "name": item.name,
-                "description": item.description,
-                "nights": item.nights,
-                "total_price": float(item.total_price),
-            })
-        
-        return itineraries
-    finally:
-        db.close()
+    async with session_scope(read_only=True) as db:
+        return await run_db(db, _find_itineraries, nights, limit, cursor, max_bytes, detail)
+
+
+def _find_itineraries(
+    db: Session,
+    nights: Optional[int],
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    detail: str = "full",
+) -> Dict:
+    """Stream one budgeted page of recommended itinerary summaries; runs on a sync session."""
+    return find_itineraries_page(db, nights, limit, cursor, max_bytes, detail)
 
 @claude_mcp.tool()
-def get_itinerary_details(itinerary_id: int, ctx: Context = None) -> Dict:
+async def get_itinerary_details(itinerary_id: int, ctx: Context = None) -> Dict:
     """
     Get detailed information about a specific itinerary.
     
@@ -71,61 +84,140 @@ def get_itinerary_details(itinerary_id: int, ctx: Context = None) -> Dict:
     Returns:
         Detailed itinerary information including daily plans
     """
-    db = SessionLocal()
-    try:
-        itinerary = db.query(Itinerary).filter(Itinerary.id == itinerary_id).first()
-        
-        if not itinerary:
-            return {"error": f"Itinerary with ID {itinerary_id} not found"}
-        
-        # Format basic itinerary info
-        result = {
-            "id": itinerary.id,
-            "name": itinerary.name,
-            "description": itinerary.description,
-            "nights": itinerary.nights,
-            "total_price": float(itinerary.total_price),
-            "daily_plans": []
-        }
-        
-        # Add detailed daily plans
-        for plan in sorted(itinerary.daily_plans, key=lambda x: x.day_number):
-            daily_plan = {
-                "day": plan.day_number,
-                "notes": plan.notes,
-                "hotel": {
-                    "name": plan.hotel.name,
-                    "star_rating": plan.hotel.star_rating,
-                    "location": plan.hotel.location.name,
-                    "price_per_night": float(plan.hotel.price_per_night)
-                },
-                "activities": []
-            }
-            
-            # Add activities
-            for activity in plan.activities:
-                daily_plan["activities"].append({
-                    "name": activity.name,
-                    "duration": activity.duration,
-                    "price": float(activity.price),
-                    "type": activity.activity_type
-                })
-            
-            # Add transfer if available
-            if plan.transfer:
-                daily_plan["transfer"] = {
-                    "type": plan.transfer.transfer_type,
-                    "origin": plan.transfer.origin.name,
-                    "destination": plan.transfer.destination.name,
-                    "duration": plan.transfer.duration,
-                    "price": float(plan.transfer.price)
-                }
-            
-            result["daily_plans"].append(daily_plan)
-        
-        return result
-    finally:
-        db.close()
+    async with session_scope(read_only=True) as db:
+        return await run_db(db, _get_itinerary_details, itinerary_id)
+
+
+def _get_itinerary_details(db: Session, itinerary_id: int) -> Dict:
+    """Load and format one itinerary from a single flat row query; runs on a sync session."""
+    itinerary = itinerary_detail(db, itinerary_id, prices=True)
+    
+    if not itinerary:
+        return {"error": f"Itinerary with ID {itinerary_id} not found"}
+    
+    return itinerary
+
+@claude_mcp.tool()
+async def get_itineraries_details(
+    ids: List[int], fields: Optional[List[str]] = None, ctx: Context = None
+) -> Dict:
+    """
+    Get several itineraries in one call, e.g. to compare the results of find_itineraries.
+    
+    Args:
+        ids: IDs of the itineraries to retrieve (up to 50)
+        fields: Optional subset of name, description, nights, total_price and
+            daily_plans to return for each itinerary
+    
+    Returns:
+        Itineraries keyed by ID, the IDs not found, and a comparison of their
+        prices, average hotel stars and activity counts
+    """
+    async with session_scope(read_only=True) as db:
+        return await run_db(db, batch_itinerary_details, ids, fields)
+
+@claude_mcp.tool()
+async def search_catalog(
+    query: str, entity_type: Optional[str] = None, limit: int = 10, ctx: Context = None
+) -> Dict:
+    """
+    Find locations, hotels and activities matching free text.
+    
+    Args:
+        query: Words to look for, e.g. "snorkeling near Phi Phi"
+        entity_type: Optional "location", "hotel" or "activity" filter
+        limit: Maximum number of results (1-50)
+    
+    Returns:
+        Best matches first, with highlighted snippets and counts per type
+    """
+    if entity_type is not None and entity_type not in CATALOG_ENTITY_TYPES:
+        return {"error": f"entity_type must be one of {', '.join(CATALOG_ENTITY_TYPES)}"}
+    limit = max(1, min(limit, 50))
+    async with session_scope(read_only=True) as db:
+        result = await run_db(db, full_text_search, query, entity_type, limit)
+    return result or {"error": "Search query must contain at least one word"}
+
+
+@claude_mcp.tool()
+async def find_nearby(
+    latitude: float, longitude: float, radius_km: float = 25.0, k: int = 5, ctx: Context = None
+) -> Dict:
+    """
+    List what is near a latitude/longitude: locations, hotels and activities.
+    
+    Args:
+        latitude: Latitude in degrees
+        longitude: Longitude in degrees
+        radius_km: Search radius in kilometres
+        k: Results per kind (1-50)
+    
+    Returns:
+        Nearest places first, each with distance_km
+    """
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return {"error": "latitude must be within -90..90 and longitude within -180..180"}
+    if not 0 < radius_km <= 1000:
+        return {"error": f"radius_km must be between 0 and 1000, got {radius_km}"}
+    k = max(1, min(k, 50))
+    async with session_scope(read_only=True) as db:
+        return await run_db(
+            db, lambda db: nearby_summary(nearby_catalog(db, latitude, longitude, radius_km, k))
+        )
+
+
+@claude_mcp.tool()
+async def find_transfer_route(
+    from_location_id: int, to_location_id: int, optimize: str = "fastest", ctx: Context = None
+) -> Dict:
+    """
+    Get the transfer legs needed to go from one location to another.
+    
+    Args:
+        from_location_id: Starting location ID
+        to_location_id: Destination location ID
+        optimize: "fastest", "cheapest" or "pareto"
+    
+    Returns:
+        Matching routes, each with legs, duration and price
+    """
+    graph = transfer_graph.current
+    if graph is None:
+        async with session_scope(read_only=True) as db:
+            graph = await run_db(db, transfer_graph.load)
+    return route_summary(graph, from_location_id, to_location_id, optimize)
+
+
+@claude_mcp.tool()
+async def generate_custom_itinerary(
+    nights: int,
+    budget: Optional[float] = None,
+    regions: Optional[List[str]] = None,
+    interests: Optional[List[str]] = None,
+    max_hours_per_day: float = 10.0,
+    ctx: Context = None,
+) -> Dict:
+    """
+    Put together a fresh itinerary that fits the user's constraints.
+    
+    Args:
+        nights: Trip length in nights
+        budget: Maximum total price, if any
+        regions: Regions to stay in, if any
+        interests: Activity interests such as "water" or "culture"
+        max_hours_per_day: Maximum hours of transfers and activities per day
+    
+    Returns:
+        The generated days with hotels, transfers, activities and total price
+    """
+    catalog = generator_catalog.current
+    if catalog is None:
+        async with session_scope(read_only=True) as db:
+            catalog = await run_db(db, generator_catalog.load)
+    return await anyio.to_thread.run_sync(partial(
+        generated_summary, catalog, nights, budget, regions or (), interests or (), max_hours_per_day
+    ))
+
 
 @claude_mcp.prompt()
 def create_itinerary_recommendation(nights: int) -> str:
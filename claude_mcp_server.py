@@ -1,4 +1,5 @@
 """MCP Server for Claude Desktop integration with Thailand Travel Itinerary system"""
+from functools import partial
 from typing import Dict, List, Optional
 import json
 import sys
@@ -17,16 +18,43 @@ except ImportError as e:
 DB_PATH = os.path.join("D:\\Grind\\Itenary", "itinerary.db")
 print(f"Using absolute database path: {DB_PATH}", file=sys.stderr)
 
-from app.database.db import engine, Base
+from app.database.db import (
+    engine, Base, session_scope, run_db,
+    configure_sqlite, create_async_read_engine, create_read_engine, engine_options,
+)
+from config import DATABASE_ASYNC, MCP_PAGE_SIZE, MCP_RESULT_MAX_BYTES
+import anyio
 import sqlalchemy
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
-abs_engine = create_engine(f"sqlite:///{DB_PATH}")
+abs_engine = configure_sqlite(create_engine(f"sqlite:///{DB_PATH}", **engine_options(f"sqlite:///{DB_PATH}")))
 
 CustomSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=abs_engine)
 
+# The tools only read, so they go through read-only engines on the same file
+CustomReadSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=create_read_engine(f"sqlite:///{DB_PATH}")
+)
+CustomAsyncReadSessionLocal = (
+    async_sessionmaker(create_async_read_engine(f"sqlite+aiosqlite:///{DB_PATH}"), autoflush=False)
+    if DATABASE_ASYNC else None
+)
+
 from app.models.models import Itinerary, Location, Hotel, Activity, Transfer
+from app.mcp.paging import find_itineraries_page, locations_page
+from app.mcp.serializer import batch_itinerary_details, itinerary_detail
+from app.api.fulltext import CATALOG_ENTITY_TYPES, full_text_search
+from app.api.nearby import nearby_catalog, nearby_summary
+from app.api.routing import TransferGraph, route_summary
+from app.api.generator import GeneratorCatalog, generated_summary
+from app.api.snapshots import CatalogSnapshot
+
+# Transfer routing graph and generator catalog of DB_PATH, separate from the
+# application database's
+route_graphs = CatalogSnapshot(TransferGraph.load, watched=(Transfer, Location))
+generator_catalogs = CatalogSnapshot(GeneratorCatalog.load, watched=(Location, Hotel, Activity, Transfer))
 
 try:
     inspector = sqlalchemy.inspect(abs_engine)
@@ -52,50 +80,47 @@ except Exception as e:
 mcp = FastMCP(name="ThailandItineraryServer")
 
 @mcp.tool()
-def find_itineraries(nights: Optional[int] = None) -> List[Dict]:
+async def find_itineraries(
+    nights: Optional[int] = None,
+    limit: int = MCP_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    max_bytes: int = MCP_RESULT_MAX_BYTES,
+    detail: str = "full",
+) -> Dict:
     """
     Find available travel itineraries based on number of nights.
     
     Args:
         nights: Optional number of nights to filter by (2-8)
+        limit: Maximum number of itineraries in this page
+        cursor: next_cursor of the previous page, to continue the listing
+        max_bytes: Approximate size budget of the page; descriptions are
+            shortened, then dropped, to fit more itineraries
+        detail: "full", "brief" (short descriptions) or "minimal" (none)
     
     Returns:
-        A list of matching itineraries with details
+        A page of matching itineraries and the next_cursor for the rest
+        (null on the last page)
     """
-    db = CustomSessionLocal()
-    try:
-        print(f"Searching for itineraries with nights={nights}", file=sys.stderr)
-        query = db.query(Itinerary)
-        
-        if nights is not None:
-            query = query.filter(Itinerary.nights == nights)
-            print(f"Added filter: nights={nights}", file=sys.stderr)
-        
-        query = query.filter(Itinerary.is_recommended == True)
-        print(f"Added filter: is_recommended=True", file=sys.stderr)
-        
-        print(f"SQL Query: {query.statement}", file=sys.stderr)
-        
-        items = query.all()
-        print(f"Query returned {len(items)} results", file=sys.stderr)
-        
-        result = []
-        for item in items:
-            result.append({
-                "id": item.id,
-                "name": item.name,
-                "description": item.description,
-                "nights": item.nights,
-                "total_price": float(item.total_price),
-                "num_daily_plans": len(item.daily_plans)
-            })
-        
-        return result
-    finally:
-        db.close()
+    async with session_scope(CustomReadSessionLocal, CustomAsyncReadSessionLocal) as db:
+        return await run_db(db, _find_itineraries, nights, limit, cursor, max_bytes, detail)
+
+def _find_itineraries(
+    db: Session,
+    nights: Optional[int],
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    detail: str = "full",
+) -> Dict:
+    print(f"Searching for itineraries with nights={nights} limit={limit} cursor={cursor}", file=sys.stderr)
+    page = find_itineraries_page(db, nights, limit, cursor, max_bytes, detail)
+    if "error" not in page:
+        print(f"Page of {len(page['itineraries'])} results, {page['bytes']} bytes", file=sys.stderr)
+    return page
 
 @mcp.tool()
-def get_itinerary_details(itinerary_id: int) -> Dict:
+async def get_itinerary_details(itinerary_id: int) -> Dict:
     """
     Get detailed information about a specific itinerary.
     
@@ -105,96 +130,176 @@ def get_itinerary_details(itinerary_id: int) -> Dict:
     Returns:
         Detailed itinerary information including daily plans
     """
-    # Use our custom session with absolute DB path
-    db = CustomSessionLocal()
-    try:
-        print(f"Getting details for itinerary_id={itinerary_id}", file=sys.stderr)
-        itinerary = db.query(Itinerary).filter(Itinerary.id == itinerary_id).first()
-        
-        if not itinerary:
-            print(f"Itinerary with ID {itinerary_id} not found", file=sys.stderr)
-            return {"error": f"Itinerary with ID {itinerary_id} not found"}
-        
-        print(f"Found itinerary: {itinerary.name}", file=sys.stderr)
-        # Format the full itinerary with daily plans
-        result = {
-            "id": itinerary.id,
-            "name": itinerary.name,
-            "description": itinerary.description,
-            "nights": itinerary.nights,
-            "total_price": float(itinerary.total_price),
-            "daily_plans": []
-        }
-        
-        # Add daily plans sorted by day number
-        for plan in sorted(itinerary.daily_plans, key=lambda x: x.day_number):
-            daily_plan = {
-                "day": plan.day_number,
-                "notes": plan.notes,
-                "hotel": {
-                    "name": plan.hotel.name,
-                    "location": plan.hotel.location.name,
-                    "star_rating": plan.hotel.star_rating,
-                    "price_per_night": float(plan.hotel.price_per_night)
-                },
-                "activities": []
-            }
-            
-            # Add activities
-            for activity in plan.activities:
-                daily_plan["activities"].append({
-                    "name": activity.name,
-                    "duration": activity.duration,
-                    "price": float(activity.price),
-                    "type": activity.activity_type
-                })
-            
-            # Add transfer if present
-            if plan.transfer:
-                daily_plan["transfer"] = {
-                    "type": plan.transfer.transfer_type,
-                    "origin": plan.transfer.origin.name,
-                    "destination": plan.transfer.destination.name,
-                    "duration": plan.transfer.duration,
-                    "price": float(plan.transfer.price)
-                }
-            
-            result["daily_plans"].append(daily_plan)
-        
-        return result
-    finally:
-        db.close()
+    async with session_scope(CustomReadSessionLocal, CustomAsyncReadSessionLocal) as db:
+        return await run_db(db, _get_itinerary_details, itinerary_id)
+
+def _get_itinerary_details(db: Session, itinerary_id: int) -> Dict:
+    print(f"Getting details for itinerary_id={itinerary_id}", file=sys.stderr)
+    # The itinerary, its daily plans, hotels, transfers and activities in one query
+    itinerary = itinerary_detail(db, itinerary_id, prices=True)
+    
+    if not itinerary:
+        print(f"Itinerary with ID {itinerary_id} not found", file=sys.stderr)
+        return {"error": f"Itinerary with ID {itinerary_id} not found"}
+    
+    print(f"Found itinerary: {itinerary['name']}", file=sys.stderr)
+    return itinerary
+
+@mcp.tool()
+async def get_itineraries_details(ids: List[int], fields: Optional[List[str]] = None) -> Dict:
+    """
+    Get several itineraries in one call, e.g. to compare the results of find_itineraries.
+    
+    Args:
+        ids: IDs of the itineraries to retrieve (up to 50)
+        fields: Optional subset of name, description, nights, total_price and
+            daily_plans to return for each itinerary
+    
+    Returns:
+        Itineraries keyed by ID, the IDs not found, and a comparison of their
+        prices, average hotel stars and activity counts
+    """
+    async with session_scope(CustomReadSessionLocal, CustomAsyncReadSessionLocal) as db:
+        return await run_db(db, batch_itinerary_details, ids, fields)
 
 @mcp.tool()
-def get_available_locations() -> List[Dict]:
+async def get_available_locations(
+    limit: int = MCP_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    max_bytes: int = MCP_RESULT_MAX_BYTES,
+    detail: str = "full",
+) -> Dict:
     """
     Get list of all available locations in Thailand.
     
+    Args:
+        limit: Maximum number of locations in this page
+        cursor: next_cursor of the previous page, to continue the listing
+        max_bytes: Approximate size budget of the page; descriptions are
+            shortened, then dropped, to fit more locations
+        detail: "full", "brief" (short descriptions) or "minimal" (none)
+    
     Returns:
-        List of locations with region information
+        A page of locations with region information and the next_cursor for
+        the rest (null on the last page)
     """
-    # Use our custom session with absolute DB path
-    db = CustomSessionLocal()
-    try:
-        print("Getting available locations", file=sys.stderr)
-        locations = db.query(Location).all()
-        print(f"Found {len(locations)} locations", file=sys.stderr)
-        
-        if locations:
-            for loc in locations[:3]:  # Print first 3 as sample
-                print(f"Sample location: {loc.name} ({loc.region})", file=sys.stderr)
-        
-        return [
-            {
-                "id": loc.id,
-                "name": loc.name,
-                "region": loc.region,
-                "description": loc.description
-            }
-            for loc in locations
-        ]
-    finally:
-        db.close()
+    async with session_scope(CustomReadSessionLocal, CustomAsyncReadSessionLocal) as db:
+        return await run_db(db, _get_available_locations, limit, cursor, max_bytes, detail)
+
+def _get_available_locations(
+    db: Session,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    detail: str = "full",
+) -> Dict:
+    print(f"Getting available locations limit={limit} cursor={cursor}", file=sys.stderr)
+    page = locations_page(db, limit, cursor, max_bytes, detail)
+    if "error" not in page:
+        print(f"Page of {len(page['locations'])} locations, {page['bytes']} bytes", file=sys.stderr)
+    return page
+
+@mcp.tool()
+async def search_catalog(
+    query: str, entity_type: Optional[str] = None, limit: int = 10
+) -> Dict:
+    """
+    Search locations, hotels and activities in Thailand by keywords.
+    
+    Args:
+        query: Keywords such as "snorkeling near Phi Phi" or "pool spa"
+        entity_type: Optional "location", "hotel" or "activity"
+        limit: Maximum number of results (1-50)
+    
+    Returns:
+        Ranked matches with snippets and per-type match counts
+    """
+    if entity_type is not None and entity_type not in CATALOG_ENTITY_TYPES:
+        return {"error": f"entity_type must be one of {', '.join(CATALOG_ENTITY_TYPES)}"}
+    limit = max(1, min(limit, 50))
+    async with session_scope(CustomReadSessionLocal, CustomAsyncReadSessionLocal) as db:
+        result = await run_db(db, full_text_search, query, entity_type, limit)
+    return result or {"error": "Search query must contain at least one word"}
+
+
+@mcp.tool()
+async def find_nearby(
+    latitude: float, longitude: float, radius_km: float = 25.0, k: int = 5
+) -> Dict:
+    """
+    Get locations, hotels and activities close to some coordinates in Thailand.
+    
+    Args:
+        latitude: Latitude in degrees (e.g. 7.89 for Patong)
+        longitude: Longitude in degrees (e.g. 98.30 for Patong)
+        radius_km: How far to look, in kilometres
+        k: Maximum number of each kind of result
+    
+    Returns:
+        Nearby places grouped by kind, with distances in km
+    """
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return {"error": "latitude must be within -90..90 and longitude within -180..180"}
+    if not 0 < radius_km <= 1000:
+        return {"error": f"radius_km must be between 0 and 1000, got {radius_km}"}
+    k = max(1, min(k, 50))
+    async with session_scope(CustomReadSessionLocal, CustomAsyncReadSessionLocal) as db:
+        return await run_db(
+            db, lambda db: nearby_summary(nearby_catalog(db, latitude, longitude, radius_km, k))
+        )
+
+
+@mcp.tool()
+async def find_transfer_route(
+    from_location_id: int, to_location_id: int, optimize: str = "fastest"
+) -> Dict:
+    """
+    Find how to travel between two locations in Thailand using transfers.
+    
+    Args:
+        from_location_id: Location to start from (see get_available_locations)
+        to_location_id: Location to reach
+        optimize: "fastest", "cheapest" or "pareto" for the trade-offs between both
+    
+    Returns:
+        Transfer legs with total duration in hours and total price
+    """
+    graph = route_graphs.current
+    if graph is None:
+        async with session_scope(CustomReadSessionLocal, CustomAsyncReadSessionLocal) as db:
+            graph = await run_db(db, route_graphs.load)
+    return route_summary(graph, from_location_id, to_location_id, optimize)
+
+
+@mcp.tool()
+async def generate_custom_itinerary(
+    nights: int,
+    budget: Optional[float] = None,
+    regions: Optional[List[str]] = None,
+    interests: Optional[List[str]] = None,
+    max_hours_per_day: float = 10.0,
+) -> Dict:
+    """
+    Create a new Thailand itinerary matching a budget, regions and interests.
+    
+    Args:
+        nights: How many nights the trip lasts (1-30)
+        budget: Most the whole trip may cost
+        regions: Regions to stay in ("Phuket", "Krabi"); all when omitted
+        interests: Kinds of activity to favour, e.g. ["water", "adventure"]
+        max_hours_per_day: Most hours of transfers plus activities on one day
+    
+    Returns:
+        A day-by-day plan with hotel, transfer and activity names and the total price
+    """
+    catalog = generator_catalogs.current
+    if catalog is None:
+        async with session_scope(CustomReadSessionLocal, CustomAsyncReadSessionLocal) as db:
+            catalog = await run_db(db, generator_catalogs.load)
+    return await anyio.to_thread.run_sync(partial(
+        generated_summary, catalog, nights, budget, regions or (), interests or (), max_hours_per_day
+    ))
+
 
 @mcp.prompt()
 def recommend_thai_itinerary(nights: int, interests: str = "beaches, culture, food") -> str:
@@ -216,7 +321,7 @@ I'd like recommendations on:
 - How to get around
 - Approximate budget
 
-You can use the find_itineraries, get_itinerary_details, and get_available_locations tools to help create a personalized recommendation.
+You can use the find_itineraries, get_itinerary_details, get_available_locations, search_catalog, find_nearby, find_transfer_route, and generate_custom_itinerary tools to help create a personalized recommendation.
 
 Please organize the response with clear headings and include specific details about accommodations, activities, and transfers.
 """
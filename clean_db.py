@@ -14,6 +14,10 @@ def clean_database():
     if os.path.exists(db_path):
         try:
             os.remove(db_path)
+            # WAL journal files left behind by the SQLite engine profile
+            for suffix in ("-wal", "-shm"):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
             print(f"Database file {db_path} successfully removed.")
         except Exception as e:
             print(f"Error removing database file: {e}")
@@ -7,12 +7,75 @@ load_dotenv()
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./itinerary.db")
 
+# Async database access for the API and MCP servers (set to false to use the sync Session)
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "true").lower() in ("1", "true", "yes")
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL", DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+)
+
+# Read-only traffic (GET routes, MCP tools) goes through its own engine and pool.
+# Point READ_DATABASE_URL at a replica file to move reads off the primary;
+# DATABASE_READ_ROUTING=false sends reads to the primary sessions instead.
+DATABASE_READ_ROUTING = os.getenv("DATABASE_READ_ROUTING", "true").lower() in ("1", "true", "yes")
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL", DATABASE_URL)
+ASYNC_READ_DATABASE_URL = os.getenv(
+    "ASYNC_READ_DATABASE_URL", READ_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+)
+
+# SQLite engine profile: "performance" applies the pragmas below on every new
+# connection; "default" keeps SQLite's own settings
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "performance")
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # bytes
+# Page cache per connection (negative = KiB, so 4 MiB). Every pooled connection of the
+# write, read and async engines has its own, so the worst case is
+# 4 MiB x (DB_POOL_SIZE + DB_MAX_OVERFLOW) x engines, about 480 MiB with the defaults;
+# mmap serves reads from the shared OS page cache on top of it
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-4096"))
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))  # milliseconds
+
+# Connection pool; pool size plus overflow should cover the 40 threadpool workers
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "30"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds
+
 # API Configuration
 API_PREFIX = "/api/v1"
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "100"))  # Hard cap on list endpoint page size
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "200"))  # Rows per batch in the NDJSON export
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "1000"))  # Itineraries per POST /itineraries/bulk request
+
+# HTTP caching of reference data; bump CATALOG_VERSION whenever locations are reseeded
+CATALOG_VERSION = os.getenv("CATALOG_VERSION", "1")
+LOCATIONS_CACHE_MAX_AGE = int(os.getenv("LOCATIONS_CACHE_MAX_AGE", "86400"))
+
+# In-process response cache for itinerary and location reads (size 0 disables it)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))  # seconds
+
+# In-memory catalog snapshots (transfer graph, generator catalog): how long one
+# is trusted before reloading (writes in this process invalidate it at once),
+# and the number of memoised routes per transfer graph
+ROUTE_CACHE_SIZE = int(os.getenv("ROUTE_CACHE_SIZE", "4096"))
+CATALOG_SNAPSHOT_TTL = float(os.getenv("CATALOG_SNAPSHOT_TTL", "300"))  # seconds
+# updated_at is stamped at flush, not commit, by each writer's clock: readers that
+# pick up changes after a stored updated_at look this far further back, to cover
+# transactions still open at that point and clock skew between writers
+CHANGE_SAFETY_WINDOW = float(os.getenv("CHANGE_SAFETY_WINDOW", "60"))  # seconds
 
 # MCP Server Configuration
 MCP_SERVER_NAME = "ThailandItineraryServer"
 MCP_SERVER_VERSION = "1.0.0"
+# Tool calls using a database connection at once (each opens its own session);
+# keep it within DB_POOL_SIZE + DB_MAX_OVERFLOW and the 40 threadpool workers
+MCP_DB_THREADS = int(os.getenv("MCP_DB_THREADS", "16"))
+# List tools (find_itineraries, get_available_locations): rows per page by
+# default and the default size budget of one page's serialized rows
+MCP_PAGE_SIZE = int(os.getenv("MCP_PAGE_SIZE", "20"))
+MCP_RESULT_MAX_BYTES = int(os.getenv("MCP_RESULT_MAX_BYTES", "16384"))
+# How often the MCP server checks whether its recommendation index is out of date
+RECOMMENDATION_INDEX_POLL_INTERVAL = float(os.getenv("RECOMMENDATION_INDEX_POLL_INTERVAL", "5"))  # seconds
 
 # Seed data configuration
 MIN_NIGHTS = 2
@@ -0,0 +1,113 @@
+"""
+Shared pytest fixtures.
+
+Tests run against a freshly seeded SQLite database in a temporary directory so
+the bundled itinerary.db is never touched.
+"""
+import os
+import tempfile
+from types import SimpleNamespace
+
+_TEST_DB_DIR = tempfile.mkdtemp(prefix="itinerary-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TEST_DB_DIR, 'test.db')}"
+
+import anyio
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database.db import Base, engine, async_engine, async_read_engine, read_engine, SessionLocal
+from app.database.migrations import upgrade_database
+from app.seed.seed_data import seed_database
+from app.api.documents import rebuild_all_documents
+
+
+@pytest.fixture(scope="session", autouse=True)
+def seeded_db():
+    """Create the schema with the migrations and seed data once per test session"""
+    upgrade_database(configure_logger=False)
+    db = SessionLocal()
+    try:
+        seed_database(db)
+        rebuild_all_documents(db)
+    finally:
+        db.close()
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(autouse=True)
+def empty_response_cache():
+    """Start every test with a cold response cache so query counts hit the database"""
+    from app.api.response_cache import response_cache
+
+    response_cache.clear()
+    yield
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    from app.main import app
+
+    return TestClient(app)
+
+
+class QueryCounter:
+    """Counts the SQL statements executed on one or more engines"""
+
+    def __init__(self, *binds):
+        # The read engine is the primary itself when read routing is off
+        self.binds = list({id(bind): bind for bind in binds}.values())
+        self.statements = []
+        self.parameters = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+        self.parameters.append(parameters)
+
+    def __enter__(self):
+        for bind in self.binds:
+            event.listen(bind, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        for bind in self.binds:
+            event.remove(bind, "before_cursor_execute", self._record)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+# Engines behind the request sessions (primary and read-only), depending on DATABASE_ASYNC
+APP_ENGINES = (
+    (async_engine.sync_engine, async_read_engine.sync_engine)
+    if async_engine is not None else (engine, read_engine)
+)
+
+
+@pytest.fixture
+def count_queries():
+    """Return a context manager factory that counts statements on the app engines"""
+    return lambda *binds: QueryCounter(*(binds or APP_ENGINES))
+
+
+def call_with_lifespan(tool, *args, **kwargs):
+    """Run an MCP tool that takes a Context inside the server lifespan"""
+    from app.mcp.server import app_lifespan, mcp
+
+    async def run():
+        async with app_lifespan(mcp) as lifespan:
+            ctx = SimpleNamespace(request_context=SimpleNamespace(lifespan_context=lifespan))
+            return await tool(*args, ctx=ctx, **kwargs)
+
+    return anyio.run(run)
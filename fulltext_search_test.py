@@ -0,0 +1,84 @@
+"""GET /search: full-text search over the catalog with SQLite FTS5"""
+import asyncio
+
+from sqlalchemy import text
+
+from app.api.fulltext import match_expression
+from app.mcp.server import search_catalog
+from app.models.models import Activity, Hotel, Location
+
+URL = "/api/v1/search"
+
+
+def search(client, q, **params):
+    response = client.get(URL, params={"q": q, **params})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_index_covers_the_catalog(db):
+    counts = dict(db.execute(text("SELECT entity_type, count(*) FROM catalog_fts GROUP BY entity_type")).all())
+    assert counts == {
+        "location": db.query(Location).count(),
+        "hotel": db.query(Hotel).count(),
+        "activity": db.query(Activity).count(),
+    }
+
+
+def test_results_are_ranked_with_snippets_and_facets(client):
+    body = search(client, "snorkeling near Phi Phi")
+    top = body["results"][0]
+    assert (top["type"], top["name"]) == ("activity", "Phi Phi Islands Boat Tour")
+    assert "**snorkeling**" in top["snippet"]
+    scores = [r["score"] for r in body["results"]]
+    assert scores == sorted(scores, reverse=True)
+    assert set(body["facets"]) == {"location", "hotel", "activity"}
+    assert body["total"] == sum(body["facets"].values())
+
+
+def test_type_filter_keeps_every_facet(client):
+    everything = search(client, "beach")
+    hotels = search(client, "beach", type="hotel")
+    assert {r["type"] for r in hotels["results"]} == {"hotel"}
+    assert hotels["facets"] == everything["facets"]
+    assert hotels["total"] == everything["facets"]["hotel"]
+
+
+def test_amenities_and_prefixes_match(client):
+    assert {r["type"] for r in search(client, "wifi")["results"]} == {"hotel"}
+    assert search(client, "snork")["results"]
+
+
+def test_query_syntax_is_treated_as_text(client):
+    assert match_expression('spa" OR NEAR(') == '"spa" OR "OR" OR "NEAR"*'
+    assert client.get(URL, params={"q": 'spa" OR NEAR('}).status_code == 200
+    assert client.get(URL, params={"q": "?!"}).status_code == 400
+
+
+def test_index_follows_catalog_writes(client, db):
+    location = db.get(Location, 5)
+    original = location.name
+    try:
+        location.name = "Zanzibar Cove"
+        db.commit()
+        names = {(r["type"], r["id"]) for r in search(client, "zanzibar")["results"]}
+        # Hotels and activities there are reindexed with the new location name
+        assert ("location", 5) in names and ("hotel", 5) in names and ("activity", 6) in names
+    finally:
+        location.name = original
+        db.commit()
+    assert search(client, "zanzibar")["total"] == 0
+
+    activity = Activity(name="Kayak Quokka Safari", description="Paddle", location_id=1, price=10)
+    db.add(activity)
+    db.commit()
+    assert [r["id"] for r in search(client, "quokka")["results"]] == [activity.id]
+    db.delete(activity)
+    db.commit()
+    assert search(client, "quokka")["total"] == 0
+
+
+def test_mcp_tool():
+    result = asyncio.run(search_catalog("pool spa", entity_type="hotel", limit=2))
+    assert len(result["results"]) == 2
+    assert asyncio.run(search_catalog("spa", entity_type="spaceship"))["error"]
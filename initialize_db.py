@@ -1,14 +1,10 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 import os
-import random
 
-from app.database.db import Base, engine, SessionLocal
-from app.models.models import (
-    Location, Hotel, Activity, Transfer, Itinerary, DailyPlan
-)
+from app.database.db import SessionLocal
+from app.models.models import Itinerary, DailyPlan
 from config import DATABASE_URL
 from app.seed.seed_data import main as seed_main  # Import the main function correctly
+from app.database.migrations import upgrade_database
 
 
 def clean_database():
@@ -23,6 +19,10 @@ def clean_database():
         if os.path.exists(db_path):
             try:
                 os.remove(db_path)
+                # WAL journal files left behind by the SQLite engine profile
+                for suffix in ("-wal", "-shm"):
+                    if os.path.exists(db_path + suffix):
+                        os.remove(db_path + suffix)
                 print(f"Database file {db_path} successfully removed.")
             except Exception as e:
                 print(f"Error removing database file: {e}")
@@ -42,12 +42,16 @@ def initialize_db():
     if os.path.exists(db_path):
         try:
             os.remove(db_path)
+            # WAL journal files left behind by the SQLite engine profile
+            for suffix in ("-wal", "-shm"):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
             print(f"Existing database file {db_path} removed.")
         except Exception as e:
             print(f"Error removing existing database: {e}")
     
     # Create tables
-    Base.metadata.create_all(bind=engine)
+    upgrade_database()
     print("Database tables created successfully!")
     
     # Seed the database by calling the main function that handles db session internally
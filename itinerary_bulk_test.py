@@ -0,0 +1,64 @@
+"""Bulk itinerary creation tests"""
+import json
+
+from app.models.models import Itinerary, ItineraryDocument
+
+
+def _item(name, nights=2, hotel_id=1, activity_ids=(1,)):
+    return {
+        "name": name,
+        "description": "Created by the bulk tests",
+        "nights": nights,
+        "daily_plans": [
+            {"day_number": 1, "hotel_id": hotel_id, "transfer_id": 1, "activity_ids": list(activity_ids)},
+            {"day_number": 2, "hotel_id": hotel_id, "activity_ids": [2, 2]},
+        ],
+    }
+
+
+def test_bulk_matches_single_create(client, db):
+    single = client.post("/api/v1/itineraries/", json=_item("Bulk single")).json()
+    response = client.post("/api/v1/itineraries/bulk", json={"itineraries": [_item("Bulk batch")]})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 1
+
+    created = db.get(Itinerary, result["results"][0]["id"])
+    assert created.total_price == single["total_price"]
+    document = json.loads(db.get(ItineraryDocument, created.id).body)
+    assert [len(plan["activities"]) for plan in document["daily_plans"]] == [1, 1]
+    assert client.get(f"/api/v1/itineraries/{created.id}").json() == document
+
+
+def test_partial_mode_reports_each_item(client, db):
+    response = client.post("/api/v1/itineraries/bulk", json={
+        "atomic": False,
+        "itineraries": [_item("Good"), _item("Bad hotel", hotel_id=9999), _item("Good too", nights=3)],
+    })
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["created"], result["failed"]) == (2, 1)
+    assert [r["success"] for r in result["results"]] == [True, False, True]
+    assert "hotel" in result["results"][1]["error"]
+    assert db.get(Itinerary, result["results"][0]["id"]).name == "Good"
+    assert db.get(Itinerary, result["results"][2]["id"]).name == "Good too"
+
+
+def test_atomic_mode_is_all_or_nothing(client, db):
+    before = db.query(Itinerary).count()
+    response = client.post("/api/v1/itineraries/bulk", json={
+        "itineraries": [_item("Good"), _item("Bad activity", activity_ids=[9999])],
+    })
+    assert response.status_code == 400
+    assert response.json()["created"] == 0
+    assert db.query(Itinerary).count() == before
+
+
+def test_statement_count_does_not_grow_with_batch_size(client, count_queries):
+    counts = []
+    for size in (1, 10):
+        batch = {"itineraries": [_item(f"Batch {size}/{i}") for i in range(size)]}
+        with count_queries() as counter:
+            assert client.post("/api/v1/itineraries/bulk", json=batch).status_code == 200
+        counts.append(counter.count)
+    assert counts[0] == counts[1]
@@ -0,0 +1,52 @@
+"""Conditional GET and version tracking tests"""
+from app.api.response_cache import response_cache
+from app.models.models import DailyPlan, Itinerary
+
+
+def test_detail_revalidation_is_a_single_query(client, count_queries):
+    response = client.get("/api/v1/itineraries/1")
+    etag = response.headers["ETag"]
+    assert response.headers["Last-Modified"]
+
+    response_cache.clear()
+    with count_queries() as counter:
+        revalidated = client.get("/api/v1/itineraries/1", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == etag
+    assert counter.count == 1
+
+
+def test_daily_plan_change_bumps_itinerary_version(client, db):
+    etag = client.get("/api/v1/itineraries/1").headers["ETag"]
+    version = db.get(Itinerary, 1).version
+
+    plan = db.query(DailyPlan).filter(DailyPlan.itinerary_id == 1).first()
+    plan.notes = (plan.notes or "") + " (updated)"
+    db.commit()
+
+    assert db.get(Itinerary, 1).version == version + 1
+    response = client.get("/api/v1/itineraries/1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_list_revalidation(client):
+    params = {"limit": 3, "view": "summary"}
+    response = client.get("/api/v1/itineraries/", params=params)
+    revalidated = client.get(
+        "/api/v1/itineraries/", params=params, headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.headers["X-Next-Cursor"] == response.headers["X-Next-Cursor"]
+
+    full = client.get("/api/v1/itineraries/", params={"limit": 3})
+    assert full.headers["ETag"] != response.headers["ETag"]
+
+
+def test_locations_are_cacheable(client):
+    response = client.get("/api/v1/locations/", params={"region": "Krabi"})
+    assert "max-age" in response.headers["Cache-Control"]
+    revalidated = client.get(
+        "/api/v1/locations/", params={"region": "Krabi"}, headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert revalidated.status_code == 304
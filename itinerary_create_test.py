@@ -0,0 +1,59 @@
+"""Single itinerary creation tests"""
+from app.models.models import Activity, Hotel, Transfer
+
+
+def _itinerary(days):
+    return {
+        "name": f"{days}-day create test",
+        "description": "Created by the create tests",
+        "nights": days,
+        "daily_plans": [
+            {
+                "day_number": day,
+                "hotel_id": 1 + day % 4,
+                "transfer_id": 1 if day == 1 else None,
+                "activity_ids": [1 + day % 5, 1 + day % 5, 6],
+                "notes": f"Day {day}",
+            }
+            for day in range(1, days + 1)
+        ],
+    }
+
+
+def _expected_total(db, payload):
+    total = 0
+    for plan in payload["daily_plans"]:
+        total += db.get(Hotel, plan["hotel_id"]).price_per_night
+        if plan["transfer_id"]:
+            total += db.get(Transfer, plan["transfer_id"]).price
+        for activity_id in set(plan["activity_ids"]):
+            total += db.get(Activity, activity_id).price
+    return total
+
+
+def test_create_returns_full_itinerary_with_same_total(client, db):
+    payload = _itinerary(4)
+    response = client.post("/api/v1/itineraries/", json=payload)
+    assert response.status_code == 200
+    created = response.json()
+
+    assert created["total_price"] == _expected_total(db, payload)
+    assert [plan["day_number"] for plan in created["daily_plans"]] == [1, 2, 3, 4]
+    assert created == client.get(f"/api/v1/itineraries/{created['id']}").json()
+
+
+def test_create_statement_count_does_not_grow_with_days(client, count_queries):
+    counts = []
+    for days in (1, 7, 14):
+        with count_queries() as counter:
+            assert client.post("/api/v1/itineraries/", json=_itinerary(days)).status_code == 200
+        counts.append(counter.count)
+    assert len(set(counts)) == 1, counts
+
+
+def test_create_rejects_unknown_ids(client):
+    payload = _itinerary(2)
+    payload["daily_plans"][1]["activity_ids"] = [9999]
+    response = client.post("/api/v1/itineraries/", json=payload)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "One or more activity IDs not found"
@@ -0,0 +1,95 @@
+"""Flat single-query itinerary serializer shared by the MCP servers"""
+import anyio
+
+from app.mcp.serializer import MAX_BATCH_IDS, batch_itinerary_details, itinerary_detail, itinerary_details
+from app.models.models import Itinerary
+from claude_mcp_integration import _get_itinerary_details, get_itineraries_details
+
+
+def walk(itinerary, prices):
+    """The itinerary dict built by walking the ORM relationships"""
+    plans = []
+    for plan in sorted(itinerary.daily_plans, key=lambda x: x.day_number):
+        hotel = {"name": plan.hotel.name, "star_rating": plan.hotel.star_rating, "location": plan.hotel.location.name}
+        activities = [
+            {"name": a.name, "duration": a.duration, "type": a.activity_type, **({"price": a.price} if prices else {})}
+            for a in sorted(plan.activities, key=lambda a: a.id)
+        ]
+        daily_plan = {"day": plan.day_number, "hotel": hotel, "activities": activities, "notes": plan.notes}
+        if prices:
+            hotel["price_per_night"] = plan.hotel.price_per_night
+        if plan.transfer:
+            daily_plan["transfer"] = {
+                "type": plan.transfer.transfer_type,
+                "origin": plan.transfer.origin.name,
+                "destination": plan.transfer.destination.name,
+                "duration": plan.transfer.duration,
+                **({"price": plan.transfer.price} if prices else {}),
+            }
+        plans.append(daily_plan)
+    return {
+        "id": itinerary.id,
+        "name": itinerary.name,
+        "description": itinerary.description,
+        "nights": itinerary.nights,
+        "total_price": itinerary.total_price,
+        "daily_plans": plans,
+    }
+
+
+def test_matches_the_relationship_walk(db):
+    itineraries = db.query(Itinerary).order_by(Itinerary.id).all()
+    for prices in (False, True):
+        details = itinerary_details(db, prices=prices)
+        assert list(details) == [itinerary.id for itinerary in itineraries]
+        for itinerary in itineraries:
+            assert details[itinerary.id] == walk(itinerary, prices)
+
+
+def test_one_query_per_itinerary(db, count_queries):
+    db.expire_all()
+    for itinerary_id in (1, 2, 3):
+        with count_queries(db.get_bind()) as counter:
+            details = _get_itinerary_details(db, itinerary_id)
+        assert counter.count == 1
+        assert [plan["day"] for plan in details["daily_plans"]] == list(range(1, details["nights"] + 1))
+    assert _get_itinerary_details(db, 10 ** 6) == {"error": f"Itinerary with ID {10 ** 6} not found"}
+
+
+def test_itinerary_without_daily_plans(db):
+    itinerary = Itinerary(name="Empty", description="No plans yet", nights=2, total_price=0)
+    db.add(itinerary)
+    db.commit()
+    try:
+        assert itinerary_detail(db, itinerary.id)["daily_plans"] == []
+    finally:
+        db.delete(itinerary)
+        db.commit()
+
+
+def test_batch_details_in_one_query(db, count_queries):
+    with count_queries(db.get_bind()) as counter:
+        batch = batch_itinerary_details(db, [3, 1, 10 ** 6, 2, 3])
+    assert counter.count == 1
+    assert list(batch["itineraries"]) == [3, 1, 2] and batch["missing"] == [10 ** 6]
+    assert batch["itineraries"][1] == _get_itinerary_details(db, 1)
+
+    rows = {row["id"]: row for row in batch["comparison"]}
+    assert [row["id"] for row in batch["comparison"]] == [3, 1, 2]
+    for itinerary_id, itinerary in batch["itineraries"].items():
+        plans = itinerary["daily_plans"]
+        assert rows[itinerary_id]["total_price"] == itinerary["total_price"]
+        assert rows[itinerary_id]["activities"] == sum(len(plan["activities"]) for plan in plans)
+        stars = [plan["hotel"]["star_rating"] for plan in plans]
+        assert abs(rows[itinerary_id]["avg_star_rating"] - sum(stars) / len(stars)) < 0.01
+    assert batch["cheapest"] == min(rows.values(), key=lambda row: row["total_price"])["id"]
+
+
+def test_batch_tool_fields_and_validation():
+    batch = anyio.run(lambda: get_itineraries_details([1, 2], fields=["name", "total_price"]))
+    assert batch["itineraries"][1].keys() == {"id", "name", "total_price"}
+    # The comparison does not depend on the fields returned
+    assert all(row["activities"] > 0 for row in batch["comparison"])
+    assert "error" in anyio.run(lambda: get_itineraries_details([1], fields=["hotels"]))
+    assert "error" in anyio.run(lambda: get_itineraries_details([]))
+    assert "error" in anyio.run(lambda: get_itineraries_details(list(range(1, MAX_BATCH_IDS + 2))))
@@ -0,0 +1,96 @@
+"""Materialised itinerary document tests"""
+import json
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from app.api.documents import rebuild_stale_documents
+from app.database.db import engine
+from app.main import app
+from app.models.models import DailyPlan, Hotel, Itinerary, ItineraryDocument, ItinerarySearch
+
+
+def test_reads_are_served_from_stored_documents(client, db, count_queries):
+    with count_queries() as counter:
+        response = client.get("/api/v1/itineraries/", params={"limit": 7})
+    assert response.status_code == 200
+    # One query for the page keys and one for the stored documents
+    assert counter.count == 2
+
+    for itinerary in response.json():
+        document = db.get(ItineraryDocument, itinerary["id"])
+        assert json.loads(document.body) == itinerary
+
+
+def test_daily_plan_write_rebuilds_document(db):
+    plan = db.query(DailyPlan).filter(DailyPlan.itinerary_id == 2).first()
+    plan.notes = "Rebuilt by the document tests"
+    db.commit()
+
+    itinerary = db.get(Itinerary, 2)
+    document = db.get(ItineraryDocument, 2)
+    assert document.version == itinerary.version
+    assert "Rebuilt by the document tests" in document.body.decode()
+
+
+def test_catalog_price_change_rebuilds_documents(db):
+    hotel = db.get(Hotel, 1)
+    original_price = hotel.price_per_night
+    using = [plan.itinerary_id for plan in db.query(DailyPlan).filter(DailyPlan.hotel_id == 1)]
+    versions = {i: db.get(Itinerary, i).version for i in using}
+
+    try:
+        hotel.price_per_night = original_price + 1
+        db.commit()
+        for itinerary_id in using:
+            assert db.get(Itinerary, itinerary_id).version > versions[itinerary_id]
+            body = json.loads(db.get(ItineraryDocument, itinerary_id).body)
+            prices = {
+                plan["hotel"]["price_per_night"]
+                for plan in body["daily_plans"]
+                if plan["hotel"]["id"] == 1
+            }
+            assert prices == {original_price + 1}
+    finally:
+        hotel.price_per_night = original_price
+        db.commit()
+
+
+def test_catalog_edit_touches_itineraries_set_wise(client, db, count_queries):
+    from app.api.response_cache import response_cache
+
+    hotel = db.get(Hotel, 1)
+    original_price = hotel.price_per_night
+    using = sorted({plan.itinerary_id for plan in db.query(DailyPlan).filter(DailyPlan.hotel_id == 1)})
+    assert len(using) > 1
+    client.get(f"/api/v1/itineraries/{using[0]}")
+    db.expunge_all()
+    hotel = db.get(Hotel, 1)
+
+    try:
+        hotel.price_per_night = original_price + 2
+        with count_queries(db.get_bind()) as counter:
+            db.commit()
+        updates = [s for s in counter.statements if s.lstrip().upper().startswith("UPDATE ITINERARIES")]
+        # The reprice and the version bump, whatever the number of itineraries
+        assert len(updates) == 2
+        assert response_cache.get(("itinerary", using[0])) is None
+        for itinerary_id in using:
+            assert db.get(ItineraryDocument, itinerary_id).version == db.get(Itinerary, itinerary_id).version
+    finally:
+        hotel.price_per_night = original_price
+        db.commit()
+
+
+def test_startup_renders_only_missing_documents(db):
+    assert rebuild_stale_documents(db) == 0
+    # As left by bulk SQL, or by upgrading a database from before the documents
+    with engine.begin() as connection:
+        connection.execute(delete(ItineraryDocument.__table__).where(ItineraryDocument.itinerary_id == 2))
+        connection.execute(delete(ItinerarySearch.__table__).where(ItinerarySearch.itinerary_id == 3))
+    with TestClient(app) as client:
+        assert client.get("/api/v1/itineraries/2").status_code == 200
+    db.expire_all()
+    assert db.get(ItineraryDocument, 2).version == db.get(Itinerary, 2).version
+    assert db.get(ItinerarySearch, 3) is not None
+    assert rebuild_stale_documents(db) == 0
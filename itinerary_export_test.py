@@ -0,0 +1,68 @@
+"""NDJSON export tests"""
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+import app.api.routes as routes
+from app.database.db import engine
+from app.models.models import DailyPlan, Itinerary, utcnow
+
+
+def _export(client, **params):
+    response = client.get("/api/v1/itineraries/export", params=params)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return response, [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_export_streams_every_itinerary_in_batches(client, monkeypatch):
+    monkeypatch.setattr(routes, "EXPORT_BATCH_SIZE", 2)
+    _, exported = _export(client)
+    listed = client.get("/api/v1/itineraries/", params={"limit": 100}).json()
+
+    assert [i["id"] for i in exported] == sorted(i["id"] for i in listed)
+    by_id = {i["id"]: i for i in listed}
+    for itinerary in exported:
+        assert itinerary == by_id[itinerary["id"]]
+
+
+def test_export_filters(client):
+    _, exported = _export(client, nights=5, recommended_only=True)
+    assert exported
+    assert all(i["nights"] == 5 and i["is_recommended"] for i in exported)
+
+
+def test_incremental_export_skips_unchanged(client, db, monkeypatch):
+    monkeypatch.setattr(routes, "CHANGE_SAFETY_WINDOW", 0)
+    response, _ = _export(client)
+    watermark = response.headers["X-Export-Watermark"]
+
+    plan = db.query(DailyPlan).filter(DailyPlan.itinerary_id == 3).first()
+    plan.notes = "Changed after the export watermark"
+    db.commit()
+
+    _, exported = _export(client, since=watermark)
+    assert [i["id"] for i in exported] == [3]
+
+
+def test_incremental_export_reaches_back_for_late_commits(client, monkeypatch):
+    with engine.begin() as connection:
+        connection.execute(update(Itinerary.__table__).values(updated_at=utcnow() - timedelta(hours=2)))
+        connection.execute(
+            update(Itinerary.__table__).where(Itinerary.id == 1).values(updated_at=utcnow() - timedelta(hours=1))
+        )
+    response, _ = _export(client)
+    watermark = datetime.fromisoformat(response.headers["X-Export-Watermark"])
+    # Stamped at flush before the watermark was read, committed after it
+    with engine.begin() as connection:
+        connection.execute(
+            update(Itinerary.__table__).where(Itinerary.id == 4)
+            .values(updated_at=watermark - timedelta(seconds=30))
+        )
+
+    monkeypatch.setattr(routes, "CHANGE_SAFETY_WINDOW", 0)
+    assert _export(client, since=watermark.isoformat())[1] == []
+    monkeypatch.setattr(routes, "CHANGE_SAFETY_WINDOW", 60)
+    # Itinerary 1, updated at the watermark itself, is exported again
+    assert [i["id"] for i in _export(client, since=watermark.isoformat())[1]] == [4, 1]
@@ -0,0 +1,161 @@
+"""POST /itineraries/generate: constraint-based beam search over the catalog"""
+import asyncio
+import math
+import random
+from types import SimpleNamespace
+
+import pytest
+
+import app.api.routes as routes
+
+from app.api.generator import DAY_CANDIDATES, GeneratorCatalog, generate_itinerary
+from app.mcp.server import generate_custom_itinerary
+from app.models.models import Activity, Itinerary
+from conftest import APP_ENGINES
+
+URL = "/api/v1/itineraries/generate"
+
+
+@pytest.fixture
+def catalog(db):
+    return GeneratorCatalog.load(db)
+
+
+def check_feasible(catalog, plan, nights, max_hours):
+    """Every constraint the generator promises, checked against the catalog"""
+    hotel_locations = dict(zip(catalog.hotel_ids.tolist(), catalog.hotel_locations.tolist()))
+    transfers = {transfer_id: key for key, (transfer_id, _, _) in catalog.transfers.items()}
+    assert [day.day_number for day in plan.days] == list(range(1, nights + 1))
+    seen = []
+    previous = None
+    for day in plan.days:
+        location = hotel_locations[day.hotel_id]
+        if previous is None or previous == location:
+            assert day.transfer_id is None
+        else:
+            assert transfers[day.transfer_id] == (previous, location)
+        assert day.hours <= max_hours
+        seen.extend(day.activity_ids)
+        previous = location
+    assert len(seen) == len(set(seen))
+
+
+def test_plans_are_feasible(catalog):
+    for nights in (1, 3, 6):
+        plan = generate_itinerary(catalog, nights, max_hours_per_day=6)
+        assert plan.complete
+        check_feasible(catalog, plan, nights, 6)
+
+
+def test_budget_and_regions(catalog):
+    unconstrained = generate_itinerary(catalog, 4)
+    budget = unconstrained.total_price * 0.6
+    plan = generate_itinerary(catalog, 4, budget=budget, regions=["Krabi"])
+    assert plan.total_price <= budget
+    hotel_locations = dict(zip(catalog.hotel_ids.tolist(), catalog.hotel_locations.tolist()))
+    assert {catalog.regions[hotel_locations[day.hotel_id]] for day in plan.days} == {"Krabi"}
+    assert generate_itinerary(catalog, 4, budget=1) is None
+    assert generate_itinerary(catalog, 4, regions=["Bangkok"]) is None
+
+
+def test_interests_shift_the_plan(catalog, db):
+    types = dict(db.query(Activity.id, Activity.activity_type).all())
+
+    def cultural(plan):
+        return sum("culture" in types[a].lower() for day in plan.days for a in day.activity_ids)
+
+    plain = generate_itinerary(catalog, 3)
+    keen = generate_itinerary(catalog, 3, interests=["culture"])
+    assert cultural(keen) > cultural(plain)
+
+
+def test_time_budget_returns_best_so_far(catalog):
+    plan = generate_itinerary(catalog, 8, time_budget_ms=0)
+    assert not plan.complete
+    check_feasible(catalog, plan, 8, 10)
+
+
+def large_catalog(rng, locations=12, activities=1800, hotels=60):
+    """A catalog with 150 activities per location, every location linked to every other"""
+    types = ["Beach", "Cultural Tour", "Nature", "Water Sport", "Food & Culture"]
+    location_ids = range(1, locations + 1)
+    return GeneratorCatalog(
+        [(i, f"Region {i % 4}") for i in location_ids],
+        [
+            SimpleNamespace(id=i, name=f"Hotel {i}", location_id=1 + i % locations,
+                            price_per_night=rng.randint(50, 400), star_rating=rng.choice([3, 4, 5]))
+            for i in range(1, hotels + 1)
+        ],
+        [
+            SimpleNamespace(id=i, name=f"Activity {i}", location_id=1 + i % locations,
+                            activity_type=rng.choice(types), duration=rng.choice([1, 2, 3, 4]),
+                            price=rng.randint(10, 200))
+            for i in range(1, activities + 1)
+        ],
+        [
+            SimpleNamespace(id=origin * 100 + destination, origin_id=origin, destination_id=destination,
+                            duration=rng.uniform(0.5, 4), price=rng.randint(10, 100))
+            for origin in location_ids for destination in location_ids if origin != destination
+        ],
+    )
+
+
+def test_large_catalog():
+    catalog = large_catalog(random.Random(19))
+    # Per-location arrays only, however many combinations the activities allow
+    assert sum(len(local.ids) for local in catalog.activities.values()) == 1800
+    assert sum(len(combinations) for combinations in catalog.combinations) == sum(
+        math.comb(DAY_CANDIDATES, size) for size in (1, 2, 3)
+    )
+    beach = {
+        activity_id for local in catalog.activities.values()
+        for activity_id, type_id in zip(local.ids.tolist(), local.types.tolist())
+        if catalog.activity_types[type_id] == "Beach"
+    }
+    for nights in (2, 8):
+        plan = generate_itinerary(catalog, nights, interests=["beach"], max_hours_per_day=8)
+        check_feasible(catalog, plan, nights, 8)
+        # Every location has plenty of short beach activities to fill a day with
+        assert all(len(day.activity_ids) == 3 and set(day.activity_ids) <= beach for day in plan.days)
+    assert not generate_itinerary(catalog, 8, time_budget_ms=0).complete
+
+
+def test_generate_and_save(client, db):
+    body = {"nights": 3, "budget": 2000, "interests": ["beach"], "save": True, "name": "Generated"}
+    response = client.post(URL, json=body)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["complete"] and result["total_price"] <= 2000
+    assert len(result["itinerary"]["daily_plans"]) == 3
+    saved = db.get(Itinerary, result["id"])
+    try:
+        assert saved.name == "Generated"
+        assert saved.total_price == pytest.approx(result["total_price"])
+    finally:
+        db.delete(saved)
+        db.commit()
+
+
+def test_generate_only_reads_and_save_checks_the_catalog(client, catalog, count_queries, monkeypatch):
+    body = {"nights": 2, "interests": ["beach"]}
+    with count_queries(APP_ENGINES[0]) as writes:
+        assert client.post(URL, json=body).status_code == 200
+    assert writes.count == 0
+
+    # A plan from a catalog snapshot older than a hotel's deletion
+    plan = generate_itinerary(catalog, 2)
+    plan.days[0].hotel_id = 10 ** 6
+    monkeypatch.setattr(routes, "generate_itinerary", lambda *args, **kwargs: plan)
+    response = client.post(URL, json={**body, "save": True})
+    assert response.status_code == 400 and "hotel" in response.json()["detail"]
+
+
+def test_infeasible_and_invalid_requests(client):
+    assert client.post(URL, json={"nights": 3, "budget": 1}).status_code == 400
+    assert client.post(URL, json={"nights": 0}).status_code == 422
+
+
+def test_mcp_tool():
+    result = asyncio.run(generate_custom_itinerary(2, regions=["Phuket"]))
+    assert result["nights"] == 2 and all(day["hotel"] for day in result["days"])
+    assert "error" in asyncio.run(generate_custom_itinerary(2, budget=1))
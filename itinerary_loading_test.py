@@ -0,0 +1,45 @@
+"""Query-count tests for the itinerary read endpoints"""
+
+
+def test_list_query_count_is_constant_in_page_size(client, count_queries):
+    counts = []
+    for limit in (1, 3, 7):
+        with count_queries() as counter:
+            response = client.get("/api/v1/itineraries/", params={"limit": limit})
+        assert response.status_code == 200
+        assert len(response.json()) == limit
+        counts.append(counter.count)
+
+    assert len(set(counts)) == 1, counts
+    assert counts[0] <= 3
+
+
+def test_detail_query_count_is_constant(client, count_queries):
+    counts = []
+    for itinerary in client.get("/api/v1/itineraries/", params={"limit": 7}).json():
+        with count_queries() as counter:
+            response = client.get(f"/api/v1/itineraries/{itinerary['id']}")
+        assert response.status_code == 200
+        counts.append(counter.count)
+
+    assert len(set(counts)) == 1, counts
+
+
+def test_daily_plans_are_ordered_by_day(client):
+    for itinerary in client.get("/api/v1/itineraries/", params={"limit": 7}).json():
+        days = [plan["day_number"] for plan in itinerary["daily_plans"]]
+        assert days == sorted(days)
+
+
+def test_summary_view_is_a_single_query(client, count_queries):
+    full = client.get("/api/v1/itineraries/", params={"limit": 7}).json()
+    with count_queries() as counter:
+        response = client.get("/api/v1/itineraries/", params={"limit": 7, "view": "summary"})
+    assert response.status_code == 200
+    assert counter.count == 1
+
+    summary = response.json()
+    assert [s["id"] for s in summary] == [i["id"] for i in full]
+    for s, i in zip(summary, full):
+        assert set(s) == {"id", "name", "nights", "total_price", "is_recommended", "num_daily_plans"}
+        assert s["num_daily_plans"] == len(i["daily_plans"])
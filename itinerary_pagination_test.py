@@ -0,0 +1,48 @@
+"""Keyset pagination tests for GET /itineraries/"""
+
+LIST_URL = "/api/v1/itineraries/"
+
+
+def _walk(client, **params):
+    pages = []
+    cursor = None
+    while True:
+        query = dict(params, limit=2)
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get(LIST_URL, params=query)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+
+
+def test_cursor_walk_matches_single_ordered_page(client):
+    full = client.get(LIST_URL, params={"limit": 100}).json()
+    keys = [(i["nights"], i["total_price"], i["id"]) for i in full]
+    assert keys == sorted(keys)
+
+    walked = [i["id"] for page in _walk(client) for i in page]
+    assert walked == [i["id"] for i in full]
+
+
+def test_cursor_respects_filters(client):
+    for page in _walk(client, recommended_only=True, nights=5):
+        for itinerary in page:
+            assert itinerary["nights"] == 5
+            assert itinerary["is_recommended"]
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.get(LIST_URL, params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_limit_is_capped(client, monkeypatch):
+    import app.api.routes as routes
+
+    monkeypatch.setattr(routes, "MAX_PAGE_SIZE", 2)
+    response = client.get(LIST_URL, params={"limit": 50})
+    assert len(response.json()) == 2
+    assert response.headers.get("X-Next-Cursor")
@@ -0,0 +1,72 @@
+"""GET /itineraries/search over the denormalised itinerary_search table"""
+from app.api.search import search_values
+from app.database.loaders import itinerary_graph_options
+from app.models.models import Hotel, Itinerary, ItinerarySearch
+
+URL = "/api/v1/itineraries/search"
+
+
+def walk(client, **params):
+    """Follow X-Next-Cursor through every page"""
+    results, cursor = [], None
+    while True:
+        response = client.get(URL, params={**params, "limit": 2, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        results += response.json()
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return results
+
+
+def expected_ids(db, predicate):
+    itineraries = db.query(Itinerary).options(*itinerary_graph_options()).all()
+    return {i.id for i in itineraries if predicate(search_values(i))}
+
+
+def test_every_itinerary_has_a_search_row(db):
+    assert db.query(ItinerarySearch).count() == db.query(Itinerary).count()
+
+
+def test_pages_follow_the_sort_order(client, db):
+    by_price = walk(client)
+    assert [(r["total_price"], r["id"]) for r in by_price] == sorted((r["total_price"], r["id"]) for r in by_price)
+    assert len({r["id"] for r in by_price}) == db.query(Itinerary).count()
+
+    by_nights = walk(client, sort="nights")
+    keys = [(r["nights"], r["total_price"], r["id"]) for r in by_nights]
+    assert keys == sorted(keys)
+
+
+def test_filters_match_the_itinerary_graphs(client, db):
+    cases = [
+        ({"min_price": 300, "max_price": 1500}, lambda v: 300 <= v["total_price"] <= 1500),
+        ({"region": "Phuket"}, lambda v: v["regions"] == ",Phuket,"),
+        ({"region": "both"}, lambda v: v["region_count"] > 1),
+        ({"min_star": 4}, lambda v: v["min_star"] is not None and v["min_star"] >= 4),
+        ({"activity_type": ["Beach", "Nightlife"]}, lambda v: ",Beach," in v["activity_types"] and ",Nightlife," in v["activity_types"]),
+        ({"boat_transfer": True}, lambda v: v["has_boat_transfer"]),
+        ({"boat_transfer": False, "nights": 3}, lambda v: not v["has_boat_transfer"] and v["nights"] == 3),
+    ]
+    for params, predicate in cases:
+        found = {r["id"] for r in walk(client, **params)}
+        assert found == expected_ids(db, predicate), params
+        assert found, params
+
+
+def test_search_rows_follow_catalog_writes(client, db):
+    hotel = db.get(Hotel, 1)
+    original = hotel.star_rating
+    try:
+        hotel.star_rating = 1.0
+        db.commit()
+        results = walk(client, region="Phuket")
+        using = {r["id"] for r in results if r["min_star"] == 1.0}
+        assert using
+        assert not using & {r["id"] for r in walk(client, min_star=2)}
+    finally:
+        hotel.star_rating = original
+        db.commit()
+
+
+def test_invalid_cursor_is_rejected(client):
+    assert client.get(URL, params={"cursor": "not-a-cursor"}).status_code == 400
@@ -0,0 +1,98 @@
+"""Simultaneous MCP tool calls on per-call sessions"""
+import tracemalloc
+from types import SimpleNamespace
+
+import anyio
+from sqlalchemy import event
+
+from app.mcp.server import (
+    app_lifespan,
+    db_slots,
+    find_nearby,
+    get_recommended_itinerary,
+    mcp,
+    rank_recommended_itineraries,
+    search_catalog,
+)
+from conftest import APP_ENGINES
+from config import MCP_DB_THREADS
+
+CALLS = 100
+ROUNDS = 5
+TOOLS = 4
+
+
+def tool_calls(ctx):
+    """CALLS calls spread over the TOOLS tools that query the database"""
+    calls = [
+        lambda: get_recommended_itinerary(4, ctx=ctx, budget=1500, interests=["beach"]),
+        lambda: rank_recommended_itineraries(ctx=ctx, interests=["culture"], pace="balanced", k=5),
+        lambda: search_catalog("beach resort"),
+        lambda: find_nearby(7.88, 98.39, radius_km=50),
+    ]
+    return [calls[n % len(calls)] for n in range(CALLS)]
+
+
+class ConnectionGauge:
+    """Connections checked out of the app engines' pools, now and at most"""
+
+    def __init__(self):
+        self.open = self.peak = 0
+
+    def checkout(self, *args):
+        self.open += 1
+        self.peak = max(self.peak, self.open)
+
+    def checkin(self, *args):
+        self.open -= 1
+
+    def __enter__(self):
+        for bind in set(APP_ENGINES):
+            event.listen(bind, "checkout", self.checkout)
+            event.listen(bind, "checkin", self.checkin)
+        return self
+
+    def __exit__(self, *exc):
+        for bind in set(APP_ENGINES):
+            event.remove(bind, "checkout", self.checkout)
+            event.remove(bind, "checkin", self.checkin)
+
+
+def test_simultaneous_calls_stay_within_the_limiter_and_match_serial_calls():
+    async def run():
+        async with app_lifespan(mcp) as lifespan:
+            ctx = SimpleNamespace(request_context=SimpleNamespace(lifespan_context=lifespan))
+            calls = tool_calls(ctx)
+            # One call of each kind at a time, also warming the ranking matrix
+            expected = [await tool() for tool in calls[:TOOLS]]
+            for _ in range(ROUNDS):
+                results = [None] * CALLS
+
+                async def call(n, tool):
+                    results[n] = await tool()
+
+                async with anyio.create_task_group() as tasks:
+                    for n, tool in enumerate(calls):
+                        tasks.start_soon(call, n, tool)
+                for n, result in enumerate(results):
+                    assert result == expected[n % TOOLS]
+                # Keep only what is checked, so the memory measured is the server's
+                del results
+                memory.append(tracemalloc.get_traced_memory()[0])
+            return expected
+
+    memory = []
+    tracemalloc.start()
+    try:
+        with ConnectionGauge() as gauge:
+            expected = anyio.run(run)
+    finally:
+        tracemalloc.stop()
+
+    assert not any("error" in result for result in expected)
+    # Calls overlapped on separate connections, never more than the limiter allows
+    assert 1 < gauge.peak <= MCP_DB_THREADS == db_slots.total_tokens
+    assert gauge.open == 0
+    # After the first concurrent round fills the statement caches, the memory
+    # held does not grow from round to round
+    assert memory[-1] - memory[1] < 2 * 1024 * 1024
@@ -20,6 +20,23 @@ API_SERVER_PROCESS = None
 MCP_SERVER_RUNNING = False
 API_SERVER_RUNNING = False
 API_BASE_URL = "http://127.0.0.1:8000/api/v1"
+# Responses cached by URL and params, revalidated with If-None-Match
+_ETAG_CACHE = {}
+
+def cached_get(url, params=None):
+    """GET a JSON resource, reusing the cached body when the server answers 304"""
+    key = (url, tuple(sorted((params or {}).items())))
+    cached = _ETAG_CACHE.get(key)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+    response = requests.get(url, params=params, headers=headers)
+    if response.status_code == 304 and cached:
+        return 200, cached[1]
+    if response.status_code != 200:
+        return response.status_code, None
+    data = response.json()
+    if response.headers.get("ETag"):
+        _ETAG_CACHE[key] = (response.headers["ETag"], data)
+    return 200, data
 
 def start_mcp_server():
     """Start the MCP server in a separate process"""
@@ -85,8 +102,8 @@ def fetch_itineraries(nights=None, recommended_only=False):
         params["recommended_only"] = "true"
     
     try:
-        response = requests.get(f"{API_BASE_URL}/itineraries/", params=params)
-        return response.json() if response.status_code == 200 else None
+        _, data = cached_get(f"{API_BASE_URL}/itineraries/", params=params)
+        return data
     except Exception as e:
         st.error(f"Error fetching itineraries: {str(e)}")
         return None
@@ -94,8 +111,8 @@ def fetch_itineraries(nights=None, recommended_only=False):
 def fetch_itinerary_details(itinerary_id):
     """Fetch details of a specific itinerary"""
     try:
-        response = requests.get(f"{API_BASE_URL}/itineraries/{itinerary_id}")
-        return response.json() if response.status_code == 200 else None
+        _, data = cached_get(f"{API_BASE_URL}/itineraries/{itinerary_id}")
+        return data
     except Exception as e:
         st.error(f"Error fetching itinerary details: {str(e)}")
         return None
@@ -0,0 +1,72 @@
+"""Cursor-paginated, size-budgeted pages of the MCP list tools"""
+import anyio
+
+from app.mcp.paging import find_itineraries_page, locations_page, serialized_size, shorten
+from app.models.models import Itinerary, Location
+from claude_mcp_integration import find_itineraries
+
+
+def all_pages(page_fn, key, **kwargs):
+    pages, cursor = [], None
+    while True:
+        page = page_fn(cursor=cursor, **kwargs)
+        pages.append(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages, [item for page in pages for item in page[key]]
+
+
+def test_cursor_walks_every_itinerary_once(db):
+    expected = [
+        row.id for row in db.query(Itinerary.id)
+        .filter(Itinerary.is_recommended == True)
+        .order_by(Itinerary.nights, Itinerary.total_price, Itinerary.id)
+    ]
+    pages, items = all_pages(lambda **kwargs: find_itineraries_page(db, **kwargs), "itineraries", limit=2)
+    assert [item["id"] for item in items] == expected
+    assert all(len(page["itineraries"]) <= 2 for page in pages)
+    assert len(pages) == (len(expected) + 1) // 2
+
+
+def test_budget_shortens_descriptions_before_ending_the_page(db):
+    full = locations_page(db, limit=100, max_bytes=10 ** 6)
+    assert full["next_cursor"] is None and full["shortened_descriptions"] == 0
+
+    pages, items = all_pages(lambda **kwargs: locations_page(db, **kwargs), "locations", limit=100, max_bytes=300)
+    assert [item["id"] for item in items] == [item["id"] for item in full["locations"]]
+    assert len(pages) > 1 and sum(page["shortened_descriptions"] for page in pages) > 0
+    for page in pages:
+        assert page["bytes"] <= 300 or len(page["locations"]) == 1
+        assert page["bytes"] == sum(serialized_size(item) for item in page["locations"])
+    # Names and regions are always kept; only descriptions shrink
+    originals = {item["id"]: item for item in full["locations"]}
+    for item in items:
+        original = originals[item["id"]]
+        assert (item["name"], item["region"]) == (original["name"], original["region"])
+        if "description" in item:
+            assert len(item["description"]) <= len(original["description"])
+
+
+def test_detail_levels_and_one_streamed_query(db, count_queries):
+    with count_queries(db.get_bind()) as counter:
+        page = locations_page(db, limit=3, detail="minimal")
+    assert counter.count == 1
+    assert len(page["locations"]) == 3 and page["next_cursor"]
+    assert all("description" not in item for item in page["locations"])
+
+    brief = locations_page(db, limit=50, detail="brief")["locations"]
+    assert all(len(item["description"]) <= 240 for item in brief if item["description"])
+    assert db.query(Location).count() == len(brief)
+
+
+def test_shorten():
+    assert shorten("Sandy beach with clear water", 100) == "Sandy beach with clear water"
+    assert shorten("Sandy beach with clear water", 14) == "Sandy beach…"
+    assert shorten(None, 10) is None
+
+
+def test_tool_arguments():
+    page = anyio.run(lambda: find_itineraries(nights=4, limit=1))
+    assert len(page["itineraries"]) == 1 and page["itineraries"][0]["nights"] == 4
+    assert "error" in anyio.run(lambda: find_itineraries(detail="verbose"))
+    assert anyio.run(lambda: find_itineraries(cursor="not-a-cursor")) == {"error": "Invalid pagination cursor"}
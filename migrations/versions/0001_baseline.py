@@ -0,0 +1,99 @@
+"""Baseline schema as created by initialize_db.py before migrations existed
+
+Databases created before migrations already have these tables; they are only
+created where missing, so `alembic upgrade head` works on both old and empty
+databases.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _create_table(name, *columns):
+    if not sa.inspect(op.get_bind()).has_table(name):
+        op.create_table(name, *columns)
+        op.create_index(f"ix_{name}_id", name, ["id"])
+
+
+def upgrade():
+    _create_table(
+        "locations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("region", sa.String(100), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("latitude", sa.Float()),
+        sa.Column("longitude", sa.Float()),
+    )
+    _create_table(
+        "itineraries",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("nights", sa.Integer(), nullable=False),
+        sa.Column("total_price", sa.Float()),
+        sa.Column("is_recommended", sa.Boolean()),
+    )
+    _create_table(
+        "hotels",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("star_rating", sa.Float()),
+        sa.Column("location_id", sa.Integer(), sa.ForeignKey("locations.id"), nullable=False),
+        sa.Column("address", sa.String(200)),
+        sa.Column("price_per_night", sa.Float()),
+        sa.Column("amenities", sa.Text()),
+        sa.Column("image_url", sa.String(255)),
+    )
+    _create_table(
+        "activities",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("duration", sa.Float()),
+        sa.Column("price", sa.Float()),
+        sa.Column("location_id", sa.Integer(), sa.ForeignKey("locations.id"), nullable=False),
+        sa.Column("image_url", sa.String(255)),
+        sa.Column("activity_type", sa.String(50)),
+    )
+    _create_table(
+        "transfers",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("origin_id", sa.Integer(), sa.ForeignKey("locations.id"), nullable=False),
+        sa.Column("destination_id", sa.Integer(), sa.ForeignKey("locations.id"), nullable=False),
+        sa.Column("transfer_type", sa.String(50)),
+        sa.Column("duration", sa.Float()),
+        sa.Column("price", sa.Float()),
+        sa.Column("description", sa.Text()),
+    )
+    _create_table(
+        "daily_plans",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("day_number", sa.Integer(), nullable=False),
+        sa.Column("itinerary_id", sa.Integer(), sa.ForeignKey("itineraries.id"), nullable=False),
+        sa.Column("hotel_id", sa.Integer(), sa.ForeignKey("hotels.id"), nullable=False),
+        sa.Column("transfer_id", sa.Integer(), sa.ForeignKey("transfers.id")),
+        sa.Column("notes", sa.Text()),
+    )
+    if not sa.inspect(op.get_bind()).has_table("daily_plan_activity"):
+        op.create_table(
+            "daily_plan_activity",
+            sa.Column("daily_plan_id", sa.Integer(), sa.ForeignKey("daily_plans.id")),
+            sa.Column("activity_id", sa.Integer(), sa.ForeignKey("activities.id")),
+        )
+
+
+def downgrade():
+    for name in (
+        "daily_plan_activity", "daily_plans", "transfers", "activities", "hotels", "itineraries", "locations"
+    ):
+        op.drop_table(name)
@@ -0,0 +1,51 @@
+"""Itinerary version/updated_at, keyset pagination index and stored documents
+
+Existing itineraries start at version 1. Their documents are rendered on read
+until `python rebuild_documents.py` stores them.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite needs a default to add NOT NULL columns to existing rows; the
+    # batch recreate afterwards drops it again so the table matches the model
+    with op.batch_alter_table("itineraries") as batch:
+        batch.add_column(sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+        batch.add_column(sa.Column(
+            "updated_at", sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()
+        ))
+    with op.batch_alter_table("itineraries", recreate="always") as batch:
+        batch.alter_column("version", server_default=None)
+        batch.alter_column("updated_at", server_default=None)
+    op.create_index("ix_itineraries_keyset", "itineraries", ["nights", "total_price", "id"])
+
+    op.create_table(
+        "itinerary_documents",
+        sa.Column(
+            "itinerary_id",
+            sa.Integer(),
+            sa.ForeignKey("itineraries.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("body", sa.LargeBinary(), nullable=False),
+        sa.Column("built_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("itinerary_documents")
+    op.drop_index("ix_itineraries_keyset", table_name="itineraries")
+    with op.batch_alter_table("itineraries") as batch:
+        batch.drop_column("updated_at")
+        batch.drop_column("version")
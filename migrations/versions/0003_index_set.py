@@ -0,0 +1,56 @@
+"""Indexes for the hot filters and a primary key on daily_plan_activity
+
+Duplicate or incomplete activity links are removed before the composite
+primary key is added.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_itineraries_recommended", "itineraries", ["is_recommended", "nights", "total_price", "id"]),
+    ("ix_itineraries_updated_at", "itineraries", ["updated_at"]),
+    ("ix_daily_plans_itinerary_day", "daily_plans", ["itinerary_id", "day_number"]),
+    ("ix_daily_plans_hotel_id", "daily_plans", ["hotel_id"]),
+    ("ix_daily_plans_transfer_id", "daily_plans", ["transfer_id"]),
+    ("ix_hotels_location_id", "hotels", ["location_id"]),
+    ("ix_activities_location_id", "activities", ["location_id"]),
+    ("ix_transfers_route", "transfers", ["origin_id", "destination_id"]),
+    ("ix_transfers_destination_id", "transfers", ["destination_id"]),
+    ("ix_locations_region", "locations", ["region"]),
+]
+
+
+def upgrade():
+    op.execute(
+        "DELETE FROM daily_plan_activity "
+        "WHERE daily_plan_id IS NULL OR activity_id IS NULL "
+        "OR rowid NOT IN ("
+        "SELECT min(rowid) FROM daily_plan_activity GROUP BY daily_plan_id, activity_id)"
+    )
+    with op.batch_alter_table("daily_plan_activity", recreate="always") as batch:
+        batch.alter_column("daily_plan_id", existing_type=sa.Integer(), nullable=False)
+        batch.alter_column("activity_id", existing_type=sa.Integer(), nullable=False)
+        batch.create_primary_key("pk_daily_plan_activity", ["daily_plan_id", "activity_id"])
+    op.create_index("ix_daily_plan_activity_activity_id", "daily_plan_activity", ["activity_id"])
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    op.drop_index("ix_daily_plan_activity_activity_id", table_name="daily_plan_activity")
+    with op.batch_alter_table("daily_plan_activity", recreate="always") as batch:
+        batch.drop_constraint("pk_daily_plan_activity", type_="primary")
+        batch.alter_column("daily_plan_id", existing_type=sa.Integer(), nullable=True)
+        batch.alter_column("activity_id", existing_type=sa.Integer(), nullable=True)
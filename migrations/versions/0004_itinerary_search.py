@@ -0,0 +1,47 @@
+"""Denormalised itinerary_search table for /itineraries/search
+
+The rows are derived from the itinerary graphs in Python, so they are filled
+by `python rebuild_documents.py` after upgrading, like the documents.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "itinerary_search",
+        sa.Column(
+            "itinerary_id",
+            sa.Integer(),
+            sa.ForeignKey("itineraries.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("nights", sa.Integer(), nullable=False),
+        sa.Column("total_price", sa.Float(), nullable=False),
+        sa.Column("is_recommended", sa.Boolean(), nullable=False),
+        sa.Column("regions", sa.String(200), nullable=False),
+        sa.Column("region_count", sa.Integer(), nullable=False),
+        sa.Column("min_star", sa.Float()),
+        sa.Column("max_star", sa.Float()),
+        sa.Column("activity_types", sa.Text(), nullable=False),
+        sa.Column("transfer_types", sa.Text(), nullable=False),
+        sa.Column("has_boat_transfer", sa.Boolean(), nullable=False),
+    )
+    op.create_index("ix_itinerary_search_price", "itinerary_search", ["total_price", "itinerary_id"])
+    op.create_index(
+        "ix_itinerary_search_nights", "itinerary_search", ["nights", "total_price", "itinerary_id"]
+    )
+
+
+def downgrade():
+    op.drop_table("itinerary_search")
@@ -0,0 +1,87 @@
+"""Full-text index over locations, hotels and activities (catalog_fts)
+
+An FTS5 table kept in sync by triggers on the three catalog tables, filled
+from the existing rows. Rowids encode the entity as id * 3 + 0/1/2 for a
+location/hotel/activity.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+INSERT = "INSERT INTO catalog_fts (rowid, entity_type, name, description, details, place)"
+ROWS = {
+    "location": """
+        SELECT l.id * 3, 'location', l.name, coalesce(l.description, ''), '', l.region
+        FROM locations l""",
+    "hotel": """
+        SELECT h.id * 3 + 1, 'hotel', h.name, coalesce(h.description, ''),
+               coalesce(h.amenities, ''), l.name || ' ' || l.region
+        FROM hotels h JOIN locations l ON l.id = h.location_id""",
+    "activity": """
+        SELECT a.id * 3 + 2, 'activity', a.name, coalesce(a.description, ''),
+               coalesce(a.activity_type, ''), l.name || ' ' || l.region
+        FROM activities a JOIN locations l ON l.id = a.location_id""",
+}
+
+TRIGGERS = {
+    "catalog_fts_location_insert": f"""AFTER INSERT ON locations BEGIN
+        {INSERT} {ROWS["location"]} WHERE l.id = new.id;
+    END""",
+    "catalog_fts_location_update": f"""AFTER UPDATE OF id, name, description, region ON locations BEGIN
+        DELETE FROM catalog_fts WHERE rowid = old.id * 3;
+        DELETE FROM catalog_fts WHERE rowid IN (SELECT id * 3 + 1 FROM hotels WHERE location_id = new.id);
+        DELETE FROM catalog_fts WHERE rowid IN (SELECT id * 3 + 2 FROM activities WHERE location_id = new.id);
+        {INSERT} {ROWS["location"]} WHERE l.id = new.id;
+        {INSERT} {ROWS["hotel"]} WHERE h.location_id = new.id;
+        {INSERT} {ROWS["activity"]} WHERE a.location_id = new.id;
+    END""",
+    "catalog_fts_location_delete": """AFTER DELETE ON locations BEGIN
+        DELETE FROM catalog_fts WHERE rowid = old.id * 3;
+    END""",
+    "catalog_fts_hotel_insert": f"""AFTER INSERT ON hotels BEGIN
+        {INSERT} {ROWS["hotel"]} WHERE h.id = new.id;
+    END""",
+    "catalog_fts_hotel_update": f"""AFTER UPDATE OF id, name, description, amenities, location_id ON hotels BEGIN
+        DELETE FROM catalog_fts WHERE rowid = old.id * 3 + 1;
+        {INSERT} {ROWS["hotel"]} WHERE h.id = new.id;
+    END""",
+    "catalog_fts_hotel_delete": """AFTER DELETE ON hotels BEGIN
+        DELETE FROM catalog_fts WHERE rowid = old.id * 3 + 1;
+    END""",
+    "catalog_fts_activity_insert": f"""AFTER INSERT ON activities BEGIN
+        {INSERT} {ROWS["activity"]} WHERE a.id = new.id;
+    END""",
+    "catalog_fts_activity_update": f"""AFTER UPDATE OF id, name, description, activity_type, location_id ON activities BEGIN
+        DELETE FROM catalog_fts WHERE rowid = old.id * 3 + 2;
+        {INSERT} {ROWS["activity"]} WHERE a.id = new.id;
+    END""",
+    "catalog_fts_activity_delete": """AFTER DELETE ON activities BEGIN
+        DELETE FROM catalog_fts WHERE rowid = old.id * 3 + 2;
+    END""",
+}
+
+
+def upgrade():
+    op.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS catalog_fts USING fts5(
+        entity_type UNINDEXED, name, description, details, place,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )""")
+    op.execute("INSERT INTO catalog_fts (catalog_fts, rank) VALUES ('rank', 'bm25(0.0, 10.0, 4.0, 2.0, 1.0)')")
+    for name, body in TRIGGERS.items():
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    op.execute("DELETE FROM catalog_fts")
+    for rows in ROWS.values():
+        op.execute(f"{INSERT} {rows}")
+
+
+def downgrade():
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.execute("DROP TABLE IF EXISTS catalog_fts")
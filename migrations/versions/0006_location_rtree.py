@@ -0,0 +1,48 @@
+"""R*Tree spatial index over location coordinates (location_rtree)
+
+One point-sized box per location with coordinates, keyed by location id,
+kept in sync by triggers and filled from the existing rows.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+ROWS = """
+    SELECT id, latitude, latitude, longitude, longitude FROM locations
+    WHERE latitude IS NOT NULL AND longitude IS NOT NULL"""
+
+TRIGGERS = {
+    "location_rtree_insert": f"""AFTER INSERT ON locations BEGIN
+        INSERT INTO location_rtree {ROWS} AND id = new.id;
+    END""",
+    "location_rtree_update": f"""AFTER UPDATE OF id, latitude, longitude ON locations BEGIN
+        DELETE FROM location_rtree WHERE id = old.id;
+        INSERT INTO location_rtree {ROWS} AND id = new.id;
+    END""",
+    "location_rtree_delete": """AFTER DELETE ON locations BEGIN
+        DELETE FROM location_rtree WHERE id = old.id;
+    END""",
+}
+
+
+def upgrade():
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS location_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon)"
+    )
+    for name, body in TRIGGERS.items():
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    op.execute("DELETE FROM location_rtree")
+    op.execute(f"INSERT INTO location_rtree {ROWS}")
+
+
+def downgrade():
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.execute("DROP TABLE IF EXISTS location_rtree")
@@ -0,0 +1,55 @@
+"""The Alembic migrations produce the schema declared by the models"""
+import sqlite3
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine
+
+from app.database.db import Base
+from app.database.migrations import alembic_config, include_name
+
+
+def upgrade(url, revision="head"):
+    config = alembic_config(url)
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, revision)
+
+
+def test_migrations_match_the_models(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    upgrade(url)
+    engine = create_engine(url)
+    try:
+        with engine.connect() as connection:
+            assert compare_metadata(
+                MigrationContext.configure(connection, opts={"include_name": include_name}), Base.metadata
+            ) == []
+    finally:
+        engine.dispose()
+
+
+def test_upgrade_from_baseline_keeps_data_and_drops_duplicate_links(tmp_path):
+    path = tmp_path / "legacy.db"
+    url = f"sqlite:///{path}"
+    upgrade(url, "0001")
+    with sqlite3.connect(path) as connection:
+        connection.executescript("""
+            INSERT INTO locations (id, name, region) VALUES (1, 'Patong', 'Phuket');
+            INSERT INTO hotels (id, name, location_id, price_per_night) VALUES (1, 'Hotel', 1, 100);
+            INSERT INTO activities (id, name, location_id, price) VALUES (1, 'Dive', 1, 50);
+            INSERT INTO itineraries (id, name, nights, total_price) VALUES (1, 'Trip', 2, 250);
+            INSERT INTO daily_plans (id, day_number, itinerary_id, hotel_id) VALUES (1, 1, 1, 1);
+            INSERT INTO daily_plan_activity VALUES (1, 1), (1, 1), (NULL, 1);
+        """)
+    upgrade(url)
+    connection = sqlite3.connect(path)
+    try:
+        assert connection.execute("SELECT version FROM itineraries").fetchall() == [(1,)]
+        assert connection.execute("SELECT * FROM daily_plan_activity").fetchall() == [(1, 1)]
+        # The catalog full-text index is filled from the existing rows
+        assert connection.execute("SELECT rowid, entity_type FROM catalog_fts ORDER BY rowid").fetchall() == [
+            (3, "location"), (4, "hotel"), (5, "activity")
+        ]
+    finally:
+        connection.close()
@@ -0,0 +1,78 @@
+"""GET /locations/nearby over the location_rtree spatial index"""
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from app.api.nearby import bounding_box, haversine_km
+from app.mcp.server import find_nearby
+from app.models.models import Location
+
+URL = "/api/v1/locations/nearby"
+PATONG = (7.8949, 98.2970)
+
+
+def brute_force(db, lat, lon, radius_km):
+    """Every location within the radius, by scanning the table"""
+    distances = [
+        (haversine_km(lat, lon, location.latitude, location.longitude), location.id)
+        for location in db.query(Location).filter(Location.latitude.isnot(None))
+    ]
+    return [location_id for distance, location_id in sorted(distances) if distance <= radius_km]
+
+
+def test_haversine_and_bounding_box():
+    # Patong to Krabi Town is about 70 km as the crow flies
+    assert haversine_km(*PATONG, 8.0863, 98.9063) == pytest.approx(70.4, abs=1)
+    min_lat, max_lat, min_lon, max_lon = bounding_box(*PATONG, 10)
+    assert min_lat < PATONG[0] < max_lat and min_lon < PATONG[1] < max_lon
+    assert bounding_box(89.9, 0, 50)[2:] == (-180.0, 180.0)
+
+
+@pytest.mark.parametrize("radius_km", [1, 15, 60, 500])
+def test_locations_match_a_full_scan(client, db, radius_km):
+    response = client.get(URL, params={"lat": PATONG[0], "lon": PATONG[1], "radius_km": radius_km, "k": 50})
+    assert response.status_code == 200
+    locations = response.json()["locations"]
+    assert [r["id"] for r in locations] == brute_force(db, *PATONG, radius_km)
+    assert all(r["distance_km"] <= radius_km for r in locations)
+
+
+def test_hotels_and_activities_follow_their_location(client):
+    body = client.get(URL, params={"lat": PATONG[0], "lon": PATONG[1], "radius_km": 20, "k": 3}).json()
+    assert all(len(body[kind]) <= 3 for kind in ("locations", "hotels", "activities"))
+    distances = {r["id"]: r["distance_km"] for r in client.get(
+        URL, params={"lat": PATONG[0], "lon": PATONG[1], "radius_km": 20, "k": 50}
+    ).json()["locations"]}
+    for hotel in body["hotels"]:
+        assert hotel["distance_km"] == distances[hotel["location_id"]]
+    assert [h["distance_km"] for h in body["hotels"]] == sorted(h["distance_km"] for h in body["hotels"])
+    assert body["hotels"][0]["location_id"] == 1  # Patong Beach itself
+
+
+def test_index_follows_coordinate_writes(client, db):
+    location = db.get(Location, 9)
+    original = (location.latitude, location.longitude)
+    try:
+        location.latitude, location.longitude = 7.8950, 98.2971
+        db.commit()
+        ids = [r["id"] for r in client.get(URL, params={"lat": PATONG[0], "lon": PATONG[1], "radius_km": 1}).json()["locations"]]
+        assert 9 in ids
+    finally:
+        location.latitude, location.longitude = original
+        db.commit()
+    assert db.execute(text("SELECT count(*) FROM location_rtree")).scalar() == db.query(Location).filter(
+        Location.latitude.isnot(None)
+    ).count()
+
+
+def test_invalid_coordinates_are_rejected(client):
+    assert client.get(URL, params={"lat": 91, "lon": 0}).status_code == 422
+    assert client.get(URL, params={"lat": 0, "lon": 0, "radius_km": 0}).status_code == 422
+
+
+def test_mcp_tool():
+    result = asyncio.run(find_nearby(*PATONG, radius_km=30, k=2))
+    assert result["locations"][0]["id"] == 1
+    assert len(result["hotels"]) <= 2
+    assert asyncio.run(find_nearby(100, 0))["error"]
@@ -0,0 +1,93 @@
+"""Set-based repricing of stored itinerary totals"""
+import json
+
+from sqlalchemy import text
+
+from app.api.documents import rebuild_documents
+from app.api.pricing import audit_prices, reprice_itineraries
+from app.models.models import Activity, DailyPlan, Itinerary, ItineraryDocument, daily_plan_activity
+
+
+def stored_totals(db):
+    return dict(db.query(Itinerary.id, Itinerary.total_price))
+
+
+def test_seeded_totals_have_no_drift(db):
+    assert audit_prices(db) == []
+
+
+def test_activity_price_change_reprices_itineraries_using_it(db):
+    activity = db.get(Activity, 2)
+    original_price = activity.price
+    using = {
+        plan.itinerary_id
+        for plan in db.query(DailyPlan).join(
+            daily_plan_activity, daily_plan_activity.c.daily_plan_id == DailyPlan.id
+        ).filter(daily_plan_activity.c.activity_id == 2)
+    }
+    links = {
+        itinerary_id: count
+        for itinerary_id, count in db.execute(text(
+            "SELECT itinerary_id, count(*) FROM daily_plans "
+            "JOIN daily_plan_activity ON daily_plan_id = daily_plans.id "
+            "WHERE activity_id = 2 GROUP BY itinerary_id"
+        ))
+    }
+    before = stored_totals(db)
+
+    try:
+        activity.price = original_price + 10
+        db.commit()
+        after = stored_totals(db)
+        for itinerary_id, total in before.items():
+            expected = total + 10 * links.get(itinerary_id, 0)
+            assert after[itinerary_id] == expected, itinerary_id
+        for itinerary_id in using:
+            body = json.loads(db.get(ItineraryDocument, itinerary_id).body)
+            assert body["total_price"] == after[itinerary_id]
+    finally:
+        activity.price = original_price
+        db.commit()
+    assert stored_totals(db) == before
+
+
+def test_audit_reports_and_full_reprice_repairs_drift(db, count_queries):
+    original = db.get(Itinerary, 4).total_price
+    db.execute(text("UPDATE itineraries SET total_price = total_price + 99 WHERE id = 4"))
+    db.commit()
+    db.expire_all()
+
+    [drift] = audit_prices(db)
+    assert drift.itinerary_id == 4
+    assert drift.computed == original
+
+    version = db.get(Itinerary, 4).version
+    with count_queries(db.get_bind()) as counter:
+        assert reprice_itineraries(db) == [4]
+    # One aggregate UPDATE ... FROM for the whole catalog
+    assert counter.count == 1
+    rebuild_documents(db, [4])
+    db.commit()
+
+    itinerary = db.get(Itinerary, 4)
+    assert itinerary.total_price == original
+    assert itinerary.version == version + 1
+    assert audit_prices(db) == []
+
+
+def test_itinerary_without_daily_plans_is_repriced_to_zero(db):
+    itinerary = Itinerary(name="No plans", description="Nothing booked yet", nights=2, total_price=0)
+    db.add(itinerary)
+    db.commit()
+    try:
+        db.execute(text("UPDATE itineraries SET total_price = 120 WHERE id = :id"), {"id": itinerary.id})
+        db.commit()
+        db.expire_all()
+        assert [drift.itinerary_id for drift in audit_prices(db)] == [itinerary.id]
+        assert reprice_itineraries(db) == [itinerary.id]
+        db.commit()
+        assert db.get(Itinerary, itinerary.id).total_price == 0
+        assert audit_prices(db) == []
+    finally:
+        db.delete(itinerary)
+        db.commit()
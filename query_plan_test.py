@@ -0,0 +1,97 @@
+"""
+EXPLAIN QUERY PLAN regression tests for the hot queries.
+
+Each test runs a read path, captures the statements it executes and fails if
+SQLite plans a full scan of any table for them.
+"""
+import re
+
+import pytest
+from sqlalchemy import select
+
+from app.api.documents import _itineraries_using
+from app.database.db import engine, read_engine
+from app.api.ranking import feature_rows
+from app.mcp.recommendations import build_recommendations, data_version
+from app.models.models import Activity, DailyPlan, Hotel, Location, Transfer
+from claude_mcp_integration import _find_itineraries, _get_itinerary_details
+
+FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)\S+$")
+
+
+def full_scans(counter):
+    scans = []
+    with engine.connect() as connection:
+        for statement, parameters in zip(counter.statements, counter.parameters):
+            if not statement.lstrip().upper().startswith("SELECT"):
+                continue
+            plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            scans += [(row.detail, statement) for row in plan if FULL_SCAN.match(row.detail)]
+    return scans
+
+
+def assert_no_full_scans(counter):
+    assert counter.statements, "nothing was executed"
+    assert full_scans(counter) == []
+
+
+@pytest.mark.parametrize("params", [
+    {"limit": 5},
+    {"limit": 5, "nights": 3},
+    {"limit": 5, "recommended_only": True},
+    {"limit": 5, "nights": 5, "recommended_only": True},
+    {"limit": 5, "view": "summary"},
+    {"limit": 5, "view": "summary", "nights": 3, "recommended_only": True},
+])
+def test_itinerary_list(client, count_queries, params):
+    with count_queries() as counter:
+        assert client.get("/api/v1/itineraries/", params=params).status_code == 200
+    assert_no_full_scans(counter)
+
+
+@pytest.mark.parametrize("params", [
+    {"min_price": 300, "max_price": 1500},
+    {"sort": "nights", "nights": 3},
+    {"region": "both", "boat_transfer": True, "activity_type": "Beach"},
+])
+def test_itinerary_search(client, count_queries, params):
+    with count_queries() as counter:
+        assert client.get("/api/v1/itineraries/search", params=params).status_code == 200
+    assert_no_full_scans(counter)
+
+
+def test_itinerary_detail_and_locations_by_region(client, count_queries):
+    with count_queries() as counter:
+        assert client.get("/api/v1/itineraries/1").status_code == 200
+        assert client.get("/api/v1/locations/", params={"region": "Krabi"}).status_code == 200
+    assert_no_full_scans(counter)
+
+
+def test_export_since(client, count_queries):
+    # The export opens its own read-only session outside of the request
+    with count_queries(read_engine) as counter:
+        response = client.get("/api/v1/itineraries/export", params={"since": "2000-01-01T00:00:00"})
+        assert response.status_code == 200
+    assert_no_full_scans(counter)
+
+
+def test_mcp_tools(db, count_queries):
+    with count_queries(engine) as counter:
+        data_version(db)
+        build_recommendations(db)
+        feature_rows(db)
+        _find_itineraries(db, 7)
+        _get_itinerary_details(db, 1)
+    assert_no_full_scans(counter)
+
+
+def test_catalog_lookups(db, count_queries):
+    with count_queries(engine) as counter:
+        _itineraries_using(db, {Hotel: {1}, Transfer: {1}, Activity: {1}})
+        db.scalars(select(Hotel).where(Hotel.location_id == 1)).all()
+        db.scalars(select(Activity).where(Activity.location_id == 1)).all()
+        db.scalars(select(Transfer).where(Transfer.origin_id == 1, Transfer.destination_id == 2)).all()
+        db.scalars(select(Transfer).where(Transfer.destination_id == 2)).all()
+        db.scalars(select(Location).where(Location.region == "Phuket")).all()
+        db.scalars(select(DailyPlan).where(DailyPlan.itinerary_id == 1).order_by(DailyPlan.day_number)).all()
+    assert_no_full_scans(counter)
@@ -0,0 +1,164 @@
+"""Preference ranking of recommended itineraries over the NumPy feature matrix"""
+import random
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import delete, update
+
+from app.api.ranking import (
+    INTEREST_WEIGHT,
+    OVER_BUDGET_WEIGHT,
+    PACE_HOURS,
+    PACE_WEIGHT,
+    REGION_WEIGHT,
+    STAR_WEIGHT,
+    TRANSFER_HOUR_WEIGHT,
+    Preferences,
+    RecommendationRanker,
+    change_marker,
+    feature_rows,
+    recommendation_ranker,
+)
+from app.database.db import engine
+from app.mcp.server import get_recommended_itinerary, rank_recommended_itineraries
+from app.models.models import Itinerary, utcnow
+from conftest import call_with_lifespan
+
+TYPES = ["Beach", "Water Sport", "Cultural Tour", "Food & Culture", "Nature"]
+
+
+def random_rows(rng, count):
+    rows = []
+    for itinerary_id in range(1, count + 1):
+        nights = rng.randint(2, 8)
+        krabi = rng.randint(0, nights)
+        rows.append((
+            itinerary_id, nights, rng.uniform(200, 3000), rng.uniform(2, 5), rng.uniform(0, 8), rng.uniform(0, 30),
+            {t: rng.randint(1, 3) for t in rng.sample(TYPES, 2)},
+            {name: n for name, n in (("Krabi", krabi), ("Phuket", nights - krabi)) if n},
+        ))
+    return rows
+
+
+def expected_score(row, preferences):
+    """The scoring formula written out for one itinerary"""
+    _, nights, price, stars, transfer_hours, activity_hours, type_counts, region_nights = row
+    tags = [tag.lower() for tag in preferences.interests]
+    matching = sum(count for name, count in type_counts.items() if any(tag in name.lower() for tag in tags))
+    score = stars * STAR_WEIGHT / 5 - transfer_hours / nights * TRANSFER_HOUR_WEIGHT
+    score += INTEREST_WEIGHT * matching / sum(type_counts.values())
+    score += REGION_WEIGHT * sum(n for name, n in region_nights.items() if name in preferences.regions) / nights
+    if preferences.budget:
+        score -= OVER_BUDGET_WEIGHT * max(price - preferences.budget, 0) / preferences.budget
+    if preferences.pace:
+        target = PACE_HOURS[preferences.pace]
+        score -= PACE_WEIGHT * abs((transfer_hours + activity_hours) / nights - target) / target
+    return score
+
+
+def brute_force(rows, preferences, nights, k):
+    scored = [(expected_score(row, preferences), row[0]) for row in rows if nights in (None, row[1])]
+    return [itinerary_id for _, itinerary_id in sorted(scored, key=lambda pair: (-pair[0], pair[1]))[:k]]
+
+
+def test_ranking_matches_brute_force():
+    rng = random.Random(20)
+    rows = random_rows(rng, 500)
+    ranker = RecommendationRanker()
+    ranker._apply(rows, ())
+    for _ in range(20):
+        preferences = Preferences(
+            budget=rng.choice([None, 800.0, 1500.0]),
+            interests=tuple(rng.sample(["beach", "water", "culture", "nature"], rng.randint(0, 2))),
+            pace=rng.choice([None, *PACE_HOURS]),
+            regions=tuple(rng.sample(["Krabi", "Phuket"], rng.randint(0, 1))),
+        )
+        nights = rng.choice([None, 3, 6])
+        # Small k is selected by repeated argmax, larger k by a partial sort
+        k = rng.choice([5, 30])
+        ranked = ranker.rank(preferences, nights, k=k)
+        assert [itinerary_id for itinerary_id, _ in ranked] == brute_force(rows, preferences, nights, k)
+        by_id = {row[0]: row for row in rows}
+        for itinerary_id, score in ranked:
+            assert score == pytest.approx(expected_score(by_id[itinerary_id], preferences), abs=1e-3)
+
+
+def test_rows_update_in_place_and_move_between_nights():
+    rows = random_rows(random.Random(21), 40)
+    ranker = RecommendationRanker()
+    ranker._apply(rows, ())
+    preferences = Preferences(budget=1000.0)
+    best = ranker.rank(preferences, k=1)[0][0]
+    ranker._apply([], [best])
+    assert best not in [i for i, _ in ranker.rank(preferences, k=40)]
+    assert ranker.size == 39
+    # An itinerary that changes length moves to the other block
+    moved = (rows[1][0], 9) + rows[1][2:]
+    ranker._apply([moved], ())
+    assert [i for i, _ in ranker.rank(preferences, nights=9)] == [rows[1][0]]
+    assert ranker.size == 39
+
+
+def set_itinerary(itinerary_id, **values):
+    """Update an itinerary the way another process would: no session hooks, no touch"""
+    with engine.begin() as connection:
+        connection.execute(update(Itinerary.__table__).where(Itinerary.id == itinerary_id).values(**values))
+
+
+def test_refresh_follows_the_database(db):
+    ranker = RecommendationRanker(ttl=3600)
+    ranker.refresh(db)
+    recommended = {row[0] for row in feature_rows(db)}
+    assert ranker.size == len(recommended) and ranker.is_current(change_marker(db))
+    first, second = sorted(recommended)[:2]
+    try:
+        set_itinerary(first, is_recommended=False, updated_at=utcnow())
+        assert not ranker.is_current(change_marker(db))
+        ranker.refresh(db)
+        assert ranker.size == len(recommended) - 1 and ranker.is_current(change_marker(db))
+        assert first not in [i for i, _ in ranker.rank(Preferences(), k=50)]
+        # Stamped at flush before the last refresh but committed after it
+        set_itinerary(second, is_recommended=False, updated_at=utcnow() - timedelta(seconds=1))
+        ranker.refresh(db)
+        assert second not in [i for i, _ in ranker.rank(Preferences(), k=50)]
+    finally:
+        set_itinerary(first, is_recommended=True, updated_at=utcnow())
+        set_itinerary(second, is_recommended=True, updated_at=utcnow())
+    ranker.refresh(db)
+    assert ranker.size == len(recommended)
+
+
+def test_refresh_reloads_after_deletions(db):
+    ranker = RecommendationRanker(ttl=3600)
+    ranker.refresh(db)
+    size = ranker.size
+    extra = Itinerary(name="Extra", description="Deleted again", nights=3, total_price=0, is_recommended=True)
+    db.add(extra)
+    db.commit()
+    ranker.refresh(db)
+    assert ranker.size == size + 1
+    with engine.begin() as connection:
+        connection.execute(delete(Itinerary.__table__).where(Itinerary.id == extra.id))
+    ranker.refresh(db)
+    assert ranker.size == size and extra.id not in ranker.nights_of
+
+
+def test_recommended_itinerary_falls_back_to_the_next_match(monkeypatch):
+    best = call_with_lifespan(get_recommended_itinerary, 4, interests=["beach"])
+    rank = recommendation_ranker.rank
+    # The top match was deleted after the ranking matrix last saw it
+    monkeypatch.setattr(
+        recommendation_ranker, "rank", lambda *args, **kwargs: [(10 ** 6, 99.0)] + rank(*args, **kwargs)
+    )
+    assert call_with_lifespan(get_recommended_itinerary, 4, interests=["beach"]) == best
+
+
+def test_mcp_tools():
+    ranked = call_with_lifespan(rank_recommended_itineraries, budget=1500, interests=["culture"], k=3)
+    assert 0 < len(ranked["itineraries"]) <= 3
+    scores = [item["score"] for item in ranked["itineraries"]]
+    assert scores == sorted(scores, reverse=True)
+
+    best = call_with_lifespan(get_recommended_itinerary, 4, interests=["beach"], pace="relaxed")
+    assert best["nights"] == 4 and best["daily_plans"] and "score" in best
+    assert "error" in call_with_lifespan(get_recommended_itinerary, 4, pace="frantic")
@@ -0,0 +1,52 @@
+"""Read paths go through the read-only engine; writes keep the primary"""
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from conftest import APP_ENGINES
+from app.database.db import ReadSessionLocal, create_read_engine, engine, read_only_url
+from config import DATABASE_READ_ROUTING
+
+routing_only = pytest.mark.skipif(not DATABASE_READ_ROUTING, reason="DATABASE_READ_ROUTING is off")
+
+
+def test_read_only_url():
+    assert read_only_url("sqlite:///./itinerary.db").endswith("?mode=ro&uri=true")
+    assert read_only_url("sqlite://") == "sqlite://"
+    assert read_only_url("postgresql://host/db") == "postgresql://host/db"
+
+
+@routing_only
+def test_read_sessions_cannot_write():
+    db = ReadSessionLocal()
+    try:
+        assert db.execute(text("PRAGMA query_only")).scalar() == 1
+        with pytest.raises(OperationalError):
+            db.execute(text("UPDATE locations SET name = name"))
+    finally:
+        db.close()
+
+
+@routing_only
+def test_get_routes_use_the_read_engine(client, count_queries):
+    primary, reader = APP_ENGINES
+    with count_queries(primary) as writes, count_queries(reader) as reads:
+        assert client.get("/api/v1/itineraries/?limit=5").status_code == 200
+        assert client.get("/api/v1/itineraries/1").status_code == 200
+        assert client.get("/api/v1/locations/").status_code == 200
+    assert writes.count == 0
+    assert reads.count > 0
+
+
+def test_read_engine_on_a_replica_file(tmp_path):
+    replica = tmp_path / "replica.db"
+    with sqlite3.connect(engine.url.database) as source, sqlite3.connect(replica) as target:
+        source.backup(target)
+    replica_engine = create_read_engine(f"sqlite:///{replica}")
+    try:
+        with replica_engine.connect() as connection:
+            assert connection.execute(text("SELECT count(*) FROM itineraries")).scalar() > 0
+    finally:
+        replica_engine.dispose()
@@ -0,0 +1,35 @@
+"""
+Admin command to rebuild every pre-rendered itinerary document, together with
+the itinerary_search rows derived from the same graphs.
+
+Documents are rebuilt automatically when itineraries, daily plans or the
+hotels/activities/transfers they use are written through the ORM. Run this
+after bulk SQL changes, schema changes to ItineraryResponse, or when
+upgrading an existing database:
+    python rebuild_documents.py [--batch-size N]
+"""
+import argparse
+
+from app.database.db import SessionLocal
+from app.database.migrations import upgrade_database
+from app.api.documents import rebuild_all_documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild all itinerary documents")
+    parser.add_argument("--batch-size", type=int, default=500, help="Itineraries per transaction")
+    args = parser.parse_args()
+
+    # Make sure the itinerary_documents table exists on older databases
+    upgrade_database()
+
+    db = SessionLocal()
+    try:
+        count = rebuild_all_documents(db, batch_size=args.batch_size)
+        print(f"Rebuilt {count} itinerary documents.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
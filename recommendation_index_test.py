@@ -0,0 +1,102 @@
+"""Pre-rendered recommendation index behind the MCP recommendation tools"""
+import anyio
+
+from app.database.db import SessionLocal
+from app.mcp.recommendations import RecommendationIndex, build_recommendations, recommendation_index
+from app.mcp.server import (
+    app_lifespan,
+    get_recommendation_index_status,
+    get_recommended_itinerary,
+    get_recommended_itinerary_resource,
+    list_available_durations,
+    mcp,
+)
+from app.models.models import Itinerary
+from conftest import call_with_lifespan
+from config import MAX_NIGHTS, MIN_NIGHTS
+
+
+def recommended(db):
+    return db.query(Itinerary).filter(Itinerary.is_recommended == True).order_by(Itinerary.id).all()
+
+
+def test_snapshot_covers_every_night_count(db):
+    itineraries = recommended(db)
+    snapshot = build_recommendations(db)
+    assert set(snapshot.payloads) == {itinerary.id for itinerary in itineraries}
+    assert snapshot.durations == sorted({itinerary.nights for itinerary in itineraries})
+    for nights in range(MIN_NIGHTS, MAX_NIGHTS + 1):
+        matching = [itinerary for itinerary in itineraries if itinerary.nights == nights]
+        # The first match, or else the first recommended itinerary of any length
+        expected = (matching or itineraries)[0]
+        assert snapshot.by_nights[nights]["id"] == expected.id
+        assert [plan["day"] for plan in snapshot.by_nights[nights]["daily_plans"]] == list(range(1, expected.nights + 1))
+        if matching:
+            assert snapshot.texts[nights].startswith(f"Found {len(matching)} recommended itineraries")
+        else:
+            assert snapshot.texts[nights] == f"No recommended itineraries found for {nights} nights."
+
+
+def test_refresh_rebuilds_only_on_data_version_change(db):
+    index = RecommendationIndex()
+
+    async def refresh():
+        return await index.refresh(db)
+
+    assert anyio.run(refresh)
+    built_at = index.snapshot.built_at
+    assert not anyio.run(refresh)
+    assert index.snapshot.built_at == built_at
+
+    itinerary = recommended(db)[0]
+    original = itinerary.name
+    try:
+        itinerary.name = "Renamed Recommendation"
+        db.commit()
+        assert anyio.run(refresh)
+        assert index.snapshot.payloads[itinerary.id]["name"] == "Renamed Recommendation"
+    finally:
+        itinerary.name = original
+        db.commit()
+
+
+def test_tools_are_lookups(count_queries):
+    call_with_lifespan(get_recommended_itinerary, 4)
+    with count_queries() as counter:
+        payload = call_with_lifespan(get_recommended_itinerary, 4)
+        durations = anyio.run(list_available_durations, None)
+        text = anyio.run(get_recommended_itinerary_resource, "4")
+    # Only the lifespan's own version check runs
+    assert counter.count == 1
+    assert payload["nights"] == 4 and durations == recommendation_index.snapshot.durations
+    assert text == recommendation_index.snapshot.texts[4]
+
+
+def test_background_rebuild_and_status():
+    async def run():
+        async with app_lifespan(mcp):
+            status = await get_recommendation_index_status()
+            assert status["built"] and not status["stale"]
+
+            def rename(name):
+                with SessionLocal() as db:
+                    itinerary = recommended(db)[0]
+                    itinerary.name, previous = name, itinerary.name
+                    db.commit()
+                    return itinerary.id, previous
+
+            itinerary_id, original = await anyio.to_thread.run_sync(rename, "Renamed In Background")
+            try:
+                with anyio.fail_after(5):
+                    while recommendation_index.snapshot.payloads[itinerary_id]["name"] != "Renamed In Background":
+                        await anyio.sleep(0.02)
+                assert (await get_recommendation_index_status())["built_at"] > status["built_at"]
+            finally:
+                await anyio.to_thread.run_sync(rename, original)
+
+    poll_interval = recommendation_index.poll_interval
+    recommendation_index.poll_interval = 0.05
+    try:
+        anyio.run(run)
+    finally:
+        recommendation_index.poll_interval = poll_interval
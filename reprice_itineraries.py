@@ -0,0 +1,41 @@
+"""
+Admin command to audit and repair stored itinerary totals.
+
+Totals are repriced automatically when hotels, transfers, activities or daily
+plans are written through the ORM. Run this after bulk SQL price changes or to
+check the whole catalog for drift:
+    python reprice_itineraries.py --audit   # report drift only
+    python reprice_itineraries.py           # reprice drifted itineraries
+"""
+import argparse
+import sys
+
+from app.database.db import SessionLocal
+from app.api.documents import rebuild_documents
+from app.api.pricing import audit_prices, reprice_itineraries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit and reprice itinerary totals")
+    parser.add_argument("--audit", action="store_true", help="Only report drift, change nothing")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        drift = audit_prices(db)
+        for row in drift:
+            print(f"Itinerary {row.itinerary_id}: stored {row.stored}, computed {row.computed}")
+        print(f"{len(drift)} itineraries with drifted totals.")
+        if args.audit:
+            sys.exit(1 if drift else 0)
+
+        repriced = reprice_itineraries(db)
+        rebuild_documents(db, repriced)
+        db.commit()
+        print(f"Repriced {len(repriced)} itineraries.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Response cache tests"""
+from app.api.response_cache import ResponseCache, response_cache
+from app.models.models import DailyPlan, Itinerary
+
+
+def test_repeated_reads_are_served_from_cache(client, count_queries):
+    first = client.get("/api/v1/itineraries/", params={"nights": 3})
+    with count_queries() as counter:
+        second = client.get("/api/v1/itineraries/", params={"nights": 3})
+    assert counter.count == 0
+    assert second.content == first.content
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert response_cache.snapshot()["hits"] >= 1
+
+
+def test_daily_plan_write_invalidates_detail_and_containing_pages(client, db):
+    itinerary = db.query(Itinerary).filter(Itinerary.nights == 3).first()
+    other_nights = 2 if itinerary.nights != 2 else 4
+    client.get(f"/api/v1/itineraries/{itinerary.id}")
+    client.get("/api/v1/itineraries/", params={"nights": itinerary.nights})
+    client.get("/api/v1/itineraries/", params={"nights": other_nights})
+
+    plan = db.query(DailyPlan).filter(DailyPlan.itinerary_id == itinerary.id).first()
+    plan.notes = (plan.notes or "") + " (cache test)"
+    db.commit()
+
+    assert response_cache.get(("itinerary", itinerary.id)) is None
+    assert response_cache.get(("itineraries", "full", itinerary.nights, False, None, 0, 10)) is None
+    assert response_cache.get(("itineraries", "full", other_nights, False, None, 0, 10)) is not None
+
+
+def test_create_invalidates_matching_list_filters(client):
+    client.get("/api/v1/itineraries/", params={"nights": 2})
+    client.get("/api/v1/itineraries/", params={"nights": 5})
+    client.get("/api/v1/itineraries/", params={"recommended_only": True})
+
+    response = client.post("/api/v1/itineraries/", json={
+        "name": "Cache Test Trip",
+        "description": "Created by the response cache tests",
+        "nights": 2,
+        "daily_plans": [{"day_number": 1, "hotel_id": 1, "activity_ids": [1]}],
+    })
+    assert response.status_code == 200
+
+    assert response_cache.get(("itineraries", "full", 2, False, None, 0, 10)) is None
+    assert response_cache.get(("itineraries", "full", 5, False, None, 0, 10)) is not None
+    # New itineraries are not recommended, so recommended-only pages stay cached
+    assert response_cache.get(("itineraries", "full", None, True, None, 0, 10)) is not None
+
+
+def test_lru_eviction_and_ttl():
+    cache = ResponseCache(maxsize=2, ttl=60)
+    for key in ("a", "b", "c"):
+        cache.put(key, b"{}", {})
+    assert cache.get("a") is None
+    assert cache.snapshot()["evictions"] == 1
+
+    expired = ResponseCache(maxsize=2, ttl=0)
+    expired.put("a", b"{}", {})
+    assert expired.get("a") is None
+    assert expired.snapshot()["expirations"] == 1
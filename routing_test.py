@@ -0,0 +1,111 @@
+"""GET /routes: shortest and Pareto transfer routes on the in-memory graph"""
+import asyncio
+import itertools
+import random
+
+import pytest
+
+from app.api.routing import TransferEdge, TransferGraph, transfer_graph
+from app.mcp.server import find_transfer_route
+from app.models.models import Transfer
+
+URL = "/api/v1/routes"
+
+
+def edge(transfer_id, origin, destination, duration, price):
+    return TransferEdge(transfer_id, origin, destination, "Car", duration, price)
+
+
+def simple_paths(edges, origin, destination):
+    """Every cycle-free path, by exhaustive enumeration"""
+    stack = [(origin, ())]
+    while stack:
+        node, legs = stack.pop()
+        if node == destination:
+            yield legs
+            continue
+        seen = {origin, *(e.destination_id for e in legs)}
+        stack.extend((e.destination_id, legs + (e,)) for e in edges if e.origin_id == node and e.destination_id not in seen)
+
+
+def totals(legs):
+    return round(sum(e.duration for e in legs), 2), round(sum(e.price for e in legs), 2)
+
+
+def test_fastest_cheapest_and_pareto_trade_off():
+    graph = TransferGraph([
+        edge(1, 1, 2, 1.0, 100.0),   # direct and expensive
+        edge(2, 1, 3, 2.0, 10.0),
+        edge(3, 3, 2, 2.0, 10.0),    # slow and cheap
+        edge(4, 1, 4, 2.5, 60.0),
+        edge(5, 4, 2, 2.5, 60.0),    # dominated by both
+    ], {1: "A", 2: "B", 3: "C", 4: "D"})
+    assert [e.transfer_id for e in graph.routes(1, 2, "fastest")[0].legs] == [1]
+    assert [e.transfer_id for e in graph.routes(1, 2, "cheapest")[0].legs] == [2, 3]
+    assert [(r.duration, r.price) for r in graph.routes(1, 2, "pareto")] == [(1.0, 100.0), (4.0, 20.0)]
+    assert graph.routes(2, 1, "fastest") == ()
+    # Memoised per (origin, destination, optimize)
+    assert graph.routes(1, 2, "pareto") is graph.routes(1, 2, "pareto")
+
+
+def test_random_graphs_match_exhaustive_search():
+    rng = random.Random(18)
+    for _ in range(30):
+        nodes = range(1, 8)
+        edges = [
+            edge(n, a, b, rng.choice([0.5, 1, 1.5, 2, 3]), rng.choice([5, 10, 20, 40]))
+            for n, (a, b) in enumerate(rng.sample(list(itertools.permutations(nodes, 2)), 16))
+        ]
+        graph = TransferGraph(edges, {n: str(n) for n in nodes})
+        for origin, destination in itertools.permutations(nodes, 2):
+            candidates = {totals(legs) for legs in simple_paths(edges, origin, destination)}
+            front = sorted(c for c in candidates if not any(
+                o != c and o[0] <= c[0] and o[1] <= c[1] for o in candidates
+            ))
+            assert [(r.duration, r.price) for r in graph.routes(origin, destination, "pareto")] == front
+            fastest = graph.routes(origin, destination, "fastest")
+            cheapest = graph.routes(origin, destination, "cheapest")
+            if candidates:
+                assert fastest[0].duration == min(c[0] for c in candidates)
+                assert cheapest[0].price == min(c[1] for c in candidates)
+            else:
+                assert fastest == cheapest == ()
+
+
+def test_route_between_regions(client):
+    response = client.get(URL, params={"from": 4, "to": 7, "optimize": "cheapest"})
+    assert response.status_code == 200
+    route = response.json()["routes"][0]
+    legs = route["legs"]
+    assert legs[0]["from_id"] == 4 and legs[-1]["to_id"] == 7
+    assert all(a["to_id"] == b["from_id"] for a, b in zip(legs, legs[1:]))
+    assert route["price"] == pytest.approx(sum(leg["price"] for leg in legs))
+
+
+def test_invalid_requests(client):
+    assert client.get(URL, params={"from": 4, "to": 4}).status_code == 400
+    assert client.get(URL, params={"from": 4, "to": 999}).status_code == 404
+    assert client.get(URL, params={"from": 4, "to": 7, "optimize": "scenic"}).status_code == 422
+
+
+def test_graph_is_replaced_when_transfers_change(client, db):
+    before = client.get(URL, params={"from": 4, "to": 1}).json()["routes"][0]
+    assert transfer_graph.current is not None
+    transfer = db.get(Transfer, 1)
+    original = transfer.duration
+    try:
+        transfer.duration = 9.5
+        db.commit()
+        assert transfer_graph.current is None
+        after = client.get(URL, params={"from": 4, "to": 1}).json()["routes"][0]
+        assert after["duration"] > before["duration"]
+        assert after["duration"] == pytest.approx(sum(leg["duration"] for leg in after["legs"]))
+    finally:
+        transfer.duration = original
+        db.commit()
+
+
+def test_mcp_tool():
+    result = asyncio.run(find_transfer_route(4, 7, optimize="pareto"))
+    assert result["from"] == "Phuket Town" and result["routes"]
+    assert "error" in asyncio.run(find_transfer_route(4, 7, optimize="scenic"))
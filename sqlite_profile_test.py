@@ -0,0 +1,36 @@
+"""The SQLite engine profile is applied to every pooled connection"""
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from app.database.db import async_engine, engine, engine_options
+from config import SQLITE_CACHE_SIZE
+
+
+def pragma(bind, name):
+    with bind.connect() as connection:
+        return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_profile_pragmas_on_sync_engine():
+    assert pragma(engine, "journal_mode") == "wal"
+    assert pragma(engine, "synchronous") == 1  # NORMAL
+    assert pragma(engine, "foreign_keys") == 1
+    assert pragma(engine, "temp_store") == 2  # MEMORY
+    assert pragma(engine, "busy_timeout") == 5000
+
+
+@pytest.mark.skipif(async_engine is None, reason="DATABASE_ASYNC is off")
+def test_profile_pragmas_on_async_engine():
+    async def read(*names):
+        async with async_engine.connect() as connection:
+            return [(await connection.execute(text(f"PRAGMA {name}"))).scalar() for name in names]
+
+    assert asyncio.run(read("journal_mode", "foreign_keys", "cache_size")) == ["wal", 1, SQLITE_CACHE_SIZE]
+
+
+def test_pool_sized_for_file_databases_only():
+    assert engine_options("sqlite:///./itinerary.db")["pool_size"] == 10
+    assert "pool_size" not in engine_options("sqlite://")
+    assert "check_same_thread" not in engine_options("sqlite+aiosqlite:///./x.db").get("connect_args", {})